@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+快照格式基准测试：对比 tasks.json 和二进制快照 tasks.bin 的保存、加载和启动耗时
+
+列说明（耗时单位毫秒）：
+    save        保存全新的任务数据（每个任务都需要编码）
+    resave      加载后原样保存（二进制快照中未修改的任务直接复制原记录）
+    load        加载文件
+    startup     创建 TaskHandler（加载、解析时间、建立ID索引和筛选索引等）
+    full_decode 加载后读取每个任务的全部字段（延迟解码的最坏情况）
+    size_kb     文件大小
+
+用法：python -m benchmarks.bench_snapshot [任务数 ...]
+所有数据写入临时目录，不会改动当前目录下的 tasks.json
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+sys.path.insert(0, '.')
+from benchmarks.bench_storage import timed
+from benchmarks.workload import generate_tasks
+from core.data_manager import DataManager
+from core.task_handler import TaskHandler
+
+
+def bench_format(manager, tasks):
+    """测试一种快照格式，返回各项结果"""
+    results = {"save": timed(lambda: manager.save_tasks(tasks), repeat=3)}
+    loaded = manager.load_tasks()
+    results["resave"] = timed(lambda: manager.save_tasks(loaded), repeat=3)
+    results["load"] = timed(manager.load_tasks, repeat=3)
+
+    TaskHandler(manager)  # 先处理一次超时和紧急度提升，之后的启动不再触发保存
+    results["startup"] = timed(lambda: TaskHandler(manager), repeat=3)
+
+    def full_decode():
+        for task_list in manager.load_tasks().values():
+            for task in task_list:
+                dict(task.items())
+    results["full_decode"] = timed(full_decode, repeat=3)
+    results["size_kb"] = os.path.getsize(manager.file_path) / 1024
+    return results
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    workdir = tempfile.mkdtemp(prefix="bench_snapshot_")
+    columns = ["save", "resave", "load", "startup", "full_decode", "size_kb"]
+    try:
+        print(f"{'格式':<8}{'任务数':>8}" + "".join(f"{col:>12}" for col in columns))
+        for size in sizes:
+            tasks = generate_tasks(size)
+            for task_list in tasks.values():
+                for task in task_list:
+                    task["id"] = uuid.uuid4().hex
+            for snapshot_format, file_name in (("json", "tasks.json"), ("binary", "tasks.bin")):
+                manager = DataManager(os.path.join(workdir, f"{size}_{file_name}"), 0, snapshot_format)
+                results = bench_format(manager, tasks)
+                print(f"{snapshot_format:<8}{size:>8}" + "".join(f"{results[col]:>12.1f}" for col in columns))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
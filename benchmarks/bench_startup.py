@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+启动耗时基准测试：从进程启动到任务列表显示，以及第一次打开统计标签页的耗时
+
+每轮在新的子进程中启动主窗口（模块导入缓存不影响结果），数据写入临时目录。
+列说明（耗时单位毫秒，从子进程开始执行算起）：
+    import      导入 PyQt5 和主窗口模块
+    lists_shown 创建主窗口并显示，任务列表已绘制
+    mpl_loaded  任务列表显示时 matplotlib 是否已导入（应为 no）
+    stats_tab   切换到统计标签页，统计图表已绘制（此时才导入matplotlib）
+
+用法：python -m benchmarks.bench_startup [任务数 ...]
+没有显示环境时可设置 QT_QPA_PLATFORM=offscreen
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REPEAT = 3
+
+
+def child(workdir):
+    """子进程：在 workdir 中启动主窗口并记录各阶段耗时，结果以JSON输出到最后一行"""
+    start = time.perf_counter()
+    os.chdir(workdir)
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+    from ui.main_window import MainWindow
+    imported = time.perf_counter()
+
+    window = MainWindow()
+    window.show()
+    app.processEvents()
+    lists_shown = time.perf_counter()
+    mpl_loaded = "matplotlib" in sys.modules
+
+    window.tab_widget.setCurrentWidget(window.statistics_tab)
+    app.processEvents()
+    stats_tab = time.perf_counter()
+
+    window.timer.stop()
+    window.data_manager.close()
+    print(json.dumps({
+        "import": (imported - start) * 1000,
+        "lists_shown": (lists_shown - start) * 1000,
+        "mpl_loaded": mpl_loaded,
+        "stats_tab": (stats_tab - start) * 1000,
+    }))
+    sys.stdout.flush()
+    os._exit(0)  # 不等待全局快捷键等后台线程
+
+
+def main():
+    from benchmarks.workload import generate_tasks
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000]
+    columns = ["import", "lists_shown", "stats_tab"]
+    print(f"{'任务数':>8}" + "".join(f"{col:>14}" for col in columns) + f"{'mpl_loaded':>12}")
+    for size in sizes:
+        workdir = tempfile.mkdtemp(prefix="bench_startup_")
+        try:
+            tasks = generate_tasks(size, with_ids=True)
+            with open(os.path.join(workdir, "tasks.json"), "w", encoding="utf-8") as f:
+                json.dump(tasks, f, ensure_ascii=False)
+
+            runs = []
+            for _ in range(REPEAT):
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--child", workdir],
+                    capture_output=True, text=True, check=True
+                ).stdout
+                runs.append(json.loads(output.strip().splitlines()[-1]))
+            # 每列取最快的一次
+            best = {col: min(run[col] for run in runs) for col in columns}
+            mpl_loaded = "yes" if any(run["mpl_loaded"] for run in runs) else "no"
+            print(f"{size:>8}" + "".join(f"{best[col]:>14.1f}" for col in columns) + f"{mpl_loaded:>12}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        child(sys.argv[2])
+    else:
+        main()
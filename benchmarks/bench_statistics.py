@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+统计聚合基准测试：对比逐个任务累加和 numpy 列式视图建立统计聚合的耗时
+
+统计查询读取增量维护的聚合（与统计天数相关），与任务数有关的只有第一次统计时建立聚合。
+列说明（耗时单位毫秒）：
+    loop        逐个任务调用 StatisticsAggregates.add 建立聚合
+    columns     建立列式视图（逐个任务取字段，转换为 numpy 数组）
+    aggregate   在列式视图上向量化计算聚合
+    columnar    columns + aggregate
+    queries     一次“导出所有数据”的统计查询（趋势三种周期、类别、标签、完成率、平均耗时，一次 query 完成）
+    equal       两种方式得到的聚合是否一致
+
+用法：python -m benchmarks.bench_statistics [任务数 ...]
+"""
+
+import sys
+import time
+
+sys.path.insert(0, '.')
+from benchmarks.bench_storage import timed
+from benchmarks.workload import generate_tasks
+from core.statistics_aggregates import StatisticsAggregates
+from core.statistics_manager import StatisticsManager
+from core.task_columns import TaskColumns
+from core.task_times import cache_task_times
+
+AGGREGATE_FIELDS = ("completed_by_day", "rate_total", "rate_on_time", "duration_count", "duration_seconds")
+
+
+class _Handler:
+    """StatisticsManager 只需要 tasks 属性和 get_statistics 方法"""
+    def __init__(self, tasks, statistics):
+        self.tasks = tasks
+        self.statistics = statistics
+
+    def get_statistics(self):
+        return self.statistics
+
+
+def loop_build(tasks):
+    statistics = StatisticsAggregates()
+    for task_type, task_list in tasks.items():
+        for task in task_list:
+            statistics.add(task_type, task)
+    return statistics
+
+
+def same_aggregates(a, b):
+    """比较两份聚合（忽略计数为0的项）"""
+    if any(+getattr(a, field) != +getattr(b, field) for field in AGGREGATE_FIELDS):
+        return False
+    task_types = set(a.categories) | set(b.categories) | set(a.tags) | set(b.tags)
+    return all(+a.categories[t] == +b.categories[t] and +a.tags[t] == +b.tags[t] for t in task_types)
+
+
+def run_queries(stats):
+    metrics = [('trend', period, 30) for period in ("daily", "weekly", "monthly")]
+    metrics += [('category', None), ('labels', None), ('rate', 30), ('avg_time', 30)]
+    stats.query(metrics)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000, 1000000]
+    columns = ["loop", "columns", "aggregate", "columnar", "queries"]
+    print(f"{'任务数':>8}" + "".join(f"{col:>12}" for col in columns) + f"{'equal':>8}")
+    for size in sizes:
+        tasks = generate_tasks(size)
+        for task_list in tasks.values():
+            for task in task_list:
+                cache_task_times(task)  # 与 TaskHandler 加载后一样，时间字段已解析
+
+        results = {}
+        start = time.perf_counter()
+        looped = loop_build(tasks)
+        results["loop"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        task_columns = TaskColumns(tasks.items())
+        results["columns"] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        columnar = task_columns.to_aggregates()
+        results["aggregate"] = (time.perf_counter() - start) * 1000
+        results["columnar"] = results["columns"] + results["aggregate"]
+
+        stats = StatisticsManager(_Handler(tasks, columnar))
+        results["queries"] = timed(lambda: run_queries(stats), repeat=3)
+        equal = "yes" if same_aggregates(looped, columnar) else "NO"
+        print(f"{size:>8}" + "".join(f"{results[col]:>12.1f}" for col in columns) + f"{equal:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+存储后端基准测试：对比JSON文件和SQLite在不同任务规模下的加载、保存、单次操作和统计查询耗时，
+以及各存储模式下通过后台写入线程新增一个任务的耗时（界面线程中的通知和写入完成）
+
+用法：python -m benchmarks.bench_storage [任务数 ...]
+所有数据写入临时目录，不会改动当前目录下的 tasks.json
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, '.')
+from core.data_manager import DataManager, create_data_manager
+from core.sqlite_data_manager import SQLiteDataManager
+from core.statistics_aggregates import StatisticsAggregates
+from core.statistics_manager import StatisticsManager
+from benchmarks.workload import generate_tasks
+
+
+class _Handler:
+    """StatisticsManager 只需要 tasks、data_manager 属性和 get_statistics 方法"""
+    def __init__(self, data_manager, tasks):
+        self.data_manager = data_manager
+        self.tasks = tasks
+        self.statistics = None
+
+    def get_statistics(self):
+        if self.statistics is None:
+            self.statistics = StatisticsAggregates()
+            for task_type, task_list in self.tasks.items():
+                for task in task_list:
+                    self.statistics.add(task_type, task)
+        return self.statistics
+
+
+def timed(func, repeat=1):
+    """执行函数并返回平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def bench_backend(name, manager, tasks):
+    results = {}
+    results["save"] = timed(lambda: manager.save_tasks(tasks))
+    results["load"] = timed(manager.load_tasks)
+    new_task = dict(tasks["todo"][0] if tasks["todo"] else tasks["done"][0])
+    new_task.pop("done_time", None)
+    results["add"] = timed(lambda: manager.record_changes(tasks, [{"op": "add", "list": "todo", "task": new_task}]))
+    stats = StatisticsManager(_Handler(manager, tasks))
+    # 内存中的统计先建立一次聚合（TaskHandler 在第一次统计时建立，之后增量维护），SQLite 在数据库中统计
+    results["aggregate"] = timed(stats.get_aggregates) if stats.get_query_backend() is None else 0.0
+    results["trend"] = timed(lambda: stats.get_completion_trend("daily", 30), repeat=3)
+    results["category"] = timed(stats.get_category_distribution, repeat=3)
+    results["rate"] = timed(lambda: stats.get_completion_rate(30), repeat=3)
+    results["avg_time"] = timed(lambda: stats.get_average_completion_time(30), repeat=3)
+    return results
+
+
+# 通过后台写入线程测试的任务数
+WORKER_SIZE = 50000
+
+
+def bench_worker(storage_mode, workdir, tasks):
+    """通过后台写入线程新增一个任务：通知耗时（界面线程）和通知加写入完成的总耗时"""
+    directory = os.path.join(workdir, f"worker_{storage_mode}")
+    os.makedirs(directory)
+    cwd = os.getcwd()
+    os.chdir(directory)  # 快照、日志和数据库文件使用相对路径
+    try:
+        worker = create_data_manager({"storage_mode": storage_mode, "write_coalesce_ms": 0})
+        tasks = {task_type: list(task_list) for task_type, task_list in tasks.items()}
+        worker.save_tasks(tasks)
+        worker.flush()
+        notify_ms = []
+        total_ms = []
+        for i in range(5):
+            new_task = dict(tasks["todo"][0], id=f"worker{i:027d}")
+            start = time.perf_counter()
+            tasks["todo"].append(new_task)
+            worker.record_changes(tasks, [{"op": "add", "list": "todo", "task": new_task}])
+            notify_ms.append((time.perf_counter() - start) * 1000)
+            worker.flush()
+            total_ms.append((time.perf_counter() - start) * 1000)
+        worker.close()
+    finally:
+        os.chdir(cwd)
+    return min(notify_ms), min(total_ms)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    workdir = tempfile.mkdtemp(prefix="bench_storage_")
+    columns = ["save", "load", "add", "aggregate", "trend", "category", "rate", "avg_time"]
+    try:
+        print(f"{'后端':<8}{'任务数':>8}" + "".join(f"{col:>10}" for col in columns) + "   (毫秒)")
+        for size in sizes:
+            tasks = generate_tasks(size)
+            backends = [
+                ("json", DataManager(os.path.join(workdir, f"tasks_{size}.json"))),
+                ("sqlite", SQLiteDataManager(os.path.join(workdir, f"tasks_{size}.db"))),
+            ]
+            for name, manager in backends:
+                results = bench_backend(name, manager, tasks)
+                print(f"{name:<8}{size:>8}" + "".join(f"{results[col]:>10.1f}" for col in columns))
+                if hasattr(manager, "close"):
+                    manager.close()
+
+        print(f"\n通过后台写入线程新增一个任务（{WORKER_SIZE} 个任务）")
+        print(f"{'模式':<8}{'通知':>10}{'写入完成':>10}   (毫秒)")
+        worker_tasks = generate_tasks(WORKER_SIZE, with_ids=True)
+        for storage_mode in ("json", "journal", "sqlite"):
+            notify_ms, total_ms = bench_worker(storage_mode, workdir, worker_tasks)
+            print(f"{storage_mode:<8}{notify_ms:>10.2f}{total_ms:>10.2f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
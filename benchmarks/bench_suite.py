@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+核心模块和界面热点路径的基准测试套件，结果保存为JSON文件，与之前的结果对比可发现性能退化
+
+每个任务规模生成一份模拟数据（见 benchmarks/workload.py），写入临时目录后依次计时：
+    handler_init            TaskHandler 初始化（加载、建立索引、解析时间，不含下面三项）
+    check_overdue           启动时第一次检查超时（移动程序关闭期间超时的待办任务）
+    auto_promote            启动时第一次提升紧急度
+    archive                 启动时归档较早的已完成任务
+    check_overdue_tick      之后定时器每次触发时的超时检查
+    auto_promote_tick       之后定时器每次触发时的紧急度检查
+    search_index            建立关键词搜索索引
+    sorted_<列表>           get_sorted_tasks
+    filter_<条件>           filter_tasks（待办、超时、已完成三个列表合计）
+    stats_aggregate         第一次统计时建立统计聚合
+    stats_<方法>            StatisticsManager 的各个查询方法
+    load / save             数据管理器加载和整体保存（直接调用，不经过后台写入线程）
+    window_init             创建并显示主窗口（子进程中，offscreen 平台）
+    refresh_<列表>          没有变化时刷新列表（定时器和每次操作后的路径）
+    refresh_search          输入搜索关键词后刷新所有列表
+    refresh_clear           清空搜索关键词后刷新所有列表
+耗时单位毫秒，可重复执行的项取多次中最快的一次。
+
+用法：python -m benchmarks.bench_suite [任务数 ...] [--output 结果文件] [--baseline 之前的结果文件]
+                                     [--config 配置JSON] [--repeat 次数] [--no-ui]
+指定 --baseline 时同时输出之前的耗时和比值，慢于 --threshold 倍（默认1.25）的项标记为退化，
+有退化时以状态码1退出。没有 PyQt5 或 pynput 时跳过界面部分。
+所有数据写入临时目录，不会改动当前目录下的 tasks.json。
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from benchmarks.workload import generate_tasks
+from core.data_manager import create_data_manager
+from core.done_archive import create_done_archive
+from core.statistics_manager import StatisticsManager
+from core.task_handler import TaskHandler
+
+STALE_RATIO = 0.01  # 启动时需要移到超时列表的待办任务比例
+FILTERS = {
+    "keyword": {"search_text": "任务1"},
+    "category": {"category": "工作"},
+    "tag": {"tag": "重要"},
+    "combined": {"category": "工作", "tag": "紧急", "importance": 3},
+}
+MIN_BASELINE_MS = 1.0  # 之前的耗时低于此值的项计时误差较大，不判断退化
+
+
+def best_of(func, repeat=1):
+    """执行 repeat 次，返回最快一次的耗时（毫秒）"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+@contextlib.contextmanager
+def quiet():
+    """不输出核心模块和界面的调试信息"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+class _DeferredTaskHandler(TaskHandler):
+    """初始化时不检查超时、不提升紧急度、不归档，留给基准测试单独计时"""
+    deferred = True
+
+    def check_overdue_tasks(self):
+        return [] if self.deferred else super().check_overdue_tasks()
+
+    def auto_promote_urgency(self):
+        return [] if self.deferred else super().auto_promote_urgency()
+
+    def archive_done_tasks(self):
+        return 0 if self.deferred else super().archive_done_tasks()
+
+
+def stats_queries(stats):
+    """StatisticsManager 的各个查询方法，统计天数取界面的默认值30天"""
+    export_metrics = [('trend', period, 30) for period in ("daily", "weekly", "monthly")]
+    export_metrics += [('category', None), ('labels', None), ('rate', 30), ('avg_time', 30)]
+    return [
+        ("all_tasks", stats.get_all_tasks),
+        ("completed_tasks", stats.get_completed_tasks),
+        ("tasks_by_type", stats.get_tasks_by_type),
+        ("todo_tasks", stats.get_todo_tasks),
+        ("overdue_tasks", stats.get_overdue_tasks),
+        ("total_count", stats.get_total_tasks_count),
+        ("trend_daily", lambda: stats.get_completion_trend("daily", 30)),
+        ("trend_weekly", lambda: stats.get_completion_trend("weekly", 30)),
+        ("trend_monthly", lambda: stats.get_completion_trend("monthly", 30)),
+        ("category", stats.get_category_distribution),
+        ("labels", stats.get_label_distribution),
+        ("rate", lambda: stats.get_completion_rate(30)),
+        ("avg_time", lambda: stats.get_average_completion_time(30)),
+        ("query_export", lambda: stats.query(export_metrics)),  # “导出所有数据”的一次查询
+    ]
+
+
+def bench_core(config, repeat):
+    """在当前目录（已写入 tasks.json）中测试核心模块，返回 (耗时, 计数)"""
+    timings, counts = {}, {}
+    data_manager = create_data_manager(config)
+    start = time.perf_counter()
+    handler = _DeferredTaskHandler(data_manager, create_done_archive(config))
+    timings["handler_init"] = (time.perf_counter() - start) * 1000
+
+    handler.deferred = False
+    timings["check_overdue"] = best_of(lambda: counts.update(overdue_moved=len(handler.check_overdue_tasks())))
+    timings["auto_promote"] = best_of(lambda: counts.update(promoted=len(handler.auto_promote_urgency())))
+    timings["archive"] = best_of(lambda: counts.update(archived=handler.archive_done_tasks()))
+    timings["check_overdue_tick"] = best_of(handler.check_overdue_tasks, repeat)
+    timings["auto_promote_tick"] = best_of(handler.auto_promote_urgency, repeat)
+    counts.update({task_type: len(task_list) for task_type, task_list in handler.tasks.items()})
+
+    timings["search_index"] = best_of(handler.build_search_index)
+    for task_type in handler.tasks:
+        timings[f"sorted_{task_type}"] = best_of(lambda t=task_type: handler.get_sorted_tasks(t), repeat)
+    for name, criteria in FILTERS.items():
+        timings[f"filter_{name}"] = best_of(
+            lambda c=criteria: [handler.filter_tasks(task_type, c) for task_type in handler.tasks], repeat
+        )
+
+    stats = StatisticsManager(handler)
+    timings["stats_aggregate"] = best_of(handler.get_statistics)
+    for name, func in stats_queries(stats):
+        timings[f"stats_{name}"] = best_of(func, repeat)
+    data_manager.close()
+
+    # 启动时的变化写入后，测试稳定状态下数据文件的加载和保存
+    manager = create_data_manager(config)
+    tasks = manager.load_tasks()
+    timings["load"] = best_of(manager.manager.load_tasks, repeat)
+    timings["save"] = best_of(lambda: manager.manager.save_tasks(tasks), repeat)
+    manager.close()
+    return timings, counts
+
+
+def child(workdir, repeat):
+    """子进程：在 workdir 中创建主窗口并测试列表刷新，结果以JSON输出到最后一行"""
+    os.chdir(workdir)
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+    from ui.main_window import MainWindow
+
+    timings = {}
+    with quiet():
+        start = time.perf_counter()
+        window = MainWindow()
+        window.show()
+        app.processEvents()
+        timings["window_init"] = (time.perf_counter() - start) * 1000
+        window.timer.stop()
+
+        for task_type in ("todo", "overdue", "done"):
+            timings[f"refresh_{task_type}"] = best_of(lambda t=task_type: window.refresh_list(t), repeat)
+
+        def search(text):
+            window.search_input.setText(text)
+            window.search_timer.stop()  # 不等待延迟搜索，直接刷新
+            window.handle_search_filter()
+            app.processEvents()
+        search_times, clear_times = [], []
+        for _ in range(repeat):
+            search_times.append(best_of(lambda: search(FILTERS["keyword"]["search_text"])))
+            clear_times.append(best_of(lambda: search("")))
+        timings["refresh_search"] = min(search_times)
+        timings["refresh_clear"] = min(clear_times)
+        window.data_manager.close()
+
+    print(json.dumps(timings))
+    sys.stdout.flush()
+    os._exit(0)  # 不等待全局快捷键等后台线程
+
+
+def bench_ui(workdir, repeat):
+    """在子进程中测试界面，返回 (耗时, 跳过原因)"""
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", workdir, str(repeat)],
+        capture_output=True, text=True, env=env
+    )
+    lines = process.stdout.strip().splitlines()
+    if process.returncode != 0 or not lines:
+        errors = process.stderr.strip().splitlines()
+        return {}, errors[-1] if errors else f"子进程退出码 {process.returncode}"
+    return json.loads(lines[-1]), None
+
+
+def git_commit():
+    """当前代码的提交（不在git仓库中时为None）"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_size(size, entry, baseline, threshold):
+    """输出一个任务规模的结果，返回退化的项目列表"""
+    regressions = []
+    previous = (baseline or {}).get("sizes", {}).get(str(size), {}).get("timings", {})
+    counts = ", ".join(f"{key}={value}" for key, value in entry["counts"].items())
+    print(f"\n任务数 {size}（{counts}）")
+    if entry.get("ui_skipped"):
+        print(f"  界面部分已跳过：{entry['ui_skipped']}")
+    for name, value in entry["timings"].items():
+        line = f"  {name:<24}{value:>10.1f}"
+        if name in previous:
+            ratio = value / previous[name] if previous[name] > 0 else float("inf")
+            line += f"{previous[name]:>10.1f}{ratio:>8.2f}x"
+            if previous[name] >= MIN_BASELINE_MS and ratio > threshold:
+                line += "  退化"
+                regressions.append((size, name, previous[name], value))
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="核心模块和界面热点路径的基准测试套件")
+    parser.add_argument("sizes", nargs="*", type=int, default=[1000, 10000], help="任务数")
+    parser.add_argument("--output", default="bench_suite.json", help="结果文件（JSON）")
+    parser.add_argument("--baseline", help="之前的结果文件，用于对比")
+    parser.add_argument("--threshold", type=float, default=1.25, help="慢于之前多少倍算作退化")
+    parser.add_argument("--config", default="{}", help="配置（JSON），如 '{\"storage_mode\": \"sqlite\"}'")
+    parser.add_argument("--repeat", type=int, default=3, help="可重复执行的项的执行次数")
+    parser.add_argument("--no-ui", action="store_true", help="不测试界面")
+    args = parser.parse_args()
+
+    config = json.loads(args.config)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "repeat": args.repeat,
+        "sizes": {},
+    }
+    output = os.path.abspath(args.output)
+    original_dir = os.getcwd()
+    regressions = []
+    for size in args.sizes:
+        workdir = tempfile.mkdtemp(prefix="bench_suite_")
+        try:
+            os.chdir(workdir)
+            tasks = generate_tasks(size, stale_ratio=STALE_RATIO, with_ids=True)
+            with open("tasks.json", "w", encoding="utf-8") as f:
+                json.dump(tasks, f, ensure_ascii=False)
+            with open("config.json", "w", encoding="utf-8") as f:
+                json.dump(config, f, ensure_ascii=False)
+            del tasks
+
+            with quiet():
+                timings, counts = bench_core(config, args.repeat)
+            entry = {"counts": counts, "timings": timings}
+            if not args.no_ui:
+                ui_timings, skipped = bench_ui(workdir, args.repeat)
+                timings.update(ui_timings)
+                if skipped:
+                    entry["ui_skipped"] = skipped
+            report["sizes"][str(size)] = entry
+            regressions += print_size(size, entry, baseline, args.threshold)
+        finally:
+            os.chdir(original_dir)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {output}")
+    if regressions:
+        print(f"{len(regressions)} 项慢于之前结果的 {args.threshold} 倍")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3 and sys.argv[1] == "--child":
+        child(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
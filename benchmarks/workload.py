@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基准测试的模拟任务数据
+
+生成的任务与程序保存的格式相同：创建时间分布在最近一年内，截止时间为创建后1小时到30天
+（约10%没有截止日期），类别和标签随机选取，大部分任务已完成。同一 seed 生成的数据相同。
+"""
+
+import random
+from datetime import datetime, timedelta
+
+CATEGORIES = ["工作", "学习", "生活", "其他"]
+TAGS = ["重要", "紧急", "常规", "计划"]
+
+
+def generate_tasks(count, done_ratio=0.8, seed=0, stale_ratio=0.0, with_ids=False):
+    """生成指定数量的模拟任务数据，大部分为已完成任务
+
+    Args:
+        count: 任务总数
+        done_ratio: 已完成任务的比例
+        seed: 随机数种子
+        stale_ratio: 截止时间已过但仍在待办列表中的任务比例
+            （程序关闭期间超时，启动后由 check_overdue_tasks 移到超时列表）
+        with_ids: 是否生成任务ID（按序号生成，不生成时由 TaskHandler 加载后补充）
+
+    Returns:
+        dict: {"todo": [...], "done": [...], "overdue": [...]}
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    tasks = {"todo": [], "done": [], "overdue": []}
+    for i in range(count):
+        create_dt = now - timedelta(days=rng.uniform(0, 365))
+        if rng.random() < 0.1:
+            deadline = "无截止日期"
+            deadline_dt = None
+        else:
+            deadline_dt = create_dt + timedelta(hours=rng.uniform(1, 24 * 30))
+            deadline = deadline_dt.strftime("%Y-%m-%d %H:%M")
+        task = {
+            "name": f"任务{i}",
+            "deadline": deadline,
+            "importance": rng.randint(1, 3),
+            "urgency": rng.randint(1, 5),
+            "category": rng.choice(CATEGORIES),
+            "tags": rng.sample(TAGS, rng.randint(0, 2)),
+            "create_time": create_dt.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        if with_ids:
+            task = {"id": f"{seed:08x}{i:024x}", **task}
+        roll = rng.random()
+        if roll < done_ratio:
+            done_dt = min(create_dt + timedelta(hours=rng.uniform(0.5, 24 * 20)), now)
+            task["done_time"] = done_dt.strftime("%Y-%m-%d %H:%M:%S")
+            tasks["done"].append(task)
+        elif deadline_dt is not None and deadline_dt < now:
+            if roll < done_ratio + stale_ratio:
+                tasks["todo"].append(task)
+            else:
+                tasks["overdue"].append(task)
+        else:
+            tasks["todo"].append(task)
+    return tasks
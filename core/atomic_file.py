@@ -0,0 +1,83 @@
+import json
+import os
+import time
+
+
+def backup_path(path, generation):
+    """第 generation 代备份的文件名，1 为最新"""
+    return f"{path}.bak{generation}"
+
+
+def _fsync_directory(path):
+    """同步目录项，保证重命名在断电后仍然有效（Windows 不支持也不需要）"""
+    if os.name == "nt":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _open(path, mode, binary):
+    return open(path, mode + "b") if binary else open(path, mode, encoding="utf-8")
+
+
+def atomic_write(path, write_content, backups=3, binary=False):
+    """原子地写入 path，并保留 backups 代旧版本；write_content(f) 负责写入内容
+
+    先完整写入同目录下的临时文件并 fsync，再依次轮换备份、用 os.replace 替换正式文件。
+    任何时刻崩溃，正式文件要么是旧版本，要么是新版本；正式文件缺失时最新的备份就是上一版本。
+    """
+    temp_path = f"{path}.tmp"
+    with _open(temp_path, "w", binary) as f:
+        write_content(f)
+        f.flush()
+        os.fsync(f.fileno())
+
+    if backups > 0 and os.path.exists(path):
+        for generation in range(backups - 1, 0, -1):
+            older = backup_path(path, generation)
+            if os.path.exists(older):
+                os.replace(older, backup_path(path, generation + 1))
+        os.replace(path, backup_path(path, 1))
+    os.replace(temp_path, path)
+    _fsync_directory(path)
+
+
+def atomic_write_json(path, data, backups=3, **dump_options):
+    """原子地把 data 以JSON写入 path，并保留 backups 代旧版本"""
+    atomic_write(path, lambda f: json.dump(data, f, **dump_options), backups)
+
+
+def load_json_with_backups(path, backups=3):
+    """读取JSON文件，正式文件损坏或缺失时依次尝试临时文件和各代备份，返回值同 load_with_backups"""
+    return load_with_backups(path, json.load, backups)
+
+
+def load_with_backups(path, read_content, backups=3, binary=False):
+    """读取 path，正式文件损坏或缺失时依次尝试临时文件和各代备份
+
+    read_content(f) 负责解析内容，内容无效时应抛出 ValueError。
+
+    临时文件只在上次保存中途崩溃时存在，能完整解析说明它已写完，比正式文件和备份都新。
+
+    Returns:
+        tuple: (数据, 实际读取的文件名, 错误信息列表)；所有文件都不可用时数据为None。
+        正式文件损坏时会被改名保留（.corrupt-时间戳），避免之后的保存把有效备份轮换掉。
+    """
+    errors = []
+    candidates = [path, f"{path}.tmp"] + [backup_path(path, generation) for generation in range(1, backups + 1)]
+    for candidate in candidates:
+        if not os.path.exists(candidate):
+            continue
+        try:
+            with _open(candidate, "r", binary) as f:
+                data = read_content(f)
+        except (OSError, ValueError) as e:
+            errors.append(f"{candidate}: {str(e)}")
+            if candidate == path:
+                os.replace(path, f"{path}.corrupt-{time.strftime('%Y%m%d%H%M%S')}")
+            continue
+        return data, candidate, errors
+    return None, None, errors
@@ -0,0 +1,542 @@
+"""
+紧凑的二进制任务快照格式
+
+文件结构（整数均为小端）：
+    魔数 8 字节 | 之后全部内容的 CRC32 (u32)
+    字符串表：数量 (u32)，每项为长度 (u32) + UTF-8 内容
+    列表数 (u32)，每个列表为列表名在字符串表中的下标 (u32) + 任务数 (u32) + 各任务记录
+    任务记录：定长记录头（以记录总长度开头）+ 变长部分（ID、名称、标签下标、扩展字段JSON）
+
+类别、标签和"无截止日期"等非时间字符串写入字符串表，记录中只保存下标；
+时间字段保存为整数时间戳和格式标记，加载时不需要解析字符串。
+加载后的任务是 LazyTask，各字段在第一次访问时才从记录中解码。
+
+用法：
+    python -m core.binary_snapshot to-binary tasks.json tasks.bin
+    python -m core.binary_snapshot to-json tasks.bin tasks.json
+"""
+
+import json
+import struct
+import sys
+import zlib
+from datetime import datetime
+
+from core.task_times import TIME_FIELDS, cache_key, parse_timestamp
+
+MAGIC = b"TMSNAP\x00\x01"
+_U32 = struct.Struct("<I")
+
+# 记录头：记录总长度, 字段存在标记, 重要度, 紧急度, 类别下标, 三个时间字段的(类型, 值),
+# 名称长度, ID长度, 标签数, 扩展字段长度
+RECORD_HEADER = struct.Struct("<IHBBI" + "Bq" * len(TIME_FIELDS) + "IHHI")
+(H_LENGTH, H_MASK, H_IMPORTANCE, H_URGENCY, H_CATEGORY) = range(5)
+H_TIME = 5  # 第 i 个时间字段的类型和值位于 H_TIME + 2*i 和 H_TIME + 2*i + 1
+H_NAME_LEN, H_ID_LEN, H_TAG_COUNT, H_EXTRA_LEN = range(H_TIME + 2 * len(TIME_FIELDS), H_TIME + 2 * len(TIME_FIELDS) + 4)
+
+# 字段存在标记
+HAS_IMPORTANCE = 1
+HAS_URGENCY = 2
+HAS_CATEGORY = 4
+HAS_TAGS = 8
+HAS_NAME = 16
+HAS_ID = 32
+HAS_EXTRA = 64
+HAS_TIME = tuple(128 << i for i in range(len(TIME_FIELDS)))  # 各时间字段
+
+# 时间字段类型
+TIME_ABSENT = 0
+TIME_SECONDS = 1  # "%Y-%m-%d %H:%M:%S"，值为时间戳
+TIME_MINUTES = 2  # "%Y-%m-%d %H:%M"，值为时间戳
+TIME_STRING = 3  # 其他字符串（如"无截止日期"），值为字符串表下标
+
+_TIMESPEC = {TIME_SECONDS: "seconds", TIME_MINUTES: "minutes"}
+
+# 扩展字段尚未解码的标记（真正的字段名不会以 \x00 开头）
+_EXTRA = "\x00extra"
+_MISSING = object()
+
+# 时间字段的缓存键和在记录头中的位置
+_TIME_SLOTS = tuple((field, cache_key(field), H_TIME + 2 * i) for i, field in enumerate(TIME_FIELDS))
+_CACHE_KEYS = tuple(key for _, key, _ in _TIME_SLOTS)
+_DEADLINE_TS, _CREATE_TIME_TS, _DONE_TIME_TS = _CACHE_KEYS
+_FIELD_CACHE_KEYS = {field: key for field, key, _ in _TIME_SLOTS}  # 时间字段 -> 时间戳缓存键
+
+
+def _timestamp(kind, value, strings):
+    """时间字段对应的缓存时间戳，与 parse_timestamp 的结果一致"""
+    if kind == TIME_SECONDS or kind == TIME_MINUTES:
+        return float(value)
+    if kind == TIME_STRING:
+        return parse_timestamp(strings[value])
+    return None
+
+
+def _decode_name(task):
+    header = task._header
+    start = task._offset + RECORD_HEADER.size + header[H_ID_LEN]
+    return task._snapshot.buffer[start:start + header[H_NAME_LEN]].decode("utf-8")
+
+
+def _decode_tags(snapshot, offset, header):
+    start = offset + RECORD_HEADER.size + header[H_ID_LEN] + header[H_NAME_LEN]
+    encoded = snapshot.buffer[start:start + 4 * header[H_TAG_COUNT]]
+    # 标签组合种类很少，相同的标签下标序列只解码一次
+    tags = snapshot.tag_lists.get(encoded)
+    if tags is None:
+        indexes = struct.unpack(f"<{header[H_TAG_COUNT]}I", encoded)
+        tags = snapshot.tag_lists[encoded] = tuple(snapshot.strings[index] for index in indexes)
+    return list(tags)
+
+
+def _time_decoder(slot):
+    def decode(task):
+        kind, value = task._header[slot], task._header[slot + 1]
+        if kind == TIME_STRING:
+            return task._snapshot.strings[value]
+        return datetime.fromtimestamp(value).isoformat(" ", _TIMESPEC[kind])
+    return decode
+
+
+# 延迟解码的字段：名称和时间字符串（以及扩展字段）；
+# 记录头中的数值、类别、缓存时间戳以及ID、标签是启动时建立索引要用的，创建任务时直接写入
+_DECODERS = {"name": _decode_name}
+_DECODERS.update((field, _time_decoder(slot)) for field, _, slot in _TIME_SLOTS)
+_LAZY_BITS = (("name", HAS_NAME),) + tuple(zip(TIME_FIELDS, HAS_TIME))
+_pending_by_mask = {}  # 字段存在标记 -> 待解码字段集合
+
+
+def _pending_fields(mask):
+    """记录中存在的、延迟解码的字段集合（相同存在标记的任务共享）"""
+    fields = _pending_by_mask.get(mask)
+    if fields is None:
+        names = [name for name, bit in _LAZY_BITS if mask & bit]
+        if mask & HAS_EXTRA:
+            names.append(_EXTRA)
+        fields = _pending_by_mask[mask] = frozenset(names)
+    return fields
+
+
+class BinarySnapshot:
+    """已加载的二进制快照：文件内容（bytes 或内存映射）、字符串表和任务列表"""
+    def __init__(self, buffer, strings, tasks):
+        self.buffer = buffer
+        self.strings = strings
+        self.tasks = tasks
+        self.tag_lists = {}  # 标签下标序列 -> 标签元组
+
+    def close(self):
+        """解码所有任务的剩余字段后释放文件内容（关闭内存映射）
+
+        之后任务不再引用文件内容，保存时重新编码，文件可以被替换或删除。
+        """
+        for task_list in self.tasks.values():
+            for task in task_list:
+                task._materialize()
+                task._dirty = True
+        close = getattr(self.buffer, "close", None)
+        if close is not None:
+            close()
+
+
+class LazyTask(dict):
+    """从二进制快照加载的任务，名称和时间字符串在第一次访问时才解码
+
+    重要度、紧急度、类别、ID、标签和时间戳缓存（_deadline_ts 等）在创建时写入，
+    启动时建立索引、排序和统计只用到这些字段，不需要解码名称、格式化时间字符串或解析时间。
+    时间字段被修改或删除时同步更新对应的时间戳缓存。
+
+    行为与普通任务字典一致：读取、判断是否存在、修改、遍历都可以直接使用；
+    遍历、比较等需要全部字段的操作会先解码剩余字段。
+    修改过持久化字段（非下划线开头）的任务保存时重新编码，未修改的任务直接复制原记录。
+    """
+    __slots__ = ("_snapshot", "_offset", "_header", "_pending", "_dirty")
+
+    def __init__(self, snapshot, offset, header):
+        # 加载时每个任务都要执行，展开写以减少开销
+        strings = snapshot.strings
+        mask = header[H_MASK]
+        deadline_kind, deadline, create_kind, create_time, done_kind, done_time = header[H_TIME:H_TIME + 6]
+        fields = {
+            _DEADLINE_TS: float(deadline) if deadline_kind in _TIMESPEC else _timestamp(deadline_kind, deadline, strings),
+            _CREATE_TIME_TS: (float(create_time) if create_kind in _TIMESPEC
+                              else _timestamp(create_kind, create_time, strings)),
+            _DONE_TIME_TS: float(done_time) if done_kind in _TIMESPEC else _timestamp(done_kind, done_time, strings),
+        }
+        if mask & HAS_ID:
+            start = offset + RECORD_HEADER.size
+            fields["id"] = snapshot.buffer[start:start + header[H_ID_LEN]].decode("utf-8")
+        if mask & HAS_IMPORTANCE:
+            fields["importance"] = header[H_IMPORTANCE]
+        if mask & HAS_URGENCY:
+            fields["urgency"] = header[H_URGENCY]
+        if mask & HAS_CATEGORY:
+            fields["category"] = strings[header[H_CATEGORY]]
+        if mask & HAS_TAGS:
+            fields["tags"] = _decode_tags(snapshot, offset, header)
+        super().__init__(fields)
+        self._snapshot = snapshot
+        self._offset = offset  # 记录头在缓冲区中的位置
+        self._header = header
+        self._pending = _pending_fields(mask)  # 尚未解码的字段，修改前与相同存在标记的任务共享
+        self._dirty = False
+
+    # ---------- 解码 ----------
+
+    def record_bytes(self):
+        """原始记录内容"""
+        return self._snapshot.buffer[self._offset:self._offset + self._header[H_LENGTH]]
+
+    def _discard_pending(self, key):
+        pending = self._pending
+        if type(pending) is frozenset:
+            pending = self._pending = set(pending)
+        pending.discard(key)
+
+    def _load_extra(self):
+        header = self._header
+        start = (self._offset + RECORD_HEADER.size + header[H_ID_LEN] + header[H_NAME_LEN]
+                 + 4 * header[H_TAG_COUNT])
+        extra = json.loads(self._snapshot.buffer[start:start + header[H_EXTRA_LEN]].decode("utf-8"))
+        for key, value in extra.items():
+            dict.setdefault(self, key, value)
+        self._discard_pending(_EXTRA)
+
+    def _load(self, key):
+        """解码指定字段，字段存在时返回True"""
+        pending = self._pending
+        if key in pending:
+            dict.__setitem__(self, key, _DECODERS[key](self))
+            self._discard_pending(key)
+            return True
+        if _EXTRA in pending:
+            self._load_extra()
+            return dict.__contains__(self, key)
+        return False
+
+    def _materialize(self):
+        """解码全部剩余字段"""
+        pending = self._pending
+        if not pending:
+            return
+        for key in list(pending):
+            if key == _EXTRA:
+                self._load_extra()
+            else:
+                dict.__setitem__(self, key, _DECODERS[key](self))
+        self._pending = frozenset()
+
+    # ---------- 字典接口 ----------
+
+    def __missing__(self, key):
+        # 已解码的字段由 dict 直接返回，只有未解码或不存在的字段才会到这里
+        if self._load(key):
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        # self[key] 命中已解码字段时完全在 dict 内部完成，比先调用 dict.get 再判断更快
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._pending or (
+            _EXTRA in self._pending and self._load(key))
+
+    def __setitem__(self, key, value):
+        if key in self._pending:
+            self._discard_pending(key)
+        elif _EXTRA in self._pending and not key.startswith("_"):
+            self._load_extra()
+        dict.__setitem__(self, key, value)
+        if not key.startswith("_"):
+            self._dirty = True
+            if key in _FIELD_CACHE_KEYS:
+                # 时间戳缓存在创建时已按记录写入，时间字段被修改（如重放日志写入 done_time）时同步更新
+                dict.__setitem__(self, _FIELD_CACHE_KEYS[key], parse_timestamp(value))
+
+    def __delitem__(self, key):
+        if key in self._pending:
+            self._discard_pending(key)
+        else:
+            if _EXTRA in self._pending:
+                self._load_extra()
+            dict.__delitem__(self, key)
+        if not key.startswith("_"):
+            self._dirty = True
+            if key in _FIELD_CACHE_KEYS:
+                dict.__setitem__(self, _FIELD_CACHE_KEYS[key], None)
+
+    def pop(self, key, default=_MISSING):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        if default is _MISSING:
+            raise KeyError(key)
+        return default
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def popitem(self):
+        self._materialize()
+        self._dirty = True
+        return dict.popitem(self)
+
+    def clear(self):
+        self._pending = frozenset()
+        self._dirty = True
+        dict.clear(self)
+
+    def __len__(self):
+        if _EXTRA in self._pending:
+            self._load_extra()
+        return dict.__len__(self) + len(self._pending)
+
+    def __iter__(self):
+        self._materialize()
+        return dict.__iter__(self)
+
+    def keys(self):
+        self._materialize()
+        return dict.keys(self)
+
+    def values(self):
+        self._materialize()
+        return dict.values(self)
+
+    def items(self):
+        self._materialize()
+        return dict.items(self)
+
+    def __eq__(self, other):
+        self._materialize()
+        if isinstance(other, LazyTask):
+            other._materialize()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        self._materialize()
+        return dict.__repr__(self)
+
+    def copy(self):
+        """复制任务，未解码的字段在副本中仍延迟解码
+
+        写入线程保存快照时使用：先复制待解码集合再复制已解码字段，
+        期间界面线程解码或修改的字段都会出现在副本的已解码字段中，读取时优先使用。
+        """
+        pending = self._pending
+        if type(pending) is not frozenset:
+            pending = set(pending)
+        task = LazyTask(self._snapshot, self._offset, self._header)
+        dict.update(task, dict.copy(self))
+        task._pending = pending
+        task._dirty = self._dirty
+        return task
+
+
+# ---------- 编码 ----------
+
+def _encode_time(value, intern):
+    """编码时间字段，返回 (类型, 值)；能按原样还原的标准格式保存为时间戳"""
+    if len(value) in (16, 19) and value[10:11] == " ":
+        try:
+            moment = datetime.fromisoformat(value)
+        except ValueError:
+            moment = None
+        if moment is not None and moment.tzinfo is None:
+            kind = TIME_SECONDS if len(value) == 19 else TIME_MINUTES
+            timestamp = int(moment.timestamp())
+            if datetime.fromtimestamp(timestamp).isoformat(" ", _TIMESPEC[kind]) == value:
+                return kind, timestamp
+    return TIME_STRING, intern(value)
+
+
+def _encode_task(task, intern):
+    """把一个任务编码为一条记录"""
+    mask = 0
+    importance = urgency = category = 0
+    task_id = name = b""
+    tags = []
+    times = [(TIME_ABSENT, 0)] * len(TIME_FIELDS)
+    extra = {}
+    for key, value in task.items():
+        if key.startswith("_"):
+            continue  # 缓存字段不保存
+        if key == "id" and isinstance(value, str):
+            mask |= HAS_ID
+            task_id = value.encode("utf-8")
+        elif key == "name" and isinstance(value, str):
+            mask |= HAS_NAME
+            name = value.encode("utf-8")
+        elif key in ("importance", "urgency") and type(value) is int and 0 <= value <= 255:
+            if key == "importance":
+                mask |= HAS_IMPORTANCE
+                importance = value
+            else:
+                mask |= HAS_URGENCY
+                urgency = value
+        elif key == "category" and isinstance(value, str):
+            mask |= HAS_CATEGORY
+            category = intern(value)
+        elif key == "tags" and isinstance(value, list) and all(isinstance(tag, str) for tag in value):
+            mask |= HAS_TAGS
+            tags = [intern(tag) for tag in value]
+        elif key in TIME_FIELDS and isinstance(value, str):
+            i = TIME_FIELDS.index(key)
+            mask |= HAS_TIME[i]
+            times[i] = _encode_time(value, intern)
+        else:
+            extra[key] = value
+
+    extra_bytes = json.dumps(extra, ensure_ascii=False).encode("utf-8") if extra else b""
+    if extra:
+        mask |= HAS_EXTRA
+    time_values = [item for pair in times for item in pair]
+    length = RECORD_HEADER.size + len(task_id) + len(name) + 4 * len(tags) + len(extra_bytes)
+    header = RECORD_HEADER.pack(
+        length, mask, importance, urgency, category, *time_values,
+        len(name), len(task_id), len(tags), len(extra_bytes)
+    )
+    return b"".join((header, task_id, name, struct.pack(f"<{len(tags)}I", *tags), extra_bytes))
+
+
+def encode_snapshot(tasks, strings=None):
+    """把任务数据编码为二进制快照
+
+    strings 为沿用的字符串表（只追加，已有下标不变）。传入上次加载或保存时的字符串表时，
+    从该表解码且未修改的 LazyTask 直接复制原记录，不再逐字段编码。
+    """
+    if strings is None:
+        strings = []
+    string_index = {value: index for index, value in enumerate(strings)}
+
+    def intern(value):
+        index = string_index.get(value)
+        if index is None:
+            index = string_index[value] = len(strings)
+            strings.append(value)
+        return index
+
+    body = []
+    list_names = list(tasks)
+    for list_name in list_names:
+        intern(list_name)
+    body.append(_U32.pack(len(list_names)))
+    for list_name in list_names:
+        task_list = tasks[list_name]
+        body.append(_U32.pack(string_index[list_name]) + _U32.pack(len(task_list)))
+        for task in task_list:
+            if isinstance(task, LazyTask) and not task._dirty and task._snapshot.strings is strings:
+                body.append(task.record_bytes())
+            else:
+                body.append(_encode_task(task, intern))
+
+    table = [_U32.pack(len(strings))]
+    for value in strings:
+        encoded = value.encode("utf-8")
+        table.append(_U32.pack(len(encoded)))
+        table.append(encoded)
+    payload = b"".join(table + body)
+    return MAGIC + _U32.pack(zlib.crc32(payload)) + payload
+
+
+def decode_snapshot(buffer):
+    """解析二进制快照，返回 BinarySnapshot；格式错误或内容损坏时抛出 ValueError"""
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError("不是任务快照文件")
+    position = len(MAGIC)
+    try:
+        (checksum,) = _U32.unpack_from(buffer, position)
+        position += _U32.size
+        with memoryview(buffer) as view:
+            # 及时释放视图，内存映射有未释放的视图时不能关闭
+            valid = zlib.crc32(view[position:]) == checksum
+        if not valid:
+            raise ValueError("任务快照校验失败，文件已损坏")
+
+        (count,) = _U32.unpack_from(buffer, position)
+        position += _U32.size
+        strings = []
+        for _ in range(count):
+            (length,) = _U32.unpack_from(buffer, position)
+            position += _U32.size
+            strings.append(buffer[position:position + length].decode("utf-8"))
+            position += length
+
+        snapshot = BinarySnapshot(buffer, strings, {})
+        (list_count,) = _U32.unpack_from(buffer, position)
+        position += _U32.size
+        for _ in range(list_count):
+            name_index, task_count = struct.unpack_from("<II", buffer, position)
+            position += 8
+            task_list = snapshot.tasks[strings[name_index]] = []
+            for _ in range(task_count):
+                header = RECORD_HEADER.unpack_from(buffer, position)
+                if header[H_LENGTH] < RECORD_HEADER.size:
+                    raise ValueError("任务记录长度错误")
+                task_list.append(LazyTask(snapshot, position, header))
+                position += header[H_LENGTH]
+    except (struct.error, IndexError) as e:
+        raise ValueError(f"任务快照格式错误: {e}")
+    if position != len(buffer):
+        raise ValueError("任务快照长度不符")
+    return snapshot
+
+
+# ---------- 格式转换 ----------
+
+def json_to_binary(json_path, binary_path):
+    """把 tasks.json 转换为二进制快照"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        tasks = json.load(f)
+    with open(binary_path, "wb") as f:
+        f.write(encode_snapshot(tasks))
+    return tasks
+
+
+def binary_to_json(binary_path, json_path):
+    """把二进制快照转换为 tasks.json"""
+    with open(binary_path, "rb") as f:
+        snapshot = decode_snapshot(f.read())
+    tasks = {
+        task_type: [dict(task.items()) for task in task_list]
+        for task_type, task_list in snapshot.tasks.items()
+    }
+    for task_list in tasks.values():
+        for task in task_list:
+            for key in _CACHE_KEYS:
+                task.pop(key, None)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(tasks, f, ensure_ascii=False, indent=2)
+    return tasks
+
+
+def main(argv):
+    if len(argv) != 3 or argv[0] not in ("to-binary", "to-json"):
+        print(__doc__)
+        return 1
+    command, source, target = argv
+    convert = json_to_binary if command == "to-binary" else binary_to_json
+    tasks = convert(source, target)
+    print(f"已转换 {sum(len(task_list) for task_list in tasks.values())} 个任务: {source} -> {target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,18 +1,39 @@
 import json
 import os
-from PyQt5.QtWidgets import QMessageBox
+
+from core.errors import ConfigError
+from core.events import EventEmitter
 
 class ConfigManager:
-    """负责程序配置的加载和保存"""
+    """负责程序配置的加载和保存
+
+    读取失败时使用默认配置并发出 "error" 事件；保存失败时抛出 ConfigError。
+    """
     def __init__(self, config_path="config.json"):
         self.config_path = config_path
+        self.events = EventEmitter()
         self.default_config = {
             "window_width": 1600,
             "window_height": 800,
             "show_notifications": True,  # 是否显示提示信息
-            "update_interval": 300,  # 数据更新时间间隔（秒），默认5分钟(300秒)
+            "update_interval": 300,  # 数据更新时间间隔（秒），默认5分钟(300秒)，紧急度和超时状态至少按此间隔重新检查一次
             "categories": ["工作", "学习", "生活", "其他"],  # 默认任务类别
-            "tags": ["重要", "紧急", "常规", "计划"]  # 默认标签列表
+            "tags": ["重要", "紧急", "常规", "计划"],  # 默认标签列表
+            "storage_mode": "json",  # 存储模式：json（整体保存）、journal（追加日志）或 sqlite（数据库）
+            "journal_compact_threshold": 1000,  # 日志模式下累计多少条记录后压缩为快照
+            "sqlite_path": "tasks.db",  # sqlite模式下的数据库文件
+            "snapshot_format": "json",  # json 和 journal 模式的快照格式：json（tasks.json）或 binary（tasks.bin，加载更快）
+            "backup_count": 3,  # 快照文件保留的备份代数（tasks.json.bak1 为最新）
+            "archive_after_days": 90,  # 完成超过多少天的任务移入按月归档（0 表示不归档，sqlite 模式不归档）
+            "archive_dir": "archive",  # 已完成任务归档目录
+            "write_coalesce_ms": 500,  # 后台写入的合并窗口（毫秒），窗口内的多次修改合并为一次写入
+            "list_view_mode": "widget",  # 任务列表显示模式：widget（每个任务一个控件）或 delegate（模型+委托绘制，适合大量任务）
+            "done_page_size": 100,  # 已完成列表每页显示的任务数，滚动到接近底部时加载下一页
+            "log_level": "INFO",  # 日志级别：DEBUG、INFO、WARNING、ERROR
+            "log_levels": {},  # 按模块设置的日志级别，如 {"core.task_handler": "DEBUG"}
+            "log_file": "",  # 日志文件路径，空字符串表示只输出到控制台
+            "log_file_max_kb": 1024,  # 日志文件达到多大（KB）时轮换
+            "log_file_backups": 3  # 保留的旧日志文件个数
         }
 
     def load_config(self):
@@ -24,15 +45,13 @@ class ConfigManager:
                     # 合并默认配置（防止配置项缺失）
                     return {**self.default_config,** config}
             except Exception as e:
-                QMessageBox.warning(None, "配置错误", f"加载配置失败，使用默认设置: {str(e)}")
+                self.events.emit_error(ConfigError(f"加载配置失败，使用默认设置: {str(e)}"))
         return self.default_config
 
     def save_config(self, config):
-        """保存配置"""
+        """保存配置，失败时抛出 ConfigError"""
         try:
             with open(self.config_path, "w", encoding="utf-8") as f:
                 json.dump(config, f, ensure_ascii=False, indent=2)
-            return True
         except Exception as e:
-            QMessageBox.warning(None, "配置错误", f"保存配置失败: {str(e)}")
-            return False
\ No newline at end of file
+            raise ConfigError(f"保存配置失败: {str(e)}") from e
\ No newline at end of file
@@ -1,33 +1,140 @@
-import json
 import os
-from PyQt5.QtWidgets import QMessageBox
+
+from core.atomic_file import atomic_write, atomic_write_json, load_json_with_backups, load_with_backups
+from core.binary_snapshot import decode_snapshot, encode_snapshot
+from core.errors import DataLoadError, DataSaveError
+from core.events import EventEmitter
+from core.persistence_worker import PersistenceWorker
+from core.task_times import strip_cached_fields
 
 class DataManager:
-    """负责任务数据的加载和保存"""
-    def __init__(self, file_path="tasks.json"):
+    """负责任务数据的加载和保存
+
+    保存时先写临时文件再原子替换，并保留 backup_count 代旧版本；加载时正式文件损坏则使用最新的有效备份。
+    snapshot_format 为 "binary" 时使用紧凑的二进制快照（见 core/binary_snapshot.py），
+    加载时各任务的字段延迟解码，保存时未修改的任务直接复制原记录。
+
+    读写错误不弹窗，通过 events 的 "error" 事件通知（参数为 core.errors 中的错误），
+    由 PersistenceWorker 包装后可能在写入线程中发出。
+    """
+    def __init__(self, file_path="tasks.json", backup_count=3, snapshot_format="json", events=None):
         self.file_path = file_path
+        self.events = EventEmitter() if events is None else events
+        self.backup_count = backup_count
+        self.snapshot_format = snapshot_format
+        self.binary_strings = []  # 二进制快照的字符串表，加载和保存之间沿用，已有下标不变
         self.default_data = {
             "todo": [],
             "done": [],
             "overdue": []
         }
 
+    def report_error(self, error):
+        """通知读写错误（可以继续运行的错误，如保存失败、从备份恢复）"""
+        self.events.emit_error(error)
+
     def load_tasks(self):
-        """从文件加载任务数据"""
-        if os.path.exists(self.file_path):
-            try:
-                with open(self.file_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except Exception as e:
-                QMessageBox.warning(None, "错误", f"加载数据失败: {str(e)}")
-        return self.default_data
+        """从文件加载任务数据，正式文件损坏时使用最新的有效备份"""
+        try:
+            if self.snapshot_format == "binary":
+                data, loaded_path, errors = load_with_backups(
+                    self.file_path, lambda f: decode_snapshot(f.read()), self.backup_count, binary=True
+                )
+                if data is not None:
+                    self.binary_strings = data.strings
+                    data = data.tasks
+            else:
+                data, loaded_path, errors = load_json_with_backups(self.file_path, self.backup_count)
+        except OSError as e:
+            data, loaded_path, errors = None, None, [str(e)]
+        if errors:
+            details = "\n".join(errors)
+            if data is not None:
+                self.report_error(DataLoadError(f"任务数据文件损坏，已从 {loaded_path} 恢复:\n{details}"))
+            else:
+                self.report_error(DataLoadError(f"加载数据失败:\n{details}"))
+        if data is None:
+            return self.default_data
+        return data
 
     def save_tasks(self, tasks):
         """保存任务数据到文件"""
         try:
-            with open(self.file_path, "w", encoding="utf-8") as f:
-                json.dump(tasks, f, ensure_ascii=False, indent=2)
+            if self.snapshot_format == "binary":
+                content = encode_snapshot(tasks, self.binary_strings)
+                atomic_write(self.file_path, lambda f: f.write(content), self.backup_count, binary=True)
+                return True
+            # 任务上缓存的解析结果（下划线开头的字段）不保存
+            data = {
+                task_type: [strip_cached_fields(task) for task in task_list]
+                for task_type, task_list in tasks.items()
+            }
+            atomic_write_json(self.file_path, data, self.backup_count, ensure_ascii=False, indent=2)
             return True
         except Exception as e:
-            QMessageBox.warning(None, "错误", f"保存数据失败: {str(e)}")
-            return False
\ No newline at end of file
+            self.report_error(DataSaveError(f"保存数据失败: {str(e)}"))
+            return False
+
+    def record_changes(self, tasks, changes):
+        """记录一批任务变更
+
+        changes 为变更记录列表，每条记录描述一次新增/移动/删除/更新操作。
+        JSON文件模式下无法增量写入，直接整体保存；日志模式会覆盖此方法只追加变更记录。
+        """
+        return self.save_tasks(tasks)
+
+    def needs_tasks(self, change_count):
+        """写入 change_count 条变更记录时是否需要完整的任务列表
+
+        JSON文件模式每次都整体保存，总是需要；日志模式只在压缩时需要，SQLite 模式不需要。
+        后台写入线程据此决定是否复制任务列表。
+        """
+        return True
+
+
+SNAPSHOT_PATHS = {"json": "tasks.json", "binary": "tasks.bin"}
+
+
+def _snapshot_manager(config, snapshot_format, events=None):
+    """JSON文件或日志模式下，使用指定快照格式的数据管理器"""
+    file_path = SNAPSHOT_PATHS[snapshot_format]
+    backup_count = config.get("backup_count", 3)
+    if config.get("storage_mode", "json") == "journal":
+        from core.journal_data_manager import JournalDataManager
+        return JournalDataManager(
+            file_path,
+            compact_threshold=config.get("journal_compact_threshold", 1000),
+            backup_count=backup_count,
+            snapshot_format=snapshot_format,
+            events=events
+        )
+    return DataManager(file_path, backup_count, snapshot_format, events)
+
+
+def create_data_manager(config, events=None):
+    """根据配置创建对应存储模式的数据管理器，写入由后台线程合并后进行
+
+    events 为接收 "error" 事件的 EventEmitter，传入后创建过程中（如转换快照格式）的错误也会通知到。
+    """
+    storage_mode = config.get("storage_mode", "json")
+    if storage_mode in ("json", "journal"):
+        snapshot_format = config.get("snapshot_format", "json")
+        manager = _snapshot_manager(config, snapshot_format, events)
+        # 切换快照格式后，另一种格式的文件比当前格式的新（或当前格式的文件还不存在），
+        # 读取后（日志模式下包括重放日志）以当前格式保存一次
+        other_format = "binary" if snapshot_format == "json" else "json"
+        other_path = SNAPSHOT_PATHS[other_format]
+        if os.path.exists(other_path) and (
+                not os.path.exists(manager.file_path)
+                or os.path.getmtime(other_path) > os.path.getmtime(manager.file_path)):
+            manager.save_tasks(_snapshot_manager(config, other_format, events).load_tasks())
+    elif storage_mode == "sqlite":
+        from core.sqlite_data_manager import SQLiteDataManager, migrate_json_to_sqlite
+        db_path = config.get("sqlite_path", "tasks.db")
+        # 首次切换到SQLite时，自动导入已有的JSON数据
+        if not os.path.exists(db_path) and os.path.exists("tasks.json"):
+            migrate_json_to_sqlite("tasks.json", db_path)
+        manager = SQLiteDataManager(db_path, events=events)
+    else:
+        manager = DataManager(backup_count=config.get("backup_count", 3), events=events)
+    return PersistenceWorker(manager, config.get("write_coalesce_ms", 500) / 1000)
@@ -0,0 +1,221 @@
+import json
+import mmap
+import os
+import re
+import time
+from datetime import datetime
+
+from core.atomic_file import atomic_write
+from core.binary_snapshot import decode_snapshot, encode_snapshot
+from core.filter_index import FilterIndex
+from core.statistics_aggregates import StatisticsAggregates
+from core.task_times import strip_cached_fields, task_timestamp
+
+MONTH_FILE = re.compile(r"^done-(\d{4}-\d{2})\.bin$")
+
+
+def month_of(timestamp):
+    """时间戳所在的月份，如 "2024-05" """
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m")
+
+
+def create_done_archive(config):
+    """根据配置创建已完成任务归档，不归档时返回None
+
+    SQLite 模式下统计和查询都在数据库中完成，不使用归档。
+    """
+    if config.get("storage_mode", "json") == "sqlite" or config.get("archive_after_days", 90) <= 0:
+        return None
+    return DoneArchive(config.get("archive_dir", "archive"), config.get("archive_after_days", 90))
+
+
+class DoneArchive:
+    """已完成任务的按月冷归档
+
+    完成时间早于 after_days 天的已完成任务由 TaskHandler 移出 tasks["done"]，
+    按完成月份写入 archive/done-YYYY-MM.bin（二进制快照格式，月内按完成时间倒序）。
+    归档文件只在需要时以内存映射方式打开：统计较早的时间范围、已完成列表滚动到
+    热数据之后、以及关键词搜索。打开后任务的名称和时间字符串仍在访问时才解码。
+
+    index.json 记录每个月的任务数、文件签名和统计聚合，计数和统计不需要打开归档文件；
+    签名与文件不符时（写入月份文件后、更新索引前崩溃）重新打开该月计算。
+    """
+    def __init__(self, directory="archive", after_days=90):
+        self.directory = directory
+        self.after_days = after_days
+        self.snapshots = {}  # 月份 -> 已打开的快照
+        self.filter_indexes = {}  # 月份 -> 筛选索引，第一次在该月中筛选时建立
+        self.month_list = None  # 已归档的月份（从新到旧），写入后重新扫描
+        self.index = None  # 月份 -> {"count": 任务数, "signature": 文件签名, "statistics": 统计聚合}
+
+    def month_path(self, month):
+        return os.path.join(self.directory, f"done-{month}.bin")
+
+    def index_path(self):
+        return os.path.join(self.directory, "index.json")
+
+    def months(self):
+        """已归档的月份，从新到旧"""
+        if self.month_list is None:
+            names = os.listdir(self.directory) if os.path.isdir(self.directory) else []
+            self.month_list = sorted(
+                (match.group(1) for match in map(MONTH_FILE.match, names) if match), reverse=True
+            )
+        return self.month_list
+
+    def cutoff_timestamp(self):
+        """完成时间早于此时间戳的任务应当归档"""
+        return time.time() - self.after_days * 86400
+
+    # ---------- 读取 ----------
+
+    def load_month(self, month):
+        """打开某个月的归档（内存映射），返回按完成时间倒序的任务列表"""
+        snapshot = self.snapshots.get(month)
+        if snapshot is None:
+            with open(self.month_path(month), "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            snapshot = self.snapshots[month] = decode_snapshot(buffer)
+        return snapshot.tasks.get("done", [])
+
+    def iter_tasks(self, since_ts=None):
+        """依次产生归档任务（从新到旧的月份）；指定 since_ts 时跳过完成月份早于它的月份"""
+        first_month = None if since_ts is None else month_of(since_ts)
+        for month in self.months():
+            if first_month is not None and month < first_month:
+                break
+            yield from self.load_month(month)
+
+    def filter_month(self, month, criteria):
+        """某个月中满足筛选条件的任务，保持完成时间倒序"""
+        tasks = self.load_month(month)
+        if not criteria:
+            return tasks
+        filter_index = self.filter_indexes.get(month)
+        if filter_index is None:
+            filter_index = self.filter_indexes[month] = FilterIndex()
+            for task in tasks:
+                filter_index.add(task)
+        task_ids = filter_index.match(criteria)
+        return [task for task in tasks if task["id"] in task_ids]
+
+    def _signature(self, month):
+        stat = os.stat(self.month_path(month))
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def contains(self, task):
+        """任务是否已在归档中，只打开任务完成时间所在的月份"""
+        done_ts = task_timestamp(task, "done_time")
+        if done_ts is None or month_of(done_ts) not in self.months():
+            return False
+        return any(archived["id"] == task["id"] for archived in self.load_month(month_of(done_ts)))
+
+    def _month_entry(self, month, tasks):
+        """index.json 中某个月的记录"""
+        return {
+            "count": len(tasks),
+            "signature": self._signature(month),
+            "statistics": StatisticsAggregates.from_tasks("done", tasks).to_dict(),
+        }
+
+    def _read_index(self):
+        """读取 index.json（只读取一次），不检查是否与归档文件相符"""
+        if self.index is None:
+            try:
+                with open(self.index_path(), "r", encoding="utf-8") as f:
+                    self.index = json.load(f)
+            except (OSError, ValueError):
+                self.index = {}
+        return self.index
+
+    def _load_index(self):
+        """读取 index.json，重新计算与归档文件不符的月份"""
+        index = self._read_index()
+        stale = False
+        for month in self.months():
+            entry = index.get(month)
+            if entry is None or "statistics" not in entry or entry.get("signature") != self._signature(month):
+                index[month] = self._month_entry(month, self.load_month(month))
+                stale = True
+        for month in set(index) - set(self.months()):
+            del index[month]
+            stale = True
+        if stale:
+            self._save_index()
+        return index
+
+    def count(self):
+        """归档任务总数，只读取 index.json，不打开归档文件"""
+        return sum(entry["count"] for entry in self._load_index().values())
+
+    def statistics(self):
+        """所有归档任务的统计聚合，由 index.json 中各月份的聚合合并，不打开归档文件"""
+        aggregates = StatisticsAggregates()
+        for entry in self._load_index().values():
+            aggregates.merge(StatisticsAggregates.from_dict(entry["statistics"]))
+        return aggregates
+
+    def _save_index(self):
+        atomic_write(self.index_path(), lambda f: json.dump(self.index, f), backups=0)
+
+    # ---------- 写入 ----------
+
+    def _close_month(self, month):
+        """关闭已打开的月份，之后才能替换文件（Windows 不能替换被映射的文件）"""
+        snapshot = self.snapshots.pop(month, None)
+        if snapshot is not None:
+            snapshot.close()
+        self.filter_indexes.pop(month, None)
+
+    def _write_month(self, month, tasks):
+        """写入某个月的全部归档任务，没有任务时删除该月文件"""
+        self._close_month(month)
+        path = self.month_path(month)
+        if tasks:
+            tasks.sort(key=lambda task: task_timestamp(task, "done_time") or 0, reverse=True)
+            content = encode_snapshot({"done": tasks})
+            atomic_write(path, lambda f: f.write(content), backups=0, binary=True)
+        elif os.path.exists(path):
+            os.remove(path)
+        self.month_list = None
+        index = self._read_index()
+        index.pop(month, None)
+        if tasks:
+            index[month] = self._month_entry(month, tasks)
+        self._save_index()
+
+    def add_tasks(self, tasks):
+        """把已完成任务按完成月份写入归档
+
+        与归档中ID相同的任务以新内容为准，重复归档同一任务不会产生重复。
+        任务必须有可解析的完成时间。
+
+        Returns:
+            list: 写入的月份
+        """
+        by_month = {}
+        for task in tasks:
+            by_month.setdefault(month_of(task_timestamp(task, "done_time")), []).append(task)
+        os.makedirs(self.directory, exist_ok=True)
+        for month, new_tasks in by_month.items():
+            merged = {}
+            if month in self.months():
+                for task in self.load_month(month):
+                    merged[task["id"]] = strip_cached_fields(task)
+            for task in new_tasks:
+                merged[task["id"]] = strip_cached_fields(task)
+            self._write_month(month, list(merged.values()))
+        return sorted(by_month)
+
+    def delete_task(self, task_id):
+        """从归档中删除任务，先查找已打开的月份，返回删除的任务，没有找到时返回None"""
+        opened = [month for month in self.months() if month in self.snapshots]
+        for month in opened + [month for month in self.months() if month not in self.snapshots]:
+            tasks = self.load_month(month)
+            for task in tasks:
+                if task["id"] == task_id:
+                    deleted = strip_cached_fields(task)
+                    remaining = [strip_cached_fields(other) for other in tasks if other["id"] != task_id]
+                    self._write_month(month, remaining)
+                    return deleted
+        return None
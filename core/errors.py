@@ -0,0 +1,25 @@
+"""核心模块的错误类型
+
+核心模块不弹出对话框：无法继续的错误直接抛出，可以继续运行的错误
+（从备份恢复、后台写入失败等）通过 "error" 事件通知（见 core/events.py），由界面决定如何提示。
+"""
+
+
+class TaskManagerError(Exception):
+    """核心模块错误的基类"""
+
+
+class DataLoadError(TaskManagerError):
+    """任务数据读取失败，或正式文件损坏后从备份恢复"""
+
+
+class DataSaveError(TaskManagerError):
+    """任务数据写入失败"""
+
+
+class ArchiveError(TaskManagerError):
+    """已完成任务归档读写失败"""
+
+
+class ConfigError(TaskManagerError):
+    """配置读取或保存失败"""
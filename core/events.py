@@ -0,0 +1,33 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class EventEmitter:
+    """按事件名登记回调，emit 时在调用方线程中依次调用
+
+    核心模块通过它通知界面，不依赖 Qt。事件可能在后台写入线程中发出，
+    需要在界面线程中处理的回调由界面自行转交（如连接到 Qt 信号）。
+    """
+    def __init__(self):
+        self.listeners = {}  # 事件名 -> 回调列表
+
+    def connect(self, event, callback):
+        self.listeners.setdefault(event, []).append(callback)
+
+    def disconnect(self, event, callback):
+        callbacks = self.listeners.get(event, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def emit(self, event, *args):
+        """调用事件的所有回调，返回调用的回调数"""
+        callbacks = list(self.listeners.get(event, ()))
+        for callback in callbacks:
+            callback(*args)
+        return len(callbacks)
+
+    def emit_error(self, error):
+        """发出 "error" 事件，没有回调时记录到日志（命令行脚本和测试中不会丢失错误）"""
+        if not self.emit("error", error):
+            logger.error("%s", error)
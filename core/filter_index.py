@@ -0,0 +1,181 @@
+import bisect
+from datetime import datetime
+
+from core.task_times import NO_DEADLINE, task_timestamp
+
+
+# 拼接搜索文本时各字段之间的分隔符，避免跨字段组成的字词被搜索到
+SEARCH_SEPARATOR = "\x00"
+
+
+def search_text_of(task):
+    """任务参与关键词搜索的文本：名称、类别和标签，统一转为小写"""
+    fields = [task.get("name", ""), task.get("category", "")] + list(task.get("tags") or [])
+    return SEARCH_SEPARATOR.join(fields).lower()
+
+
+def search_grams(text):
+    """文本中的单字和相邻双字集合（n-gram），中文不分词也能按任意子串检索"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    grams.discard(SEARCH_SEPARATOR)
+    return {gram for gram in grams if SEARCH_SEPARATOR not in gram}
+
+
+class FilterIndex:
+    """单个任务列表的筛选倒排索引
+
+    按类别、重要度、紧急度和标签保存任务ID集合，按截止时间保存有序数组。
+    筛选时对各条件对应的集合求交集，截止日期范围用二分查找定位，不再逐个扫描任务。
+
+    关键词搜索使用单字和双字的 n-gram 倒排索引：查询词的各个双字对应的集合求交集得到候选任务，
+    查询词超过两个字时再对候选任务做一次子串校验。新登记的任务先放入待索引队列，
+    由 build_search_index 分批加入 n-gram 索引（界面在空闲时调用），搜索前会处理完剩余的队列。
+
+    任务进入或离开列表时由 TaskHandler 调用 add/remove；
+    已登记任务的这些字段被修改时，需先 remove 再修改，修改后重新 add。
+    """
+    FIELDS = ("category", "importance", "urgency")
+
+    def __init__(self):
+        self.by_field = {field: {} for field in self.FIELDS}  # 字段 -> 字段值 -> 任务ID集合
+        self.by_tag = {}  # 标签 -> 任务ID集合
+        self.untagged = set()  # 没有标签的任务
+        self.no_deadline = set()  # 截止日期为"无截止日期"的任务
+        self.deadlines = []  # 按截止时间排序的 (截止时间戳, 任务ID)
+        self.unindexed = {}  # 任务ID -> 任务，尚未加入搜索索引的任务
+        self.search_texts = {}  # 任务ID -> 搜索文本，已加入搜索索引的任务
+        self.grams = {}  # n-gram -> 任务ID集合
+
+    @staticmethod
+    def _field_value(task, field):
+        """任务在索引字段上的取值，与原先逐个比较时的取值方式一致"""
+        return task.get("category", "") if field == "category" else task.get(field)
+
+    def add(self, task):
+        """登记任务"""
+        task_id = task["id"]
+        self.unindexed[task_id] = task
+        for field in self.FIELDS:
+            self.by_field[field].setdefault(self._field_value(task, field), set()).add(task_id)
+
+        tags = task.get("tags") or []
+        if not tags:
+            self.untagged.add(task_id)
+        for tag in tags:
+            self.by_tag.setdefault(tag, set()).add(task_id)
+
+        deadline_ts = task_timestamp(task, "deadline")
+        if deadline_ts is not None:
+            bisect.insort(self.deadlines, (deadline_ts, task_id))
+        elif task.get("deadline", NO_DEADLINE) == NO_DEADLINE:
+            # 有效的截止时间戳说明不是"无截止日期"，只有解析不出时间戳时才需要比较字符串
+            self.no_deadline.add(task_id)
+
+    def remove(self, task):
+        """注销任务，字段值必须与登记时相同"""
+        task_id = task["id"]
+        for field in self.FIELDS:
+            self._discard(self.by_field[field], self._field_value(task, field), task_id)
+        if self.unindexed.pop(task_id, None) is None and task_id in self.search_texts:
+            for gram in search_grams(self.search_texts.pop(task_id)):
+                self._discard(self.grams, gram, task_id)
+
+        self.untagged.discard(task_id)
+        for tag in task.get("tags") or []:
+            self._discard(self.by_tag, tag, task_id)
+
+        self.no_deadline.discard(task_id)
+        deadline_ts = task_timestamp(task, "deadline")
+        if deadline_ts is not None:
+            entry = (deadline_ts, task_id)
+            position = bisect.bisect_left(self.deadlines, entry)
+            if position < len(self.deadlines) and self.deadlines[position] == entry:
+                del self.deadlines[position]
+
+    @staticmethod
+    def _discard(buckets, key, task_id):
+        """从 key 对应的集合中移除任务，集合为空时删除该键"""
+        ids = buckets.get(key)
+        if ids is not None:
+            ids.discard(task_id)
+            if not ids:
+                del buckets[key]
+
+    def build_search_index(self, limit=None):
+        """把待索引队列中的任务加入 n-gram 索引，最多处理 limit 个，返回队列是否已处理完"""
+        grams = self.grams
+        count = 0
+        while self.unindexed and (limit is None or count < limit):
+            task_id, task = self.unindexed.popitem()
+            text = self.search_texts[task_id] = search_text_of(task)
+            for gram in search_grams(text):
+                ids = grams.get(gram)
+                if ids is None:
+                    grams[gram] = {task_id}
+                else:
+                    ids.add(task_id)
+            count += 1
+        return not self.unindexed
+
+    def search(self, search_text):
+        """名称、类别或标签中包含 search_text（小写）的任务ID"""
+        self.build_search_index()
+
+        if len(search_text) <= 2:
+            # 单字和双字直接命中索引
+            return self.grams.get(search_text, set())
+
+        candidates = sorted(
+            (self.grams.get(search_text[i:i + 2], set()) for i in range(len(search_text) - 1)),
+            key=len
+        )
+        result = set(candidates[0])
+        for ids in candidates[1:]:
+            if not result:
+                return result
+            result &= ids
+        # 双字都出现不代表整个词出现，逐个校验候选任务
+        return {task_id for task_id in result if search_text in self.search_texts[task_id]}
+
+    def deadline_range(self, start_date, end_date):
+        """截止时间在 [start_date, end_date) 内的任务ID"""
+        start_ts = datetime.combine(start_date, datetime.min.time()).timestamp()
+        end_ts = datetime.combine(end_date, datetime.min.time()).timestamp()
+        # 任务ID是字符串，("",) 小于同一时间戳下的任何条目
+        first = bisect.bisect_left(self.deadlines, (start_ts, ""))
+        last = bisect.bisect_left(self.deadlines, (end_ts, ""), first)
+        return {task_id for _, task_id in self.deadlines[first:last]}
+
+    def match(self, criteria):
+        """返回满足 criteria 中可索引条件的任务ID集合
+
+        criteria 的键与 MainWindow.get_filter_criteria 返回的一致。
+        没有任何条件时返回None，表示不做限制。
+        """
+        candidates = []
+        if criteria.get("search_text"):
+            candidates.append(self.search(criteria["search_text"]))
+        for field in self.FIELDS:
+            if field in criteria:
+                candidates.append(self.by_field[field].get(criteria[field], set()))
+        if "tag" in criteria:
+            if criteria["tag"] == "无标签":
+                candidates.append(self.untagged)
+            else:
+                candidates.append(self.by_tag.get(criteria["tag"], set()))
+        if criteria.get("no_deadline"):
+            candidates.append(self.no_deadline)
+        if criteria.get("deadline_range"):
+            candidates.append(self.deadline_range(*criteria["deadline_range"]))
+
+        if not candidates:
+            return None
+        # 从最小的集合开始求交集
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for ids in candidates[1:]:
+            if not result:
+                break
+            result &= ids
+        return result
@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+
+from core.data_manager import DataManager
+from core.errors import DataLoadError, DataSaveError
+from core.task_times import strip_cached_fields
+
+logger = logging.getLogger(__name__)
+
+
+class JournalDataManager(DataManager):
+    """日志模式的数据管理器
+
+    任务快照仍保存在 tasks.json（或二进制快照 tasks.bin）中，每次新增/完成/删除等操作只向日志文件追加一条紧凑记录，
+    日志记录数达到阈值时把日志折叠进快照（压缩）。启动时先加载快照，再按顺序重放日志。
+
+    日志第一行是头部记录，保存写入日志时快照文件的签名（大小和修改时间）。
+    如果压缩时快照已替换但日志尚未清空就崩溃，签名不匹配，重放时会跳过这份已折叠的日志。
+    """
+    def __init__(self, file_path="tasks.json", journal_path=None, compact_threshold=1000, backup_count=3,
+                 snapshot_format="json", events=None):
+        super().__init__(file_path, backup_count, snapshot_format, events)
+        self.journal_path = journal_path or os.path.splitext(file_path)[0] + ".journal"
+        self.compact_threshold = compact_threshold
+        self.journal_count = 0  # 当前日志中的变更记录数
+
+    def _snapshot_signature(self):
+        """获取快照文件签名，用于判断日志是否基于当前快照"""
+        if not os.path.exists(self.file_path):
+            return None
+        stat = os.stat(self.file_path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _reset_journal(self):
+        """清空日志，只写入指向当前快照的头部记录"""
+        header = {"op": "base", "snapshot": self._snapshot_signature()}
+        with open(self.journal_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header, separators=(",", ":")) + "\n")
+        self.journal_count = 0
+
+    def load_tasks(self):
+        """加载快照并重放日志"""
+        tasks = super().load_tasks()
+        # 避免重放时修改共享的默认数据
+        tasks = {task_type: list(tasks.get(task_type, [])) for task_type in self.default_data}
+
+        if not os.path.exists(self.journal_path):
+            self._reset_journal()
+            return tasks
+
+        replayed = 0
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except Exception as e:
+            self.report_error(DataLoadError(f"读取任务日志失败: {str(e)}"))
+            return tasks
+
+        if lines:
+            try:
+                header = json.loads(lines[0])
+            except ValueError:
+                header = None
+            if not header or header.get("op") != "base" or header.get("snapshot") != self._snapshot_signature():
+                # 日志不属于当前快照（已被折叠或文件被替换），丢弃
+                logger.warning("任务日志与快照不匹配，跳过重放: %s", self.journal_path)
+                lines = []
+            else:
+                lines = lines[1:]
+
+        index = {}  # 任务ID -> (列表类型, 列表下标)，供按ID重放的记录使用
+        for task_type, task_list in tasks.items():
+            for position, task in enumerate(task_list):
+                if task.get("id"):
+                    index[task["id"]] = (task_type, position)
+
+        for line_no, line in enumerate(lines, 2):
+            try:
+                change = json.loads(line)
+                self.apply_change(tasks, index, change)
+                replayed += 1
+            except Exception as e:
+                # 最后一行可能因崩溃而写了一半，之后的内容不再可信
+                logger.warning("任务日志第%d行损坏，停止重放: %s", line_no, e)
+                break
+
+        self.journal_count = replayed
+        if replayed:
+            # 启动时把日志折叠进快照，避免日志无限增长
+            self.save_tasks(tasks)
+        return tasks
+
+    def save_tasks(self, tasks):
+        """保存完整快照并清空日志（压缩）"""
+        if not super().save_tasks(tasks):
+            return False
+        try:
+            self._reset_journal()
+        except Exception as e:
+            self.report_error(DataSaveError(f"重置任务日志失败: {str(e)}"))
+            return False
+        return True
+
+    def needs_tasks(self, change_count):
+        """只有追加后达到压缩阈值时才需要完整的任务列表"""
+        return self.journal_count + change_count >= self.compact_threshold
+
+    def record_changes(self, tasks, changes):
+        """向日志追加变更记录，达到阈值时压缩
+
+        tasks 为 None 时只追加记录，压缩推迟到下一次提供任务列表的写入。
+        """
+        if not changes:
+            return True
+        try:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                for change in changes:
+                    if "task" in change:
+                        change = dict(change, task=strip_cached_fields(change["task"]))
+                    f.write(json.dumps(change, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self.journal_count += len(changes)
+        except Exception as e:
+            self.report_error(DataSaveError(f"写入任务日志失败: {str(e)}"))
+            return False
+
+        if tasks is not None and self.journal_count >= self.compact_threshold:
+            return self.save_tasks(tasks)
+        return True
+
+    @staticmethod
+    def _remove(tasks, index, task_type, position):
+        """与 TaskHandler 相同的O(1)移除方式：用列表末尾的任务填补空位"""
+        task_list = tasks[task_type]
+        task = task_list[position]
+        last = task_list.pop()
+        if position < len(task_list):
+            task_list[position] = last
+            if last.get("id"):
+                index[last["id"]] = (task_type, position)
+        index.pop(task.get("id"), None)
+        return task
+
+    @classmethod
+    def apply_change(cls, tasks, index, change):
+        """把一条变更记录应用到任务数据上（重放日志时使用）
+
+        记录按任务ID定位，重放方式与 TaskHandler 中的列表操作一致，得到的列表顺序也相同。
+        找不到ID的记录直接跳过，因此重放已折叠进快照的记录不会重复生效。
+        """
+        op = change["op"]
+        if op == "add":
+            task = change["task"]
+            task_id = task.get("id")
+            if task_id not in index:
+                tasks[change["list"]].append(task)
+                if task_id:
+                    index[task_id] = (change["list"], len(tasks[change["list"]]) - 1)
+            return
+
+        location = index.get(change["id"])
+        if location is None:
+            return
+        if op == "move":
+            task = cls._remove(tasks, index, *location)
+            task.update(change.get("set", {}))
+            tasks[change["to"]].append(task)
+            index[task["id"]] = (change["to"], len(tasks[change["to"]]) - 1)
+        elif op == "delete":
+            cls._remove(tasks, index, *location)
+        elif op == "update":
+            task_type, position = location
+            tasks[task_type][position].update(change["set"])
+        else:
+            raise ValueError(f"未知的日志操作: {op}")
@@ -0,0 +1,74 @@
+import logging
+import logging.handlers
+import sys
+
+# 各模块使用 logging.getLogger(__name__)，日志名即模块名（如 core.task_handler、ui.widgets），
+# 可按模块或包（core、ui）分别设置级别。消息使用 %s 占位符和参数，级别未启用时不会格式化。
+CONSOLE_FORMAT = "[%(asctime)s] %(levelname)s %(name)s: %(message)s"
+CONSOLE_DATE_FORMAT = "%H:%M:%S"
+FILE_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(threadName)s]: %(message)s"
+
+logger = logging.getLogger(__name__)
+
+_handlers = []  # configure_logging 添加的输出，重新配置时移除
+_module_levels = []  # configure_logging 设置过级别的模块名，重新配置时恢复为沿用上级
+
+
+def parse_level(level, default=logging.INFO):
+    """日志级别名称（如 "DEBUG"，不区分大小写）或数值转换为级别数值，无法识别时返回 default"""
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).upper())
+    if isinstance(value, int):
+        return value
+    logger.warning("未知的日志级别 %r，使用 %s", level, logging.getLevelName(default))
+    return default
+
+
+def configure_logging(config):
+    """按配置设置日志级别和输出，可重复调用（如修改设置后）
+
+    配置项：
+        log_level         默认日志级别（默认 INFO）
+        log_levels        按模块设置的级别，如 {"core.task_handler": "DEBUG", "ui": "WARNING"}
+        log_file          日志文件路径，空字符串表示不写文件
+        log_file_max_kb   日志文件达到多大（KB）时轮换
+        log_file_backups  保留的旧日志文件个数
+    控制台输出到 stderr；打包为没有控制台窗口的程序时 stderr 为 None，只写日志文件。
+    """
+    root = logging.getLogger()
+    for handler in _handlers:
+        root.removeHandler(handler)
+        handler.close()
+    _handlers.clear()
+    for name in _module_levels:
+        logging.getLogger(name).setLevel(logging.NOTSET)
+    _module_levels.clear()
+
+    if sys.stderr is not None:
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter(CONSOLE_FORMAT, CONSOLE_DATE_FORMAT))
+        _handlers.append(console)
+
+    log_file = config.get("log_file", "")
+    if log_file:
+        try:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file,
+                maxBytes=config.get("log_file_max_kb", 1024) * 1024,
+                backupCount=config.get("log_file_backups", 3),
+                encoding="utf-8"
+            )
+        except OSError as e:
+            file_handler = None
+            logger.warning("无法写入日志文件 %s: %s", log_file, e)
+        if file_handler is not None:
+            file_handler.setFormatter(logging.Formatter(FILE_FORMAT))
+            _handlers.append(file_handler)
+
+    for handler in _handlers:
+        root.addHandler(handler)
+    root.setLevel(parse_level(config.get("log_level", "INFO")))
+    for name, level in config.get("log_levels", {}).items():
+        logging.getLogger(name).setLevel(parse_level(level))
+        _module_levels.append(name)
@@ -0,0 +1,186 @@
+import functools
+import math
+import threading
+import time
+from collections import Counter, deque
+
+from core.atomic_file import atomic_write_json
+
+# 一帧的时间预算（毫秒），界面线程中最外层的计时超过它记为慢帧
+FRAME_BUDGET_MS = 1000 / 60
+
+
+def percentile(sorted_values, q):
+    """已排序数值的 q 分位数（最近秩法），q 取 0~1"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class _Span:
+    """一次计时，由 Profiler.span 创建，用作上下文管理器"""
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._enter()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler._exit(self.name, self.start, time.perf_counter())
+        return False
+
+
+class _NullSpan:
+    """停用记录时的空计时"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Profiler:
+    """热点路径的耗时记录
+
+    每次计时记为 (名称, 开始时间, 耗时, 线程ID)，保存在固定容量的环形缓冲区中，
+    分位数按缓冲区中最近的记录计算；各名称的累计次数单独计数，不受容量限制。
+    界面线程（主线程）中最外层的计时超过 slow_frame_ms 时另外记入慢帧列表。
+    所有记录可导出为 Chrome trace 格式（chrome://tracing 或 Perfetto 打开）。
+
+    计时名称以点分隔，第一段作为 trace 中的分类，如 "task.sort"、"ui.refresh_list"。
+    记录可在任意线程中进行（如后台写入线程的保存）。
+    """
+    def __init__(self, capacity=10000, slow_frame_ms=FRAME_BUDGET_MS, slow_capacity=50):
+        self.enabled = True
+        self.slow_frame_ms = slow_frame_ms
+        self.spans = deque(maxlen=capacity)  # (名称, 开始时间, 耗时秒, 线程ID)
+        self.slow_frames = deque(maxlen=slow_capacity)  # 同上，只有界面线程中最外层的慢计时
+        self.counts = Counter()  # 名称 -> 累计次数
+        self.thread_names = {}  # 线程ID -> 线程名
+        self.origin = time.perf_counter()  # trace 的时间零点
+        self.origin_wall = time.time()  # 与 origin 同一时刻的系统时间，用于显示慢帧发生的时刻
+        self.lock = threading.Lock()
+        self.local = threading.local()  # 当前线程中正在进行的计时层数
+        self.main_thread_id = threading.main_thread().ident
+
+    def span(self, name):
+        """计时一段代码：with profiler.span("名称"): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def timed(self, name):
+        """计时整个函数的装饰器
+
+        包装函数接受任意参数，PyQt 会把信号的参数都传给它；连接到带参数信号（如 clicked）的槽函数
+        应在函数内使用 span。
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _enter(self):
+        self.local.depth = getattr(self.local, "depth", 0) + 1
+
+    def _exit(self, name, start, end):
+        self.local.depth -= 1
+        thread_id = threading.get_ident()
+        record = (name, start, end - start, thread_id)
+        with self.lock:
+            self.spans.append(record)
+            self.counts[name] += 1
+            if thread_id not in self.thread_names:
+                self.thread_names[thread_id] = threading.current_thread().name
+            if (self.local.depth == 0 and thread_id == self.main_thread_id
+                    and (end - start) * 1000 > self.slow_frame_ms):
+                self.slow_frames.append(record)
+
+    def clear(self):
+        with self.lock:
+            self.spans.clear()
+            self.slow_frames.clear()
+            self.counts.clear()
+
+    def summary(self):
+        """各计时名称的统计，按 p95 降序
+
+        Returns:
+            list: [{"name", "count", "samples", "p50", "p95", "max"}]，耗时单位毫秒，
+            count 为累计次数，samples 为环形缓冲区中参与分位数计算的记录数
+        """
+        with self.lock:
+            spans = list(self.spans)
+            counts = dict(self.counts)
+        durations = {}
+        for name, _, duration, _ in spans:
+            durations.setdefault(name, []).append(duration * 1000)
+        result = []
+        for name, count in counts.items():
+            values = sorted(durations.get(name, ()))
+            result.append({
+                "name": name,
+                "count": count,
+                "samples": len(values),
+                "p50": percentile(values, 0.5),
+                "p95": percentile(values, 0.95),
+                "max": values[-1] if values else 0.0,
+            })
+        result.sort(key=lambda item: item["p95"], reverse=True)
+        return result
+
+    def recent_slow_frames(self):
+        """最近的慢帧，最新的在前：[(发生时刻, 名称, 耗时毫秒)]"""
+        with self.lock:
+            frames = list(self.slow_frames)
+        return [
+            (self.origin_wall + (start - self.origin), name, duration * 1000)
+            for name, start, duration, _ in reversed(frames)
+        ]
+
+    def chrome_trace(self):
+        """环形缓冲区中的记录转换为 Chrome trace-event 格式（完整事件 "X"，时间单位微秒）"""
+        with self.lock:
+            spans = list(self.spans)
+            thread_names = dict(self.thread_names)
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": thread_id, "args": {"name": thread_name}}
+            for thread_id, thread_name in thread_names.items()
+        ]
+        for name, start, duration, thread_id in spans:
+            events.append({
+                "name": name,
+                "cat": name.split(".", 1)[0],
+                "ph": "X",
+                "ts": round((start - self.origin) * 1e6, 3),
+                "dur": round(duration * 1e6, 3),
+                "pid": 1,
+                "tid": thread_id,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump_chrome_trace(self, path):
+        """把记录写入 Chrome trace JSON 文件"""
+        atomic_write_json(path, self.chrome_trace(), backups=0)
+
+
+# 全局的耗时记录，核心模块和界面共用
+PROFILER = Profiler()
+span = PROFILER.span
+timed = PROFILER.timed
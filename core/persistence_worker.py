@@ -0,0 +1,143 @@
+import threading
+import time
+
+from core.errors import DataSaveError
+from core.perf import span
+
+
+class PersistenceWorker:
+    """后台写入线程，包装实际的数据管理器
+
+    TaskHandler 的每次修改只向这里发出写入通知，由写入线程在合并窗口结束后一次性写入，
+    界面线程不再等待磁盘。窗口内的多次通知合并为一次写入，崩溃时最多丢失一个合并窗口内的修改。
+
+    日志模式和 SQLite 模式平时只写入变更记录，记录中新增的任务在通知时已复制，不再涉及其他任务。
+    只有整体保存或数据管理器需要完整列表（JSON文件模式、日志压缩，见 needs_tasks）时，
+    通知时才在界面线程中复制列表结构（不复制任务），写入线程再逐个复制任务字典后序列化；
+    字典复制在持有GIL时一次完成，不会读到修改了一半的任务。二进制快照加载的任务（LazyTask）
+    的副本保留未解码的字段，写入时未修改的任务不需要解码。
+    """
+    def __init__(self, manager, coalesce_seconds=0.5):
+        self.manager = manager
+        self.coalesce_seconds = coalesce_seconds
+        self.events = manager.events  # 写入出错时在写入线程中发出 "error" 事件，由界面转交到界面线程显示
+
+        self.condition = threading.Condition()
+        self.snapshot = None  # 需要完整列表时，最近一次通知时各列表的结构副本
+        self.pending_changes = []  # 尚未写入的变更记录
+        self.full_save = False  # 是否需要整体保存（之前的变更记录已被快照包含）
+        self.dirty_since = None  # 第一条尚未写入的通知的时间，None 表示没有待写入的内容
+        self.writing = False
+        self.flush_requested = False
+        self.closed = False
+
+        self.thread = threading.Thread(target=self._run, name="PersistenceWorker", daemon=True)
+        self.thread.start()
+
+    def __getattr__(self, name):
+        """其余接口（如SQLite的查询和统计）转发给实际的数据管理器，调用前先写入待保存的修改"""
+        attr = getattr(self.manager, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self.flush()
+            return attr(*args, **kwargs)
+        return call
+
+    def load_tasks(self):
+        """加载任务数据（启动时在界面线程中同步进行）"""
+        with span("data.load"):
+            return self.manager.load_tasks()
+
+    def save_tasks(self, tasks):
+        """通知整体保存"""
+        with self.condition:
+            self.pending_changes = []
+            self.full_save = True
+            self._notify(tasks)
+        return True
+
+    def record_changes(self, tasks, changes):
+        """通知一批变更记录"""
+        if not changes:
+            return True
+        with self.condition:
+            # 新增记录中的任务之后仍可能被修改，先复制一份
+            self.pending_changes.extend(
+                dict(change, task=dict(change["task"])) if "task" in change else change
+                for change in changes
+            )
+            self._notify(tasks)
+        return True
+
+    def _notify(self, tasks):
+        """唤醒写入线程，需要完整列表时记录当前列表结构，调用时已持有 condition
+
+        needs_tasks 读取的日志记录数由写入线程更新，读到旧值时压缩推迟到下一次写入，不影响数据。
+        """
+        if self.full_save or self.manager.needs_tasks(len(self.pending_changes)):
+            self.snapshot = {task_type: list(task_list) for task_type, task_list in tasks.items()}
+        if self.dirty_since is None:
+            self.dirty_since = time.monotonic()
+        self.condition.notify_all()
+
+    def flush(self):
+        """立即写入所有待保存的修改，等待写入完成"""
+        with self.condition:
+            if self.dirty_since is None and not self.writing:
+                return
+            self.flush_requested = True
+            self.condition.notify_all()
+            while self.dirty_since is not None or self.writing:
+                self.condition.wait()
+            self.flush_requested = False
+
+    def close(self):
+        """写入所有待保存的修改，停止写入线程并关闭实际的数据管理器"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        close = getattr(self.manager, "close", None)
+        if close is not None:
+            close()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.dirty_since is None and not self.closed:
+                    self.condition.wait()
+                if self.dirty_since is None:
+                    return  # 已关闭且没有待写入的内容
+
+                # 等到合并窗口结束，期间的通知合并为一次写入；要求立即写入或关闭时不再等待
+                while not self.closed and not self.flush_requested:
+                    remaining = self.dirty_since + self.coalesce_seconds - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+
+                snapshot, changes, full_save = self.snapshot, self.pending_changes, self.full_save
+                self.snapshot, self.pending_changes, self.full_save = None, [], False
+                self.dirty_since = None
+                self.writing = True
+
+            try:
+                with span("data.save"):
+                    tasks = None
+                    if snapshot is not None:
+                        tasks = {
+                            task_type: [task.copy() for task in task_list]
+                            for task_type, task_list in snapshot.items()
+                        }
+                    if full_save:
+                        self.manager.save_tasks(tasks)
+                    else:
+                        self.manager.record_changes(tasks, changes)
+            except Exception as e:
+                self.manager.report_error(DataSaveError(f"保存数据失败: {str(e)}"))
+            finally:
+                with self.condition:
+                    self.writing = False
+                    self.condition.notify_all()
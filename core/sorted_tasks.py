@@ -0,0 +1,95 @@
+import bisect
+import heapq
+from itertools import islice
+from operator import itemgetter
+
+from core.task_times import NO_DEADLINE, task_timestamp
+
+# 筛选结果占列表的比例超过 1/SCAN_RATIO 时顺序扫描整个有序列表，否则只对筛选结果排序
+SCAN_RATIO = 8
+
+
+def urgency_sort_key(task):
+    """待办和超时列表的排序键
+
+    无截止日期排最后 → 紧急度升序（1最优先）→ 重要度降序（3星最优先）→ 截止时间升序
+    （同一时刻比较剩余时间等价于比较截止时间戳，无法解析的排在同组最后）→ 创建时间 → 任务ID。
+    键只由任务字段决定，不随当前时间变化；最后两项保证键唯一，排序结果与列表中的存放顺序无关。
+    """
+    has_deadline = task["deadline"] != NO_DEADLINE
+    deadline_ts = 0
+    if has_deadline:
+        deadline_ts = task_timestamp(task, "deadline")
+        if deadline_ts is None:
+            deadline_ts = float("inf")
+    return (
+        not has_deadline,
+        task["urgency"] if has_deadline else 0,
+        -task["importance"],
+        deadline_ts,
+        task_timestamp(task, "create_time") or 0,
+        task["id"],
+    )
+
+
+def done_sort_key(task):
+    """已完成列表的排序键：完成时间倒序（没有完成时间的排最后）→ 任务ID"""
+    return (-(task_timestamp(task, "done_time") or 0), task["id"])
+
+
+# 列表类型 -> 排序键，其他列表保持存放顺序
+SORT_KEYS = {
+    "todo": urgency_sort_key,
+    "overdue": urgency_sort_key,
+    "done": done_sort_key,
+}
+
+
+class SortedTaskList:
+    """单个任务列表的有序视图，显示列表时直接按顺序读取，不再排序
+
+    entries 为按排序键升序排列的 (排序键, 任务)，排序键唯一，比较时不会比较到任务本身。
+    任务进入或离开列表时由 TaskHandler 调用 add/remove，用二分查找插入和删除；
+    已登记任务的排序字段（如紧急度）被修改时，需先 remove 再修改，修改后重新 add（与 FilterIndex 相同）。
+    """
+
+    def __init__(self, key, tasks=()):
+        self.key = key
+        self.entries = [(key(task), task) for task in tasks]
+        self.entries.sort(key=itemgetter(0))  # 排序键唯一，只比较排序键
+        self.by_id = {entry[0][-1]: entry for entry in self.entries}  # 任务ID -> 登记时的条目
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, task):
+        """登记任务"""
+        entry = (self.key(task), task)
+        self.by_id[task["id"]] = entry
+        bisect.insort(self.entries, entry)
+
+    def remove(self, task):
+        """注销任务，按登记时的排序键定位，不读取任务当前的字段"""
+        entry = self.by_id.pop(task["id"], None)
+        if entry is None:
+            return
+        position = bisect.bisect_left(self.entries, (entry[0],))
+        if position < len(self.entries) and self.entries[position][0] == entry[0]:
+            del self.entries[position]
+
+    def tasks(self, limit=None):
+        """按顺序排列的任务，指定 limit 时只取前 limit 个"""
+        entries = self.entries if limit is None else self.entries[:limit]
+        return [task for _, task in entries]
+
+    def select(self, task_ids, limit=None):
+        """按顺序排列的 task_ids 中的任务，指定 limit 时只取前 limit 个
+
+        筛选结果较多时顺序扫描列表（取够 limit 个即停止），较少时按登记的排序键只对结果排序。
+        """
+        if len(task_ids) * SCAN_RATIO >= len(self.entries):
+            matches = (task for key, task in self.entries if key[-1] in task_ids)
+            return list(islice(matches, limit))
+        entries = (self.by_id[task_id] for task_id in task_ids)
+        entries = sorted(entries) if limit is None else heapq.nsmallest(limit, entries)
+        return [task for _, task in entries]
@@ -0,0 +1,281 @@
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, date, timedelta
+
+from core.data_manager import DataManager
+from core.errors import DataLoadError, DataSaveError
+from core.task_times import strip_cached_fields, task_timestamp
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    uid TEXT,
+    status TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    deadline TEXT,
+    deadline_ts REAL,
+    importance INTEGER,
+    urgency INTEGER,
+    category TEXT,
+    create_time TEXT,
+    create_ts REAL,
+    done_time TEXT,
+    done_ts REAL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS task_tags (
+    task_id INTEGER NOT NULL,
+    tag TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, position);
+CREATE INDEX IF NOT EXISTS idx_tasks_deadline ON tasks(status, deadline_ts);
+CREATE INDEX IF NOT EXISTS idx_tasks_create_time ON tasks(create_ts);
+CREATE INDEX IF NOT EXISTS idx_tasks_done_time ON tasks(status, done_ts);
+CREATE INDEX IF NOT EXISTS idx_tasks_category ON tasks(category);
+CREATE INDEX IF NOT EXISTS idx_task_tags_tag ON task_tags(tag);
+CREATE INDEX IF NOT EXISTS idx_task_tags_task ON task_tags(task_id);
+"""
+UID_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_uid ON tasks(uid)"
+
+def _date_timestamp(day):
+    """某一天零点的时间戳"""
+    return time.mktime(day.timetuple())
+
+
+class SQLiteDataManager(DataManager):
+    """SQLite存储的数据管理器
+
+    每个任务一行，完整任务数据以JSON保存在data列中，状态、截止时间、创建时间、完成时间、
+    类别另存为带索引的列，标签拆到task_tags表中，按日期范围统计直接在SQL中完成。
+    列表的筛选和排序与其他存储模式相同，由 TaskHandler 中的筛选索引和有序视图在内存中完成。
+    """
+    supports_queries = True  # StatisticsManager 的统计查询下推到SQL
+
+    def __init__(self, file_path="tasks.db", events=None):
+        super().__init__(file_path, events=events)
+        # 写入在 PersistenceWorker 的线程中进行，查询在界面线程中进行（查询前会等待写入完成）
+        self.conn = sqlite3.connect(file_path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        # 旧版本创建的数据库没有uid列（任务ID），补上后由 TaskHandler 的ID迁移整体重写
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(tasks)")]
+        if "uid" not in columns:
+            self.conn.execute("ALTER TABLE tasks ADD COLUMN uid TEXT")
+        self.conn.execute(UID_INDEX)
+        self.conn.commit()
+
+    @staticmethod
+    def _row_values(task):
+        """提取任务中需要建索引的列"""
+        return (
+            task.get("id"),
+            task.get("name", ""),
+            task.get("deadline"),
+            task_timestamp(task, "deadline"),
+            task.get("importance"),
+            task.get("urgency"),
+            task.get("category", "未分类"),
+            task.get("create_time"),
+            task_timestamp(task, "create_time"),
+            task.get("done_time"),
+            task_timestamp(task, "done_time"),
+            json.dumps(strip_cached_fields(task), ensure_ascii=False),
+        )
+
+    def _insert(self, status, position, task):
+        cursor = self.conn.execute(
+            "INSERT INTO tasks (status, position, uid, name, deadline, deadline_ts, importance, urgency, "
+            "category, create_time, create_ts, done_time, done_ts, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (status, position) + self._row_values(task)
+        )
+        task_id = cursor.lastrowid
+        tags = task.get("tags", [])
+        if isinstance(tags, list) and tags:
+            self.conn.executemany(
+                "INSERT INTO task_tags (task_id, tag) VALUES (?, ?)",
+                [(task_id, tag) for tag in tags]
+            )
+        return task_id
+
+    def _next_position(self, status):
+        row = self.conn.execute(
+            "SELECT COALESCE(MAX(position), -1) + 1 FROM tasks WHERE status = ?", (status,)
+        ).fetchone()
+        return row[0]
+
+    def _row_by_uid(self, uid):
+        """按任务ID查找任务行"""
+        row = self.conn.execute("SELECT id, data FROM tasks WHERE uid = ?", (uid,)).fetchone()
+        if row is None:
+            raise KeyError(f"不存在ID为 {uid} 的任务")
+        return row[0], json.loads(row[1])
+
+    def _rewrite(self, task_id, task, status=None):
+        """更新任务行的数据列和索引列，可同时修改状态"""
+        if status is not None:
+            self.conn.execute(
+                "UPDATE tasks SET status = ?, position = ? WHERE id = ?",
+                (status, self._next_position(status), task_id)
+            )
+        self.conn.execute(
+            "UPDATE tasks SET uid = ?, name = ?, deadline = ?, deadline_ts = ?, importance = ?, urgency = ?, "
+            "category = ?, create_time = ?, create_ts = ?, done_time = ?, done_ts = ?, data = ? WHERE id = ?",
+            self._row_values(task) + (task_id,)
+        )
+
+    def _delete(self, task_id):
+        self.conn.execute("DELETE FROM task_tags WHERE task_id = ?", (task_id,))
+        self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def load_tasks(self):
+        """从数据库加载任务数据"""
+        tasks = {task_type: [] for task_type in self.default_data}
+        try:
+            for status, data in self.conn.execute("SELECT status, data FROM tasks ORDER BY status, position"):
+                tasks.setdefault(status, []).append(json.loads(data))
+        except Exception as e:
+            self.report_error(DataLoadError(f"加载数据失败: {str(e)}"))
+        return tasks
+
+    def save_tasks(self, tasks):
+        """整体重写数据库中的任务数据"""
+        task_rows = []
+        tag_rows = []
+        for status, task_list in tasks.items():
+            for position, task in enumerate(task_list):
+                # 整表重写时直接分配行号，便于批量写入标签
+                task_id = len(task_rows) + 1
+                task_rows.append((task_id, status, position) + self._row_values(task))
+                tags = task.get("tags", [])
+                if isinstance(tags, list):
+                    tag_rows.extend((task_id, tag) for tag in tags)
+        try:
+            with self.conn:
+                self.conn.execute("DELETE FROM task_tags")
+                self.conn.execute("DELETE FROM tasks")
+                self.conn.executemany(
+                    "INSERT INTO tasks (id, status, position, uid, name, deadline, deadline_ts, importance, urgency, "
+                    "category, create_time, create_ts, done_time, done_ts, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    task_rows
+                )
+                self.conn.executemany("INSERT INTO task_tags (task_id, tag) VALUES (?, ?)", tag_rows)
+            return True
+        except Exception as e:
+            self.report_error(DataSaveError(f"保存数据失败: {str(e)}"))
+            return False
+
+    def needs_tasks(self, change_count):
+        """变更直接应用到涉及的行，不需要任务列表"""
+        return False
+
+    def record_changes(self, tasks, changes):
+        """在一个事务中把变更应用到数据库，只改动涉及的行（不使用 tasks，可以为 None）"""
+        if not changes:
+            return True
+        try:
+            with self.conn:
+                for change in changes:
+                    op = change["op"]
+                    if op == "add":
+                        self._insert(change["list"], self._next_position(change["list"]), change["task"])
+                    elif op == "move":
+                        task_id, task = self._row_by_uid(change["id"])
+                        task.update(change.get("set", {}))
+                        self._rewrite(task_id, task, status=change["to"])
+                    elif op == "delete":
+                        task_id, _ = self._row_by_uid(change["id"])
+                        self._delete(task_id)
+                    elif op == "update":
+                        task_id, task = self._row_by_uid(change["id"])
+                        task.update(change["set"])
+                        self._rewrite(task_id, task)
+                    else:
+                        raise ValueError(f"未知的变更操作: {op}")
+            return True
+        except Exception as e:
+            self.report_error(DataSaveError(f"保存数据失败: {str(e)}"))
+            return False
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    # ---------- 统计查询接口（下推到SQL） ----------
+
+    def count_completed_by_day(self, start_date, end_date):
+        """统计 [start_date, end_date] 内每天完成的任务数，返回 {日期: 数量}"""
+        rows = self.conn.execute(
+            "SELECT date(done_ts, 'unixepoch', 'localtime') AS day, COUNT(*) FROM tasks "
+            "WHERE status = 'done' AND done_ts >= ? AND done_ts < ? GROUP BY day",
+            (_date_timestamp(start_date), _date_timestamp(end_date + timedelta(days=1)))
+        )
+        return {datetime.strptime(day, "%Y-%m-%d").date(): count for day, count in rows}
+
+    def count_by_category(self, task_type=None):
+        """统计类别分布，按数量降序返回 [(类别, 数量)]"""
+        if task_type is None:
+            rows = self.conn.execute(
+                "SELECT category, COUNT(*) AS n FROM tasks GROUP BY category ORDER BY n DESC"
+            )
+        else:
+            rows = self.conn.execute(
+                "SELECT category, COUNT(*) AS n FROM tasks WHERE status = ? GROUP BY category ORDER BY n DESC",
+                (task_type,)
+            )
+        return rows.fetchall()
+
+    def completion_rate_counts(self, start_date, end_date):
+        """统计 [start_date, end_date] 内创建的任务的按时完成情况
+
+        Returns:
+            tuple: (有截止日期的任务总数, 按时完成数)，口径与 StatisticsManager.get_completion_rate 一致
+        """
+        start_ts = _date_timestamp(start_date)
+        end_ts = _date_timestamp(end_date + timedelta(days=1))
+        row = self.conn.execute(
+            "SELECT "
+            "  SUM(CASE WHEN status = 'done' AND deadline IS NOT NULL AND deadline != '' THEN 1 "
+            "           WHEN status = 'overdue' THEN 1 ELSE 0 END), "
+            "  SUM(CASE WHEN status = 'done' AND done_ts IS NOT NULL AND deadline_ts IS NOT NULL "
+            "           AND done_ts <= deadline_ts THEN 1 ELSE 0 END) "
+            "FROM tasks WHERE status IN ('done', 'overdue') AND create_ts >= ? AND create_ts < ?",
+            (start_ts, end_ts)
+        ).fetchone()
+        return row[0] or 0, row[1] or 0
+
+    def completion_duration_stats(self, start_date, end_date):
+        """统计 [start_date, end_date] 内创建并已完成任务的 (数量, 总耗时小时数)"""
+        row = self.conn.execute(
+            "SELECT COUNT(*), SUM(done_ts - create_ts) / 3600.0 FROM tasks "
+            "WHERE status = 'done' AND done_ts IS NOT NULL AND create_ts >= ? AND create_ts < ?",
+            (_date_timestamp(start_date), _date_timestamp(end_date + timedelta(days=1)))
+        ).fetchone()
+        return row[0] or 0, row[1] or 0
+
+
+def migrate_json_to_sqlite(json_path="tasks.json", db_path="tasks.db"):
+    """把已有的 tasks.json 一次性导入SQLite数据库，返回导入的任务数"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        tasks = json.load(f)
+    manager = SQLiteDataManager(db_path)
+    try:
+        manager.save_tasks(tasks)
+    finally:
+        manager.close()
+    return sum(len(task_list) for task_list in tasks.values())
+
+
+if __name__ == "__main__":
+    import sys
+    json_path = sys.argv[1] if len(sys.argv) > 1 else "tasks.json"
+    db_path = sys.argv[2] if len(sys.argv) > 2 else "tasks.db"
+    if os.path.exists(db_path):
+        print(f"数据库已存在，跳过迁移: {db_path}")
+    else:
+        count = migrate_json_to_sqlite(json_path, db_path)
+        print(f"已从 {json_path} 导入 {count} 个任务到 {db_path}")
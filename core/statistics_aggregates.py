@@ -0,0 +1,132 @@
+from collections import Counter, defaultdict
+from datetime import date
+
+from core.task_times import task_timestamp
+
+
+class StatisticsAggregates:
+    """统计聚合，由 TaskHandler 在任务新增、完成、删除和移入超时列表时增量维护
+
+    统计查询不再遍历任务，只需按天累加（与统计天数相关，见 StatisticsManager.query）或直接读取计数。
+    已完成任务包括已归档的任务：归档只是换了存放位置，不改变聚合。
+
+    按日期的聚合以本地日期为键：
+        completed_by_day  完成日期 -> 完成的任务数（完成趋势）
+        rate_total        创建日期 -> 计入按时完成率的任务数（有截止日期的已完成任务和超时任务）
+        rate_on_time      创建日期 -> 按时完成的任务数
+        duration_count    创建日期 -> 有完成时间的已完成任务数
+        duration_seconds  创建日期 -> 这些任务从创建到完成的总秒数
+    按列表类型的计数：categories、tags 为 列表类型 -> Counter(类别或标签 -> 任务数)
+
+    归档的每个月份在 archive/index.json 中保存一份该月任务的聚合（to_dict），
+    统计时与内存中任务的聚合合并（merge），不需要打开归档文件。
+    """
+    DAY_COUNTERS = ("completed_by_day", "rate_total", "rate_on_time", "duration_count", "duration_seconds")
+    TYPE_COUNTERS = ("categories", "tags")
+
+    def __init__(self):
+        self.completed_by_day = Counter()
+        self.rate_total = Counter()
+        self.rate_on_time = Counter()
+        self.duration_count = Counter()
+        self.duration_seconds = Counter()
+        self.categories = defaultdict(Counter)
+        self.tags = defaultdict(Counter)
+
+    @classmethod
+    def from_tasks(cls, task_type, tasks):
+        """逐个任务累加得到的聚合"""
+        aggregates = cls()
+        for task in tasks:
+            aggregates.add(task_type, task)
+        return aggregates
+
+    @classmethod
+    def from_dict(cls, data):
+        """从 to_dict 的结果恢复"""
+        aggregates = cls()
+        for name in cls.DAY_COUNTERS:
+            getattr(aggregates, name).update(
+                {date.fromisoformat(day): value for day, value in data.get(name, {}).items()}
+            )
+        for name in cls.TYPE_COUNTERS:
+            counters = getattr(aggregates, name)
+            for task_type, counts in data.get(name, {}).items():
+                counters[task_type].update(counts)
+        return aggregates
+
+    def to_dict(self):
+        """转换为可写入JSON的字典，日期转换为ISO格式字符串，计数为0的项和没有计数的列表省略"""
+        data = {}
+        for name in self.DAY_COUNTERS:
+            data[name] = {day.isoformat(): value for day, value in getattr(self, name).items() if value}
+        for name in self.TYPE_COUNTERS:
+            data[name] = {}
+            for task_type, counter in getattr(self, name).items():
+                counts = {key: count for key, count in counter.items() if count}
+                if counts:
+                    data[name][task_type] = counts
+        return data
+
+    def merge(self, other):
+        """累加另一份聚合（如归档月份的聚合）"""
+        for name in self.DAY_COUNTERS:
+            getattr(self, name).update(getattr(other, name))
+        for name in self.TYPE_COUNTERS:
+            counters = getattr(self, name)
+            for task_type, counter in getattr(other, name).items():
+                counters[task_type].update(counter)
+        return self
+
+    def add(self, task_type, task):
+        """任务加入 task_type 列表"""
+        self._apply(task_type, task, 1)
+
+    def remove(self, task_type, task):
+        """任务移出 task_type 列表（需在修改任务字段之前调用）"""
+        self._apply(task_type, task, -1)
+
+    def _apply(self, task_type, task, sign):
+        self.categories[task_type][task.get("category", "未分类")] += sign
+        tags = task.get("tags", [])
+        if isinstance(tags, list):
+            tag_counter = self.tags[task_type]
+            for tag in tags:
+                tag_counter[tag] += sign
+
+        if task_type not in ("done", "overdue"):
+            return
+        created_ts = task_timestamp(task, "create_time")
+        created_day = None if created_ts is None else date.fromtimestamp(created_ts)
+        if task_type == "overdue":
+            # 超时任务都有截止日期，计入总数但不计入按时完成数
+            if created_day is not None:
+                self.rate_total[created_day] += sign
+            return
+
+        done_ts = task_timestamp(task, "done_time")
+        if done_ts is not None:
+            self.completed_by_day[date.fromtimestamp(done_ts)] += sign
+        if created_day is None:
+            return
+        deadline_ts = task_timestamp(task, "deadline")
+        # 截止时间可解析时截止日期一定非空，只有解析不了时才需要读取（可能延迟解码的）字符串
+        if deadline_ts is not None or task.get("deadline"):
+            self.rate_total[created_day] += sign
+            if deadline_ts is not None and done_ts is not None and done_ts <= deadline_ts:
+                self.rate_on_time[created_day] += sign
+        if done_ts is not None:
+            self.duration_count[created_day] += sign
+            self.duration_seconds[created_day] += sign * (done_ts - created_ts)
+
+    def counts(self, counters, task_type=None):
+        """类别或标签计数，task_type 为 None 时合并所有列表；按数量降序返回 [(名称, 数量)]"""
+        if task_type is not None:
+            merged = counters.get(task_type, Counter())
+        else:
+            merged = Counter()
+            for counter in counters.values():
+                merged.update(counter)
+        items = [(name, count) for name, count in merged.items() if count > 0]
+        items.sort(key=lambda item: item[1], reverse=True)
+        return items
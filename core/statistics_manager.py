@@ -8,6 +8,9 @@
 from datetime import datetime, timedelta, date
 from collections import defaultdict
 
+from core.perf import timed
+from core.task_times import parse_timestamp
+
 
 class StatisticsManager:
     """
@@ -24,6 +27,27 @@ class StatisticsManager:
         """
         self.task_handler = task_handler
     
+    def get_query_backend(self):
+        """
+        获取支持SQL查询的存储后端
+        
+        Returns:
+            存储后端支持查询时返回数据管理器，否则返回None（使用内存中的统计聚合）
+        """
+        data_manager = getattr(self.task_handler, 'data_manager', None)
+        if getattr(data_manager, 'supports_queries', False):
+            return data_manager
+        return None
+    
+    def get_aggregates(self):
+        """
+        获取统计聚合
+        
+        Returns:
+            StatisticsAggregates: 由 TaskHandler 随任务变更增量维护，第一次获取时建立
+        """
+        return self.task_handler.get_statistics()
+    
     def get_all_tasks(self):
         """
         获取所有任务（待办、已完成、超时）
@@ -33,14 +57,45 @@ class StatisticsManager:
         """
         return self.task_handler.tasks
     
-    def get_completed_tasks(self):
+    def get_completed_tasks(self, since_ts=None):
+        """
+        获取已完成的任务，包括已归档的任务
+        
+        Args:
+            since_ts: 只需要完成时间不早于此时间戳的任务时传入，跳过更早月份的归档文件；
+                      None 表示全部（会打开所有归档月份）
+            
+        Returns:
+            list: 已完成任务列表（结果中可能包含 since_ts 之前的任务，调用方自行按时间过滤）
+        """
+        completed_tasks = self.task_handler.tasks.get('done', [])
+        archive = getattr(self.task_handler, 'archive', None)
+        if archive is None or not archive.months():
+            return completed_tasks
+        # 归档和已完成列表之间崩溃时可能有重复，以已完成列表为准
+        hot_ids = self.task_handler.task_index
+        archived = [task for task in archive.iter_tasks(since_ts) if task['id'] not in hot_ids]
+        return completed_tasks + archived
+    
+    def get_tasks_by_type(self, task_type=None):
         """
-        获取所有已完成的任务
+        获取指定类型的任务，已完成任务包括已归档的任务
         
+        Args:
+            task_type: 任务类型（'todo', 'done', 'overdue'或None表示全部）
+            
         Returns:
-            list: 已完成任务列表
+            list: 任务列表
         """
-        return self.task_handler.tasks.get('done', [])
+        if task_type == 'done':
+            return self.get_completed_tasks()
+        if task_type is not None:
+            return self.get_all_tasks().get(task_type, [])
+        all_tasks = []
+        for list_type, task_list in self.get_all_tasks().items():
+            if list_type != 'done':
+                all_tasks.extend(task_list)
+        return all_tasks + self.get_completed_tasks()
     
     def get_todo_tasks(self):
         """
@@ -70,6 +125,9 @@ class StatisticsManager:
         total_count = 0
         for task_list in self.get_all_tasks().values():
             total_count += len(task_list)
+        archive = getattr(self.task_handler, 'archive', None)
+        if archive is not None:
+            total_count += archive.count()
         return total_count
     
     def parse_datetime(self, date_str):
@@ -82,15 +140,19 @@ class StatisticsManager:
         Returns:
             datetime: 解析后的datetime对象，如果解析失败返回None
         """
-        formats = ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d']
-        
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str, fmt)
-            except (ValueError, TypeError):
-                continue
+        timestamp = parse_timestamp(date_str)
+        return None if timestamp is None else datetime.fromtimestamp(timestamp)
+    
+    def date_range_timestamps(self, start_date, end_date):
+        """
+        日期范围 [start_date, end_date] 对应的时间戳区间
         
-        return None
+        Returns:
+            tuple: (start_date零点的时间戳, end_date次日零点的时间戳)，左闭右开
+        """
+        start = datetime.combine(start_date, datetime.min.time()).timestamp()
+        end = datetime.combine(end_date + timedelta(days=1), datetime.min.time()).timestamp()
+        return start, end
     
     def format_date(self, dt, period='daily'):
         """
@@ -113,29 +175,107 @@ class StatisticsManager:
             return dt.strftime('%Y-%m')
         return dt.strftime('%Y-%m-%d')
     
-    def get_completion_trend(self, period='daily', days=30):
+    @timed("stats.query")
+    def query(self, metrics):
         """
-        获取任务完成趋势
+        一次计算多项统计，界面各组件和导出共用同一份结果
+        
+        指标用元组表示：
+            ('trend', period, days)  完成趋势，结果同 get_completion_trend
+            ('category', task_type)  类别分布，结果同 get_category_distribution
+            ('labels', task_type)    标签分布，结果同 get_label_distribution
+            ('rate', days)           按时完成率，结果同 get_completion_rate
+            ('avg_time', days)       平均完成时间，结果同 get_average_completion_time
+            ('total',)               总任务数，结果同 get_total_tasks_count
+        
+        带天数的指标共用一次遍历：从今天向前逐天读取每日聚合，直到最大的天数，
+        途经各指标的起点时记下累计结果。存储后端支持查询时，每日完成数只查询一次，
+        完成率和平均完成时间仍由数据库按各自的天数统计。
         
         Args:
-            period: 统计周期 ('daily', 'weekly', 'monthly')
-            days: 统计的天数范围
+            metrics: 指标列表
             
         Returns:
-            tuple: (labels, values)，其中labels是时间标签列表，values是对应完成的任务数量
+            dict: 指标 -> 结果
         """
-        completed_tasks = self.get_completed_tasks()
-        
-        # 创建时间标签和值的映射
-        trend_data = defaultdict(int)
-        
-        # 获取今天的日期
+        results = {}
+        backend = self.get_query_backend()
         today = date.today()
-        start_date = today - timedelta(days=days)
+        windowed = [metric for metric in metrics if metric[0] in ('trend', 'rate', 'avg_time')]
+        
+        if windowed:
+            max_days = max(metric[-1] for metric in windowed)
+            trends = {
+                metric: self._trend_buckets(metric[1], today - timedelta(days=metric[2]), today)
+                for metric in windowed if metric[0] == 'trend'
+            }
+            # 按起点距今天的天数登记需要在该处记录结果的指标
+            boundaries = defaultdict(list)
+            if backend is not None:
+                completed_by_day = backend.count_completed_by_day(today - timedelta(days=max_days), today)
+                for metric in windowed:
+                    start_date = today - timedelta(days=metric[-1])
+                    if metric[0] == 'rate':
+                        results[metric] = self._rate_result(*backend.completion_rate_counts(start_date, today))
+                    elif metric[0] == 'avg_time':
+                        results[metric] = self._average_result(
+                            *backend.completion_duration_stats(start_date, today))
+            else:
+                aggregates = self.get_aggregates()
+                completed_by_day = aggregates.completed_by_day
+                for metric in windowed:
+                    if metric[0] != 'trend':
+                        boundaries[metric[-1]].append(metric)
+            
+            rate_total = on_time = duration_count = duration_seconds = 0
+            for offset in range(max_days + 1):
+                day = today - timedelta(days=offset)
+                completed = completed_by_day.get(day, 0)
+                if completed:
+                    for metric, buckets in trends.items():
+                        label = self.format_date(day, metric[1])
+                        if offset <= metric[2] and label in buckets:
+                            buckets[label] += completed
+                if backend is not None:
+                    continue
+                rate_total += aggregates.rate_total.get(day, 0)
+                on_time += aggregates.rate_on_time.get(day, 0)
+                duration_count += aggregates.duration_count.get(day, 0)
+                duration_seconds += aggregates.duration_seconds.get(day, 0)
+                for metric in boundaries.get(offset, ()):
+                    if metric[0] == 'rate':
+                        results[metric] = self._rate_result(rate_total, on_time)
+                    else:
+                        results[metric] = self._average_result(duration_count, duration_seconds / 3600)
+            
+            for metric, buckets in trends.items():
+                # 排序并返回结果
+                sorted_items = sorted(buckets.items())
+                results[metric] = ([item[0] for item in sorted_items], [item[1] for item in sorted_items])
+        
+        for metric in metrics:
+            if metric[0] == 'category':
+                results[metric] = self._category_distribution(metric[1])
+            elif metric[0] == 'labels':
+                aggregates = self.get_aggregates()
+                items = aggregates.counts(aggregates.tags, metric[1])
+                results[metric] = ([item[0] for item in items], [item[1] for item in items])
+            elif metric[0] == 'total':
+                results[metric] = self.get_total_tasks_count()
+            elif metric not in results:
+                raise ValueError(f"未知的统计指标: {metric}")
+        return results
+    
+    def _trend_buckets(self, period, start_date, end_date):
+        """
+        初始化趋势统计的各个时间标签
         
-        # 初始化日期范围内的数据
+        Returns:
+            dict: 时间标签 -> 0
+        """
+        trend_data = {}
         current_date = start_date
-        while current_date <= today:
+        while current_date <= end_date:
             if period == 'daily':
                 label = current_date.strftime('%Y-%m-%d')
                 current_date += timedelta(days=1)
@@ -156,33 +296,52 @@ class StatisticsManager:
                 current_date += timedelta(days=1)
             
             trend_data[label] = 0
+        return trend_data
+    
+    def _category_distribution(self, task_type):
+        """类别分布，按数量降序返回 (categories, values)"""
+        backend = self.get_query_backend()
+        if backend is not None:
+            rows = backend.count_by_category(task_type)
+            return [row[0] for row in rows], [row[1] for row in rows]
+        aggregates = self.get_aggregates()
+        items = aggregates.counts(aggregates.categories, task_type)
+        return [item[0] for item in items], [item[1] for item in items]
+    
+    @staticmethod
+    def _rate_result(total_count, on_time_count):
+        """按时完成率的结果：(total_count, on_time_count, completion_rate)"""
+        completion_rate = (on_time_count / total_count * 100) if total_count > 0 else 0
+        return total_count, on_time_count, completion_rate
+    
+    @staticmethod
+    def _average_result(count, total_hours):
+        """平均完成时间的结果：(count, avg_hours, avg_minutes)"""
+        avg_hours = 0
+        avg_minutes = 0
         
-        # 统计已完成任务
-        for task in completed_tasks:
-            completed_time_str = task.get('done_time')  # 修改为正确的字段名
-            if completed_time_str:
-                completed_dt = self.parse_datetime(completed_time_str)
-                if completed_dt:
-                    completed_date = completed_dt.date()
-                    # 只统计指定日期范围内的任务
-                    if start_date <= completed_date <= today:
-                        # 根据统计周期格式化完成日期
-                        if period == 'daily':
-                            label = self.format_date(completed_dt, 'daily')
-                        elif period == 'weekly':
-                            label = self.format_date(completed_dt, 'weekly')
-                        elif period == 'monthly':
-                            label = self.format_date(completed_dt, 'monthly')
-                        
-                        if label in trend_data:
-                            trend_data[label] += 1
+        if count > 0:
+            avg_hours = total_hours / count
+            # 将小时转换为小时和分钟
+            hours = int(avg_hours)
+            minutes = int((avg_hours - hours) * 60)
+            avg_hours, avg_minutes = hours, minutes
         
-        # 排序并返回结果
-        sorted_items = sorted(trend_data.items())
-        labels = [item[0] for item in sorted_items]
-        values = [item[1] for item in sorted_items]
+        return count, avg_hours, avg_minutes
+    
+    def get_completion_trend(self, period='daily', days=30):
+        """
+        获取任务完成趋势
         
-        return labels, values
+        Args:
+            period: 统计周期 ('daily', 'weekly', 'monthly')
+            days: 统计的天数范围
+            
+        Returns:
+            tuple: (labels, values)，其中labels是时间标签列表，values是对应完成的任务数量
+        """
+        metric = ('trend', period, days)
+        return self.query([metric])[metric]
     
     def get_category_distribution(self, task_type=None):
         """
@@ -194,27 +353,7 @@ class StatisticsManager:
         Returns:
             tuple: (categories, values)，其中categories是类别列表，values是对应类别的任务数量
         """
-        # 获取对应类型的任务
-        if task_type is None:
-            # 获取所有任务
-            all_tasks = []
-            for task_list in self.get_all_tasks().values():
-                all_tasks.extend(task_list)
-        else:
-            all_tasks = self.get_all_tasks().get(task_type, [])
-        
-        # 统计类别分布
-        category_data = defaultdict(int)
-        for task in all_tasks:
-            category = task.get('category', '未分类')
-            category_data[category] += 1
-        
-        # 排序并返回结果（按任务数量降序排列）
-        sorted_items = sorted(category_data.items(), key=lambda x: x[1], reverse=True)
-        categories = [item[0] for item in sorted_items]
-        values = [item[1] for item in sorted_items]
-        
-        return categories, values
+        return self._category_distribution(task_type)
     
     def get_label_distribution(self, task_type=None):
         """
@@ -226,29 +365,8 @@ class StatisticsManager:
         Returns:
             tuple: (labels, values)，其中labels是标签列表，values是对应标签的任务数量
         """
-        # 获取对应类型的任务
-        if task_type is None:
-            # 获取所有任务
-            all_tasks = []
-            for task_list in self.get_all_tasks().values():
-                all_tasks.extend(task_list)
-        else:
-            all_tasks = self.get_all_tasks().get(task_type, [])
-        
-        # 统计标签分布
-        label_data = defaultdict(int)
-        for task in all_tasks:
-            labels = task.get('labels', [])
-            if isinstance(labels, list):
-                for label in labels:
-                    label_data[label] += 1
-        
-        # 排序并返回结果（按任务数量降序排列）
-        sorted_items = sorted(label_data.items(), key=lambda x: x[1], reverse=True)
-        labels = [item[0] for item in sorted_items]
-        values = [item[1] for item in sorted_items]
-        
-        return labels, values
+        metric = ('labels', task_type)
+        return self.query([metric])[metric]
     
     def get_completion_rate(self, days=30):
         """
@@ -260,54 +378,8 @@ class StatisticsManager:
         Returns:
             tuple: (total_count, on_time_count, completion_rate)，分别是总任务数、按时完成任务数和完成率
         """
-        completed_tasks = self.get_completed_tasks()
-        overdue_tasks = self.get_overdue_tasks()
-        
-        today = date.today()
-        start_date = today - timedelta(days=days)
-        
-        # 统计有截止日期的任务总数和按时完成的任务数
-        total_count = 0  # 有截止日期的任务总数
-        on_time_count = 0  # 按时完成的任务数
-        
-        # 统计已完成任务
-        for task in completed_tasks:
-            created_time_str = task.get('create_time')
-            if created_time_str:
-                created_dt = self.parse_datetime(created_time_str)
-                if created_dt:
-                    created_date = created_dt.date()
-                    # 只统计指定日期范围内创建的任务
-                    if start_date <= created_date <= today:
-                        deadline_str = task.get('deadline')
-                        if deadline_str:  # 只考虑有截止日期的任务
-                            total_count += 1
-                            
-                            # 检查是否按时完成
-                            completed_time_str = task.get('done_time')
-                            if completed_time_str:
-                                deadline_dt = self.parse_datetime(deadline_str)
-                                completed_dt = self.parse_datetime(completed_time_str)
-                                if deadline_dt and completed_dt:
-                                    # 如果完成时间早于或等于截止时间，则视为按时完成
-                                    if completed_dt <= deadline_dt:
-                                        on_time_count += 1
-        
-        # 统计超时任务（这些任务都是有截止日期的）
-        for task in overdue_tasks:
-            created_time_str = task.get('create_time')
-            if created_time_str:
-                created_dt = self.parse_datetime(created_time_str)
-                if created_dt:
-                    created_date = created_dt.date()
-                    # 只统计指定日期范围内创建的任务
-                    if start_date <= created_date <= today:
-                        total_count += 1  # 超时任务计入总数，但不计入按时完成数
-        
-        # 计算完成率
-        completion_rate = (on_time_count / total_count * 100) if total_count > 0 else 0
-        
-        return total_count, on_time_count, completion_rate
+        metric = ('rate', days)
+        return self.query([metric])[metric]
     
     def get_average_completion_time(self, days=30):
         """
@@ -319,42 +391,5 @@ class StatisticsManager:
         Returns:
             tuple: (total_count, avg_hours, avg_minutes)，分别是统计任务数、平均小时数和分钟数
         """
-        completed_tasks = self.get_completed_tasks()
-        
-        today = date.today()
-        start_date = today - timedelta(days=days)
-        
-        total_hours = 0
-        count = 0
-        
-        for task in completed_tasks:
-            created_time_str = task.get('create_time')  # 修改为正确的字段名
-            completed_time_str = task.get('done_time')  # 修改为正确的字段名
-            
-            if created_time_str and completed_time_str:
-                created_dt = self.parse_datetime(created_time_str)
-                completed_dt = self.parse_datetime(completed_time_str)
-                
-                if created_dt and completed_dt:
-                    created_date = created_dt.date()
-                    # 只统计指定日期范围内创建的任务
-                    if start_date <= created_date <= today:
-                        # 计算完成时间差
-                        time_diff = completed_dt - created_dt
-                        time_diff_hours = time_diff.total_seconds() / 3600
-                        
-                        total_hours += time_diff_hours
-                        count += 1
-        
-        # 计算平均完成时间
-        avg_hours = 0
-        avg_minutes = 0
-        
-        if count > 0:
-            avg_hours = total_hours / count
-            # 将小时转换为小时和分钟
-            hours = int(avg_hours)
-            minutes = int((avg_hours - hours) * 60)
-            avg_hours, avg_minutes = hours, minutes
-        
-        return count, avg_hours, avg_minutes
+        metric = ('avg_time', days)
+        return self.query([metric])[metric]
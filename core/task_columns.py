@@ -0,0 +1,143 @@
+import time
+from collections import Counter
+
+import numpy as np
+
+from core.statistics_aggregates import StatisticsAggregates
+from core.task_times import cache_key, task_timestamp
+
+
+def local_datetime64(timestamps):
+    """时间戳数组（秒，NaN 表示缺失）转换为本地时间的 datetime64[s]，缺失为 NaT
+
+    本地时间与UTC的偏移只在夏令时切换时变化（切换发生在整点），
+    按整点小时去重后逐个查询偏移，再向量化相加。
+    """
+    result = np.full(len(timestamps), np.datetime64("NaT"), dtype="datetime64[s]")
+    valid = ~np.isnan(timestamps)
+    seconds = np.floor(timestamps[valid]).astype(np.int64)
+    hours, inverse = np.unique(seconds // 3600, return_inverse=True)
+    offsets = np.array([time.localtime(hour * 3600).tm_gmtoff for hour in hours.tolist()], dtype=np.int64)
+    result[valid] = (seconds + offsets[inverse]).astype("datetime64[s]")
+    return result
+
+
+def count_by_day(datetimes, weights=None):
+    """按本地日期计数（或对 weights 求和），返回 Counter(日期 -> 合计)"""
+    days, inverse = np.unique(datetimes.astype("datetime64[D]"), return_inverse=True)
+    totals = np.bincount(inverse, weights=weights, minlength=len(days))
+    return Counter(dict(zip(days.astype(object).tolist(), totals.tolist())))
+
+
+class TaskColumns:
+    """任务的列式视图：每个字段一列 numpy 数组，统计在整列上向量化计算
+
+    status                    列表类型代码（下标对应 list_types）
+    create_ts/done_ts/deadline_ts  时间戳（秒，float64），缺失为 NaN
+    create/done               本地时间 datetime64[s]，缺失为 NaT，用于按天分组
+    has_deadline              截止日期非空（“无截止日期”也算非空，与统计口径一致）
+    category                  类别代码（下标对应 categories）
+    tag_codes/tag_rows        所有任务的标签展开后的标签代码（下标对应 tags）及所属任务的行号
+
+    只有取字段时逐个任务访问一次，之后的分组计数都由 np.unique/np.bincount 完成。
+    """
+    def __init__(self, task_lists):
+        """task_lists 为 (列表类型, 任务列表) 的序列"""
+        self.list_types = []
+        category_codes = {}
+        tag_codes = {}
+        status, create_ts, done_ts, deadline_ts, has_deadline, category = [], [], [], [], [], []
+        tag_counts, row_tags = [], []
+
+        # 每个字段用一次列表推导取出，比逐个任务依次取所有字段快
+        for task_type, tasks in task_lists:
+            if task_type not in self.list_types:
+                self.list_types.append(task_type)
+            status.extend([self.list_types.index(task_type)] * len(tasks))
+            create_ts.extend(self._timestamps(tasks, "create_time"))
+            done_ts.extend(self._timestamps(tasks, "done_time"))
+            deadlines = self._timestamps(tasks, "deadline")
+            deadline_ts.extend(deadlines)
+            # 截止时间可解析时截止日期一定非空，只有解析不了时才需要读取（可能延迟解码的）字符串
+            has_deadline.extend([
+                deadline is not None or bool(task.get("deadline")) for deadline, task in zip(deadlines, tasks)
+            ])
+            category.extend([
+                category_codes.setdefault(name, len(category_codes))
+                for name in [task.get("category", "未分类") for task in tasks]
+            ])
+            for tags in [task.get("tags", []) for task in tasks]:
+                if isinstance(tags, list):
+                    tag_counts.append(len(tags))
+                    row_tags.extend(tags)
+                else:
+                    tag_counts.append(0)
+
+        self.categories = list(category_codes)
+        self.status = np.array(status, dtype=np.int8)
+        # None 转换为 NaN
+        self.create_ts = np.array(create_ts, dtype=np.float64)
+        self.done_ts = np.array(done_ts, dtype=np.float64)
+        self.deadline_ts = np.array(deadline_ts, dtype=np.float64)
+        self.has_deadline = np.array(has_deadline, dtype=bool)
+        self.category = np.array(category, dtype=np.int32)
+        self.tag_codes = np.array([tag_codes.setdefault(tag, len(tag_codes)) for tag in row_tags], dtype=np.int32)
+        self.tags = list(tag_codes)
+        self.tag_rows = np.repeat(np.arange(len(status)), tag_counts)
+        self.create = local_datetime64(self.create_ts)
+        self.done = local_datetime64(self.done_ts)
+
+    @staticmethod
+    def _timestamps(tasks, field):
+        """取出一列时间戳，优先读取任务上缓存的解析结果"""
+        key = cache_key(field)
+        return [task[key] if key in task else task_timestamp(task, field) for task in tasks]
+
+    def __len__(self):
+        return len(self.status)
+
+    def status_mask(self, task_type):
+        """属于 task_type 列表的行"""
+        if task_type not in self.list_types:
+            return np.zeros(len(self), dtype=bool)
+        return self.status == self.list_types.index(task_type)
+
+    def _counts_by_status(self, codes, rows, names):
+        """按列表类型统计各代码出现次数，返回 {列表类型: Counter(名称 -> 数量)}"""
+        width = len(names)
+        totals = np.bincount(self.status[rows].astype(np.int64) * width + codes,
+                             minlength=len(self.list_types) * width)
+        result = {}
+        for code, task_type in enumerate(self.list_types):
+            row = totals[code * width:(code + 1) * width].tolist()
+            result[task_type] = Counter({name: count for name, count in zip(names, row) if count})
+        return result
+
+    def to_aggregates(self):
+        """一次性计算全部统计聚合，结果与逐个任务调用 StatisticsAggregates.add 相同"""
+        aggregates = StatisticsAggregates()
+        done = self.status_mask("done")
+        overdue = self.status_mask("overdue")
+        has_done = ~np.isnan(self.done_ts)
+        has_create = ~np.isnan(self.create_ts)
+
+        aggregates.completed_by_day = count_by_day(self.done[done & has_done])
+
+        rate_rows = has_create & ((done & self.has_deadline) | overdue)
+        aggregates.rate_total = count_by_day(self.create[rate_rows])
+        # NaN 参与比较的结果为 False，缺少完成时间或截止时间的任务不计入按时完成
+        on_time = has_create & done & self.has_deadline & (self.done_ts <= self.deadline_ts)
+        aggregates.rate_on_time = count_by_day(self.create[on_time])
+
+        duration_rows = has_create & done & has_done
+        aggregates.duration_count = count_by_day(self.create[duration_rows])
+        aggregates.duration_seconds = count_by_day(
+            self.create[duration_rows], weights=(self.done_ts - self.create_ts)[duration_rows]
+        )
+
+        rows = np.arange(len(self))
+        for task_type, counter in self._counts_by_status(self.category, rows, self.categories).items():
+            aggregates.categories[task_type] = counter
+        for task_type, counter in self._counts_by_status(self.tag_codes, self.tag_rows, self.tags).items():
+            aggregates.tags[task_type] = counter
+        return aggregates
@@ -1,16 +1,216 @@
 from datetime import datetime, date, timedelta
+import heapq
+import logging
 import time
+import uuid
+
+from core.errors import ArchiveError
+from core.filter_index import FilterIndex
+from core.perf import timed
+from core.sorted_tasks import SORT_KEYS, SortedTaskList
+from core.statistics_aggregates import StatisticsAggregates
+from core.task_times import cache_key, cache_task_times, task_timestamp
+from core.urgency_scheduler import UrgencyScheduler
+
+logger = logging.getLogger(__name__)
 
 
 class TaskHandler:
     """负责任务的逻辑处理（添加、标记完成、删除、检查超时等）"""
 
-    def __init__(self, data_manager):
+    def __init__(self, data_manager, archive=None):
         self.data_manager = data_manager
+        self.archive = archive  # 已完成任务的按月冷归档（DoneArchive），None 表示不归档
+        self.archived_on = None  # 上次归档的日期，每天最多归档一次
         self.tasks = self.data_manager.load_tasks()
+        self.task_index = {}  # 任务ID -> (列表类型, 列表下标)
+        self.deadline_heap = []  # 待办任务截止时间最小堆：(截止时间戳, 任务ID)
+        self.urgency_scheduler = UrgencyScheduler()  # 待办任务紧急度转换调度
+        self.filter_indexes = {}  # 列表类型 -> 筛选倒排索引
+        self.sorted_lists = {}  # 列表类型 -> 按显示顺序排列的有序视图（SortedTaskList）
+        self.statistics = None  # 统计聚合（StatisticsAggregates），第一次统计时建立
+        self.ensure_task_ids()  # 为旧数据中没有ID的任务补充ID
+        self.rebuild_index()
+        self.cache_all_task_times()
+        self.rebuild_filter_indexes()
+        self.rebuild_sorted_lists()
+        self.rebuild_deadline_heap()
+        self.rebuild_urgency_schedule()
         self.check_overdue_tasks()  # 初始化时检查超时任务
         self.auto_promote_urgency()  # 初始化时自动提升紧急度
+        self.archive_done_tasks()  # 初始化时归档较早的已完成任务
     
+    @staticmethod
+    def generate_task_id():
+        """生成任务唯一ID"""
+        return uuid.uuid4().hex
+
+    def ensure_task_ids(self):
+        """为没有ID的任务（旧版本数据）补充ID，有补充时整体保存一次"""
+        migrated = False
+        for task_list in self.tasks.values():
+            for task in task_list:
+                if not task.get("id"):
+                    task["id"] = self.generate_task_id()
+                    migrated = True
+        if migrated:
+            self.data_manager.save_tasks(self.tasks)
+        return migrated
+
+    def rebuild_index(self):
+        """重建任务ID索引"""
+        self.task_index = {}
+        for task_type, task_list in self.tasks.items():
+            for position, task in enumerate(task_list):
+                self.task_index[task["id"]] = (task_type, position)
+
+    def cache_all_task_times(self):
+        """加载后一次性解析所有任务的时间字段，之后各处直接读取缓存的时间戳
+
+        二进制快照加载的任务已带有时间戳（延迟解码），不需要再解析。
+        """
+        deadline_key = cache_key("deadline")
+        for task_list in self.tasks.values():
+            for task in task_list:
+                if deadline_key not in task:
+                    cache_task_times(task)
+
+    def rebuild_filter_indexes(self):
+        """为每个列表重建筛选倒排索引"""
+        self.filter_indexes = {}
+        for task_type, task_list in self.tasks.items():
+            filter_index = FilterIndex()
+            for task in task_list:
+                filter_index.add(task)
+            self.filter_indexes[task_type] = filter_index
+
+    def rebuild_sorted_lists(self):
+        """为有排序规则的列表重建有序视图，之后随任务变更用二分查找增量维护"""
+        self.sorted_lists = {
+            task_type: SortedTaskList(SORT_KEYS[task_type], task_list)
+            for task_type, task_list in self.tasks.items() if task_type in SORT_KEYS
+        }
+
+    @timed("stats.aggregate")
+    def get_statistics(self):
+        """统计聚合，第一次调用时建立，之后随任务变更增量维护
+
+        内存中的任务：有 numpy 时先取出列式视图再向量化分组计数（见 core/task_columns.py），
+        否则逐个任务累加。归档任务直接合并 archive/index.json 中各月份的聚合，不打开归档文件。
+        """
+        if self.statistics is None:
+            task_lists = list(self.tasks.items())
+            try:
+                from core.task_columns import TaskColumns
+            except ImportError:
+                statistics = StatisticsAggregates()
+                for task_type, task_list in task_lists:
+                    for task in task_list:
+                        statistics.add(task_type, task)
+            else:
+                statistics = TaskColumns(task_lists).to_aggregates()
+            if self.archive is not None:
+                statistics.merge(self.archive.statistics())
+                # 归档和已完成列表之间崩溃时可能有重复（启动时的归档通常已经合并），以已完成列表为准。
+                # 只有完成时间早于归档时间的任务可能已归档，检查时才打开对应的月份
+                cutoff_ts = self.archive.cutoff_timestamp()
+                for task in self.tasks["done"]:
+                    done_ts = task_timestamp(task, "done_time")
+                    if done_ts is not None and done_ts < cutoff_ts and self.archive.contains(task):
+                        statistics.remove("done", task)
+            self.statistics = statistics
+        return self.statistics
+
+    def build_search_index(self, limit=None):
+        """分批建立关键词搜索索引，每个列表每次最多处理 limit 个任务，返回是否已全部完成
+
+        不调用时搜索前也会自动补全索引，界面在空闲时提前调用可避免第一次搜索卡顿。
+        """
+        for filter_index in self.filter_indexes.values():
+            done = filter_index.build_search_index(limit)
+            if not done:
+                return False
+        return True
+
+    def _schedule_deadline(self, task):
+        """新待办任务：截止时间加入最小堆，并安排立即计算一次紧急度"""
+        deadline_ts = task_timestamp(task, "deadline")
+        if deadline_ts is None:
+            if task["deadline"] != "无截止日期":
+                logger.warning("解析任务日期出错: %s, 截止日期: %s", task["name"], task["deadline"])
+            return
+        heapq.heappush(self.deadline_heap, (deadline_ts, task["id"]))
+        self.urgency_scheduler.schedule(task["id"], time.time())
+
+    def rebuild_deadline_heap(self):
+        """根据当前待办列表重建截止时间堆
+
+        任务完成或删除时不从堆中移除（惰性删除），弹出时再校验；
+        过期条目过多时重建一次，保证堆的大小与待办任务数同量级。
+        """
+        entries = []
+        for task in self.tasks["todo"]:
+            deadline_ts = task_timestamp(task, "deadline")
+            if deadline_ts is not None:
+                entries.append((deadline_ts, task["id"]))
+        heapq.heapify(entries)
+        self.deadline_heap = entries
+
+    def rebuild_urgency_schedule(self):
+        """为所有有截止日期的待办任务安排一次立即的紧急度计算，之后按档位切换时刻调度"""
+        now_ts = time.time()
+        self.urgency_scheduler.reset([(now_ts, task_id) for _, task_id in self.deadline_heap])
+
+    def next_transition_time(self):
+        """返回最近一次紧急度变化或任务超时的时间戳，没有时返回None
+
+        界面据此只设置一个单次定时器，到时再调用 check_overdue_tasks 和 auto_promote_urgency。
+        """
+        candidates = [self.urgency_scheduler.next_due()]
+        if self.deadline_heap:
+            candidates.append(self.deadline_heap[0][0])
+        candidates = [ts for ts in candidates if ts is not None]
+        return min(candidates) if candidates else None
+
+    def get_task_by_id(self, task_id):
+        """通过ID获取任务，不存在时返回None"""
+        location = self.task_index.get(task_id)
+        if location is None:
+            return None
+        task_type, position = location
+        return self.tasks[task_type][position]
+
+    def _append_task(self, task_type, task):
+        """把任务追加到列表末尾并登记索引"""
+        self.tasks[task_type].append(task)
+        self.task_index[task["id"]] = (task_type, len(self.tasks[task_type]) - 1)
+        self.filter_indexes[task_type].add(task)
+        if task_type in self.sorted_lists:
+            self.sorted_lists[task_type].add(task)
+        if self.statistics is not None:
+            self.statistics.add(task_type, task)
+
+    def _remove_task_at(self, task_type, index):
+        """O(1)移除任务：用列表末尾的任务填补空位，只需更新被移动任务的索引
+
+        列表按有序视图显示，列表内的存放顺序不影响显示结果。
+        """
+        task_list = self.tasks[task_type]
+        task = task_list[index]
+        last = task_list.pop()
+        if index < len(task_list):
+            task_list[index] = last
+            self.task_index[last["id"]] = (task_type, index)
+        self.task_index.pop(task["id"], None)
+        self.filter_indexes[task_type].remove(task)
+        if task_type in self.sorted_lists:
+            self.sorted_lists[task_type].remove(task)
+        if self.statistics is not None:
+            self.statistics.remove(task_type, task)
+        if task_type == "todo":
+            self.urgency_scheduler.discard(task["id"])
+        return task
+
     def calculate_time_remaining(self, task):
         """
         计算任务剩余时间
@@ -21,16 +221,10 @@ class TaskHandler:
             return "无截止日期"
         
         try:
-            # 尝试解析包含时间的格式
-            try:
-                deadline_datetime = datetime.strptime(task["deadline"], "%Y-%m-%d %H:%M")
-            except ValueError:
-                # 回退到旧格式（仅日期）
-                deadline_datetime = datetime.strptime(task["deadline"], "%Y-%m-%d")
-            
-            now = datetime.now()
-            time_diff = deadline_datetime - now
-            total_seconds = time_diff.total_seconds()
+            deadline_ts = task_timestamp(task, "deadline")
+            if deadline_ts is None:
+                return "时间格式错误"
+            total_seconds = deadline_ts - time.time()
             
             if total_seconds <= 0:
                 # 已超时
@@ -78,30 +272,52 @@ class TaskHandler:
         """添加新任务到待办列表"""
         # 补充创建时间（精确到秒）
         task = {
+            "id": self.generate_task_id(),
             **task_info,
             "create_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
-        self.tasks["todo"].append(task)
-        self.data_manager.save_tasks(self.tasks)
+        cache_task_times(task)
+        self._append_task("todo", task)
+        self._schedule_deadline(task)
+        self.data_manager.record_changes(self.tasks, [{"op": "add", "list": "todo", "task": task}])
         return task
 
     def mark_as_done(self, task_type, index):
         """将指定任务标记为完成"""
         if 0 <= index < len(self.tasks[task_type]):
-            task = self.tasks[task_type].pop(index)
-            task["done_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.tasks["done"].append(task)
-            self.data_manager.save_tasks(self.tasks)
+            task = self._remove_task_at(task_type, index)
+            done_time = datetime.now().replace(microsecond=0)
+            task["done_time"] = done_time.strftime("%Y-%m-%d %H:%M:%S")
+            task[cache_key("done_time")] = done_time.timestamp()
+            self._append_task("done", task)
+            self.data_manager.record_changes(self.tasks, [{
+                "op": "move", "id": task["id"], "to": "done",
+                "set": {"done_time": task["done_time"]}
+            }])
             return True
         return False
+
+    def mark_task_done_by_id(self, task_id):
+        """通过任务ID标记任务为完成（O(1)查找）"""
+        location = self.task_index.get(task_id)
+        if location is None or location[0] == "done":
+            return False
+        return self.mark_as_done(*location)
         
-    def mark_task_done_by_identifier(self, task_type, create_time, task_name):
-        """通过任务标识（创建时间和名称）标记任务为完成
+    def mark_task_done_by_identifier(self, task_type, create_time, task_name, task_id=None):
+        """通过任务标识标记任务为完成
         
+        优先使用任务ID；没有ID时按创建时间和名称匹配（兼容旧调用方式）。
         这个方法解决了定时器刷新导致索引变化的问题，通过唯一标识找到正确的任务
         """
         if task_type not in self.tasks:
             return False
+
+        if task_id:
+            location = self.task_index.get(task_id)
+            if location is None or location[0] != task_type:
+                return False
+            return self.mark_as_done(*location)
             
         # 遍历任务列表，查找匹配的任务
         task_index = -1
@@ -126,18 +342,49 @@ class TaskHandler:
     def delete_task(self, task_type, index):
         """删除指定任务"""
         if 0 <= index < len(self.tasks[task_type]):
-            self.tasks[task_type].pop(index)
-            self.data_manager.save_tasks(self.tasks)
+            task = self._remove_task_at(task_type, index)
+            self.data_manager.record_changes(self.tasks, [{"op": "delete", "id": task["id"]}])
             return True
         return False
+
+    def delete_task_by_id(self, task_id):
+        """通过任务ID删除任务（O(1)查找），不在内存中的已完成任务从归档中删除"""
+        location = self.task_index.get(task_id)
+        if location is None:
+            return self.delete_archived_task(task_id)
+        return self.delete_task(*location)
+
+    def delete_archived_task(self, task_id):
+        """从已完成任务归档中删除任务"""
+        if self.archive is None:
+            return False
+        try:
+            task = self.archive.delete_task(task_id)
+        except Exception as e:
+            self.data_manager.report_error(ArchiveError(f"删除归档任务失败: {str(e)}"))
+            return False
+        if task is None:
+            return False
+        if self.statistics is not None:
+            self.statistics.remove("done", task)
+        return True
         
-    def delete_task_by_identifier(self, task_type, create_time, task_name):
-        """通过任务标识（创建时间和名称）删除任务
+    def delete_task_by_identifier(self, task_type, create_time, task_name, task_id=None):
+        """通过任务标识删除任务
         
+        优先使用任务ID；没有ID时按创建时间和名称匹配（兼容旧调用方式）。
         这个方法解决了定时器刷新导致索引变化的问题，通过唯一标识找到正确的任务
         """
         if task_type not in self.tasks:
             return False
+
+        if task_id:
+            location = self.task_index.get(task_id)
+            if location is None and task_type == "done":
+                return self.delete_archived_task(task_id)
+            if location is None or location[0] != task_type:
+                return False
+            return self.delete_task(*location)
             
         # 遍历任务列表，查找匹配的任务
         task_index = -1
@@ -159,156 +406,175 @@ class TaskHandler:
         
         return False
 
-    def check_overdue_tasks(self):
-        """检查并移动超时任务，返回新超时的任务列表"""
-        print(f"[{time.strftime('%H:%M:%S')}] 正在检查超时任务...")
+    def archive_done_tasks(self):
+        """把完成时间早于归档天数的已完成任务移入按月归档，每天最多执行一次
+
+        先写归档文件再从已完成列表移除。两步之间崩溃时任务同时出现在两处，
+        下次归档时按ID合并，界面和统计读取归档时跳过仍在已完成列表中的任务。
+
+        Returns:
+            int: 归档的任务数
+        """
         today = date.today()
-        overdue_indices = []
+        if self.archive is None or self.archived_on == today:
+            return 0
+        self.archived_on = today
+
+        cutoff_ts = self.archive.cutoff_timestamp()
+        old_tasks = []
+        for task in self.tasks["done"]:
+            done_ts = task_timestamp(task, "done_time")
+            if done_ts is not None and done_ts < cutoff_ts:
+                old_tasks.append(task)
+        if not old_tasks:
+            return 0
+
+        try:
+            months = self.archive.add_tasks(old_tasks)
+        except Exception as e:
+            self.data_manager.report_error(ArchiveError(f"归档已完成任务失败: {str(e)}"))
+            return 0
+
+        changes = []
+        for task in old_tasks:
+            self._remove_task_at(*self.task_index[task["id"]])
+            if self.statistics is not None:
+                self.statistics.add("done", task)  # 归档的任务仍计入统计
+            changes.append({"op": "delete", "id": task["id"]})
+        self.data_manager.record_changes(self.tasks, changes)
+        logger.info("已归档 %d 个已完成任务，月份: %s", len(old_tasks), ", ".join(months))
+        return len(old_tasks)
+
+    @timed("task.check_overdue")
+    def check_overdue_tasks(self):
+        """检查并移动超时任务，返回新超时的任务列表
+
+        只从截止时间最小堆中弹出已到期的任务，耗时与本次超时的任务数相关，而不是待办任务总数。
+        """
+        logger.debug("正在检查超时任务...")
+        debug = logger.isEnabledFor(logging.DEBUG)  # 逐个任务的日志在循环外判断一次
+        now_ts = time.time()
         newly_overdue_tasks = []  # 存储新超时的任务
+        changes = []
 
-        # 检查待办任务中的超时任务
-        for i, task in enumerate(self.tasks["todo"]):
-            if task["deadline"] != "无截止日期":
-                try:
-                    # 尝试解析包含时间的格式
-                    try:
-                        deadline_datetime = datetime.strptime(task["deadline"], "%Y-%m-%d %H:%M")
-                    except ValueError:
-                        # 回退到旧格式（仅日期）
-                        deadline_datetime = datetime.strptime(task["deadline"], "%Y-%m-%d")
-                    
-                    if deadline_datetime < datetime.now():
-                        print(f"[{time.strftime('%H:%M:%S')}] 发现超时任务: {task['name']}, 截止时间: {task['deadline']}")
-                        overdue_indices.append(i)
-                        newly_overdue_tasks.append(task)
-                except Exception as e:
-                    print(f"[{time.strftime('%H:%M:%S')}] 解析任务日期出错: {task['name']}, 错误: {e}")
-                    continue
-
-        # 逆序移除避免索引问题
-        for i in sorted(overdue_indices, reverse=True):
-            task = self.tasks["todo"].pop(i)
-            self.tasks["overdue"].append(task)
-            print(f"[{time.strftime('%H:%M:%S')}] 已将任务 '{task['name']}' 从待办移至超时列表")
-
-        if overdue_indices:
-            print(f"[{time.strftime('%H:%M:%S')}] 共移动 {len(overdue_indices)} 个超时任务")
-            self.data_manager.save_tasks(self.tasks)
-            print(f"[{time.strftime('%H:%M:%S')}] 已保存更新后的任务数据")
+        while self.deadline_heap and self.deadline_heap[0][0] < now_ts:
+            _, task_id = heapq.heappop(self.deadline_heap)
+            location = self.task_index.get(task_id)
+            # 已完成、已删除或已移出待办列表的任务是过期条目，直接丢弃
+            if location is None or location[0] != "todo":
+                continue
+            task = self._remove_task_at(*location)
+            self._append_task("overdue", task)
+            newly_overdue_tasks.append(task)
+            changes.append({"op": "move", "id": task["id"], "to": "overdue"})
+            if debug:
+                logger.debug("已将超时任务 '%s' 从待办移至超时列表, 截止时间: %s", task["name"], task["deadline"])
+
+        # 过期条目超过待办任务数时重建堆，避免堆无限增长
+        if len(self.deadline_heap) > 2 * len(self.tasks["todo"]) + 64:
+            self.rebuild_deadline_heap()
+
+        if changes:
+            logger.info("共移动 %d 个超时任务", len(changes))
+            self.data_manager.record_changes(self.tasks, changes)
         else:
-            print(f"[{time.strftime('%H:%M:%S')}] 未发现需要移动的超时任务")
+            logger.debug("未发现需要移动的超时任务")
             
         return newly_overdue_tasks  # 返回新超时的任务列表
 
+    @timed("task.auto_promote")
     def auto_promote_urgency(self):
-        """根据截止日期自动提升任务紧急度"""
-        today = date.today()
-        updated = False
+        """根据截止日期自动调整任务紧急度
+
+        只处理紧急度调度器中已到期的任务，处理后安排该任务的下一次档位切换。
+        """
+        now_ts = time.time()
+        changes = []  # 紧急度变更记录
         promoted_tasks = []  # 记录被提升紧急度的任务
 
-        for task in self.tasks["todo"]:
-            if task["deadline"] == "无截止日期":
-                continue  # 无截止日期的任务不自动提升
+        for task_id in self.urgency_scheduler.pop_due(now_ts):
+            location = self.task_index.get(task_id)
+            if location is None or location[0] != "todo":
+                continue
+            task = self.tasks["todo"][location[1]]
+            deadline_ts = task_timestamp(task, "deadline")
+            if deadline_ts is None:
+                continue  # 无截止日期或日期格式错误的任务不处理
 
-            try:
-                # 尝试解析包含时间的格式
-                try:
-                    deadline_datetime = datetime.strptime(task["deadline"], "%Y-%m-%d %H:%M")
-                except ValueError:
-                    # 回退到旧格式（仅日期）
-                    deadline_datetime = datetime.strptime(task["deadline"], "%Y-%m-%d")
-                
-                # 计算剩余天数（包含小时和分钟）
-                now = datetime.now()
-                time_remaining = deadline_datetime - now
-                days_remaining = time_remaining.total_seconds() / (24 * 3600)  # 转换为天
-
-                # 根据剩余天数自动调整紧急度（1最紧急）
-                if days_remaining > 7:
-                    target_urgency = 5  # 7天以上：最不紧急
-                elif days_remaining > 3:
-                    target_urgency = 4  # 4-7天：较不紧急
-                elif days_remaining > 1:
-                    target_urgency = 3  # 2-3天：中等
-                elif days_remaining > 0:
-                    target_urgency = 2  # 1天内：紧急
-                else:
-                    target_urgency = 1  # 已过期或今天：最紧急
-
-                # 根据剩余时间正确更新紧急度，无论提升还是降低
-                if target_urgency != task["urgency"]:
-                    old_urgency = task["urgency"]
-                    task["urgency"] = target_urgency
-                    updated = True
-                    promoted_tasks.append({
-                        "name": task["name"],
-                        "old_urgency": old_urgency,
-                        "new_urgency": target_urgency,
-                        "reason": f"剩余时间：{days_remaining:.1f}天"
-                    })
-
-            except Exception as e:
-                continue  # 日期格式错误的任务不处理
-
-        if updated:
-            self.data_manager.save_tasks(self.tasks)
+            next_ts = UrgencyScheduler.next_transition(deadline_ts, now_ts)
+            if next_ts is not None:
+                self.urgency_scheduler.schedule(task_id, next_ts)
+
+            # 根据剩余时间正确更新紧急度，无论提升还是降低
+            target_urgency = UrgencyScheduler.target_urgency(deadline_ts, now_ts)
+            if target_urgency != task["urgency"]:
+                old_urgency = task["urgency"]
+                filter_index = self.filter_indexes["todo"]
+                sorted_list = self.sorted_lists["todo"]
+                filter_index.remove(task)
+                sorted_list.remove(task)
+                task["urgency"] = target_urgency
+                filter_index.add(task)
+                sorted_list.add(task)
+                changes.append({"op": "update", "id": task["id"], "set": {"urgency": target_urgency}})
+                days_remaining = (deadline_ts - now_ts) / (24 * 3600)  # 转换为天
+                promoted_tasks.append({
+                    "name": task["name"],
+                    "old_urgency": old_urgency,
+                    "new_urgency": target_urgency,
+                    "reason": f"剩余时间：{days_remaining:.1f}天"
+                })
+
+        if changes:
+            self.data_manager.record_changes(self.tasks, changes)
             
         return promoted_tasks  # 返回被提升的任务列表
 
-    def get_sorted_tasks(self, task_type):
-        """获取按紧急度+星级+剩余时间智能排序的任务列表"""
+    @timed("task.sort")
+    def get_sorted_tasks(self, task_type, limit=None):
+        """获取按紧急度+星级+剩余时间智能排序的任务列表，指定 limit 时只取前 limit 个（分页显示）
+
+        直接按顺序读取有序视图，不再排序；排序规则见 core/sorted_tasks.py。
+        """
         # 先检查并更新紧急度
         if task_type == "todo":
             self.auto_promote_urgency()
+        sorted_list = self.sorted_lists.get(task_type)
+        if sorted_list is None:
+            return self.tasks[task_type][:limit]
+        return sorted_list.tasks(limit)
 
-        # 定义排序键函数，添加剩余时间作为第三排序条件
-        def get_sort_key(task):
-            # 第一条件：无截止日期的任务排在最后
-            has_deadline = task["deadline"] != "无截止日期"
-            
-            # 第二条件：紧急度（1最优先）
-            urgency = task["urgency"] if has_deadline else 0
-            
-            # 第三条件：重要度降序（3星最优先）
-            importance = -task["importance"]
-            
-            # 第四条件：剩余时间（对于有截止日期的任务）
-            remaining_time = 0
-            if has_deadline:
-                try:
-                    # 尝试解析包含时间的格式
-                    try:
-                        deadline_datetime = datetime.strptime(task["deadline"], "%Y-%m-%d %H:%M")
-                    except ValueError:
-                        # 回退到旧格式（仅日期）
-                        deadline_datetime = datetime.strptime(task["deadline"], "%Y-%m-%d")
-                    
-                    # 计算剩余时间秒数
-                    now = datetime.now()
-                    remaining_seconds = (deadline_datetime - now).total_seconds()
-                    remaining_time = remaining_seconds
-                except Exception:
-                    # 日期解析错误时，给一个较大的值，让它排在后面
-                    remaining_time = float('inf')
-            
-            # 复合排序键：无截止日期标记, 紧急度, 重要度, 剩余时间
-            return (not has_deadline, urgency, importance, remaining_time)
-
-        # 智能排序核心逻辑：
-        # 1. 优先将无截止日期的任务排在最后
-        # 2. 有截止日期的任务：按紧急度升序（1最优先）
-        # 3. 紧急度相同时按重要度降序（3星最优先）
-        # 4. 紧急度和重要度都相同时按剩余时间升序（剩余时间少的优先）
-        if task_type in ["todo", "overdue"]:
-            return sorted(
-                self.tasks[task_type],
-                key=get_sort_key
-            )
-        # 已完成任务按完成时间倒序
-        elif task_type == "done":
-            return sorted(
-                self.tasks[task_type],
-                key=lambda x: x["done_time"],
-                reverse=True
-            )
-        return self.tasks[task_type]
\ No newline at end of file
+    def count_tasks(self, task_type, criteria=None):
+        """列表中满足筛选条件的任务数，由筛选索引得到，不取出和排序任务"""
+        task_ids = self.filter_indexes[task_type].match(criteria) if criteria else None
+        return len(self.tasks[task_type]) if task_ids is None else len(task_ids)
+
+    @timed("task.filter")
+    def filter_tasks(self, task_type, criteria, limit=None):
+        """按筛选条件获取排序后的任务列表，结果与先排序再逐个筛选一致，指定 limit 时只取前 limit 个
+
+        关键词、类别、标签、重要度、紧急度和截止日期条件都由筛选索引求交集得到结果，
+        再按有序视图中的顺序排列。criteria 的键与 MainWindow.get_filter_criteria 返回的一致。
+        """
+        if task_type == "todo":
+            self.auto_promote_urgency()
+
+        task_ids = self.filter_indexes[task_type].match(criteria)
+        sorted_list = self.sorted_lists.get(task_type)
+        if sorted_list is None:
+            task_list = self.tasks[task_type]
+            if task_ids is None:
+                return task_list[:limit]
+            positions = sorted(self.task_index[task_id][1] for task_id in task_ids)[:limit]
+            return [task_list[position] for position in positions]
+        if task_ids is None:
+            return sorted_list.tasks(limit)
+        return sorted_list.select(task_ids, limit)
+
+    @staticmethod
+    def sort_tasks(task_type, tasks):
+        """按列表类型对应的规则排序任意一组任务（如不在列表中的任务），规则与有序视图相同"""
+        key = SORT_KEYS.get(task_type)
+        if key is None:
+            return list(tasks)
+        return sorted(tasks, key=key)
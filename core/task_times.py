@@ -0,0 +1,62 @@
+from datetime import datetime
+
+NO_DEADLINE = "无截止日期"
+
+# 任务中需要解析的时间字段
+TIME_FIELDS = ("deadline", "create_time", "done_time")
+
+# 程序历史上写入过的时间格式，fromisoformat 失败时依次尝试
+TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+
+
+def parse_timestamp(value):
+    """把任务中的时间字符串解析为时间戳（本地时间），无截止日期或无法解析时返回None"""
+    if not value or value == NO_DEADLINE:
+        return None
+    try:
+        # 程序写入的时间都是ISO格式，fromisoformat 比 strptime 快一个数量级
+        return datetime.fromisoformat(value).timestamp()
+    except (ValueError, TypeError):
+        pass
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
+def cache_key(field):
+    """时间字段对应的缓存键，下划线开头的键不会被保存"""
+    return f"_{field}_ts"
+
+
+def cache_task_times(task):
+    """解析任务的所有时间字段并缓存在任务上
+
+    任务加载、新建或时间字段被修改（如标记完成写入 done_time）后调用。
+    """
+    for field in TIME_FIELDS:
+        task[cache_key(field)] = parse_timestamp(task.get(field))
+    return task
+
+
+def task_timestamp(task, field):
+    """读取任务时间字段的时间戳，优先使用缓存，没有缓存时解析并写入缓存"""
+    key = cache_key(field)
+    try:
+        return task[key]
+    except KeyError:
+        value = task[key] = parse_timestamp(task.get(field))
+        return value
+
+
+def task_datetime(task, field):
+    """读取任务时间字段对应的datetime，无法解析时返回None"""
+    timestamp = task_timestamp(task, field)
+    return None if timestamp is None else datetime.fromtimestamp(timestamp)
+
+
+def strip_cached_fields(task):
+    """返回去掉缓存字段（下划线开头）的任务副本，用于保存"""
+    return {key: value for key, value in task.items() if not key.startswith("_")}
@@ -0,0 +1,71 @@
+import heapq
+
+DAY_SECONDS = 24 * 3600
+
+# 剩余天数阈值与对应紧急度（1最紧急）：剩余时间大于阈值时取该紧急度，都不满足时为1
+URGENCY_LEVELS = ((7, 5), (3, 4), (1, 3), (0, 2))
+
+
+class UrgencyScheduler:
+    """紧急度转换调度器
+
+    任务的紧急度只由截止时间决定，每个档位的切换时刻（截止前7天、3天、1天和截止时）可以提前算出。
+    调度器用最小堆保存每个任务下一次需要重新计算紧急度的时间，只处理已到期的任务，
+    不再每次刷新都扫描全部待办任务。
+    """
+    def __init__(self):
+        self.heap = []  # (计划时间戳, 任务ID)
+        self.due_times = {}  # 任务ID -> 当前有效的计划时间，与之不一致的堆条目视为过期
+
+    @staticmethod
+    def target_urgency(deadline_ts, now_ts):
+        """根据剩余时间计算任务应有的紧急度"""
+        remaining = deadline_ts - now_ts
+        for days, urgency in URGENCY_LEVELS:
+            if remaining > days * DAY_SECONDS:
+                return urgency
+        return 1
+
+    @staticmethod
+    def next_transition(deadline_ts, now_ts):
+        """返回紧急度下一次变化的时间戳，已是最紧急档位时返回None"""
+        for days, _ in URGENCY_LEVELS:
+            boundary = deadline_ts - days * DAY_SECONDS
+            if boundary > now_ts:
+                return boundary
+        return None
+
+    def schedule(self, task_id, when):
+        """安排任务在指定时间重新计算紧急度，覆盖之前的安排"""
+        self.due_times[task_id] = when
+        heapq.heappush(self.heap, (when, task_id))
+
+    def reset(self, entries):
+        """用 (计划时间戳, 任务ID) 列表整体重建调度"""
+        self.due_times = {task_id: when for when, task_id in entries}
+        self.heap = [(when, task_id) for task_id, when in self.due_times.items()]
+        heapq.heapify(self.heap)
+
+    def discard(self, task_id):
+        """取消任务的安排（任务离开待办列表时调用），堆中的条目在弹出时丢弃"""
+        self.due_times.pop(task_id, None)
+
+    def pop_due(self, now_ts):
+        """弹出所有已到期的任务ID"""
+        due = []
+        while self.heap and self.heap[0][0] <= now_ts:
+            when, task_id = heapq.heappop(self.heap)
+            if self.due_times.get(task_id) == when:
+                del self.due_times[task_id]
+                due.append(task_id)
+
+        # 过期条目过多时重建堆，保证堆的大小与有效安排数同量级
+        if len(self.heap) > 2 * len(self.due_times) + 64:
+            self.reset([(when, task_id) for task_id, when in self.due_times.items()])
+        return due
+
+    def next_due(self):
+        """返回最早的有效计划时间，没有安排时返回None"""
+        while self.heap and self.due_times.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
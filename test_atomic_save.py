@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+故障注入测试：验证 tasks.json 的原子写入和备份恢复
+
+每一轮在临时目录中先正常保存旧版本数据，再启动子进程保存新版本，并让子进程在
+写入临时文件的随机字节偏移处、或在轮换备份/替换文件的某一步直接退出（模拟崩溃、断电）。
+之后重新加载，数据必须完整等于旧版本或新版本，不能丢失或损坏。
+另外直接截断正式文件模拟磁盘损坏，加载时必须回退到最新的有效备份。
+
+用法：python test_atomic_save.py [轮数]
+"""
+
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from benchmarks.bench_storage import generate_tasks
+from core import atomic_file
+from core.data_manager import DataManager
+
+
+def make_versions():
+    """旧版本和新版本的任务数据（生成的时间与当前时间有关，子进程从文件读取新版本）"""
+    old = generate_tasks(150, seed=1)
+    new = generate_tasks(180, seed=2)
+    return old, new
+
+
+def open_manager(path):
+    """创建数据管理器，错误信息收集到列表中而不是弹窗"""
+    manager = DataManager(path)
+    manager.errors = []
+    manager.events.connect("error", manager.errors.append)
+    return manager
+
+
+def run_child(path, new_path, fault, value):
+    """子进程：保存新版本数据，在指定位置直接退出"""
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+    manager = open_manager(path)
+
+    if fault == "write":
+        # 在写入临时文件的第 value 个字节处退出
+        real_open = open
+
+        class FaultyFile:
+            def __init__(self, f):
+                self.f = f
+                self.written = 0
+
+            def write(self, text):
+                data = text.encode("utf-8")
+                if self.written + len(data) > value:
+                    self.f.write(data[:value - self.written].decode("utf-8", "ignore"))
+                    self.f.flush()
+                    os._exit(1)
+                self.written += len(data)
+                return self.f.write(text)
+
+            def __getattr__(self, name):
+                return getattr(self.f, name)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                return self.f.__exit__(*args)
+
+        atomic_file.open = lambda *args, **kwargs: FaultyFile(real_open(*args, **kwargs))
+    else:
+        # 在第 value 次重命名之前退出
+        real_replace = os.replace
+        calls = [0]
+
+        def faulty_replace(src, dst):
+            calls[0] += 1
+            if calls[0] > value:
+                os._exit(1)
+            real_replace(src, dst)
+
+        atomic_file.os.replace = faulty_replace
+
+    manager.save_tasks(new)
+    os._exit(0)
+
+
+def check_crash(work_dir, rng, data_size):
+    """一轮崩溃测试，返回 (是否通过, 加载到的版本)"""
+    old, new = make_versions()
+    path = os.path.join(work_dir, "tasks.json")
+    manager = open_manager(path)
+    for _ in range(3):
+        manager.save_tasks(old)  # 产生正式文件和多代备份
+
+    if rng.random() < 0.7:
+        fault, value = "write", rng.randint(0, data_size)
+    else:
+        fault, value = "replace", rng.randint(0, 4)
+    new_path = os.path.join(work_dir, "new.json")
+    with open(new_path, "w", encoding="utf-8") as f:
+        json.dump(new, f, ensure_ascii=False)
+    subprocess.run([sys.executable, __file__, "--child", path, new_path, fault, str(value)], check=False)
+
+    loaded = open_manager(path).load_tasks()
+    if loaded == old:
+        return True, "旧版本"
+    if loaded == new:
+        return True, "新版本"
+    print(f"失败：故障 {fault}@{value} 后加载到的数据既不是旧版本也不是新版本")
+    return False, None
+
+
+def check_corruption(work_dir, rng):
+    """截断正式文件，加载时应回退到最新的有效备份"""
+    old, new = make_versions()
+    path = os.path.join(work_dir, "tasks.json")
+    manager = open_manager(path)
+    manager.save_tasks(old)
+    manager.save_tasks(new)  # 备份1为旧版本
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        f.truncate(rng.randint(0, size - 1))
+
+    reader = open_manager(path)
+    loaded = reader.load_tasks()
+    if loaded != old or not reader.errors:
+        print("失败：正式文件损坏后没有回退到最新的备份")
+        return False
+    return True
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rng = random.Random(0)
+
+    # 新版本序列化后的字节数，用于选择故障偏移
+    probe_dir = tempfile.mkdtemp()
+    probe = open_manager(os.path.join(probe_dir, "tasks.json"))
+    probe.save_tasks(make_versions()[1])
+    data_size = os.path.getsize(probe.file_path)
+    shutil.rmtree(probe_dir)
+
+    passed = 0
+    outcomes = {}
+    for _ in range(rounds):
+        work_dir = tempfile.mkdtemp()
+        try:
+            ok, outcome = check_crash(work_dir, rng, data_size)
+            ok = ok and check_corruption(tempfile.mkdtemp(dir=work_dir), rng)
+        finally:
+            shutil.rmtree(work_dir)
+        passed += ok
+        if outcome:
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    print(f"故障注入 {rounds} 轮，通过 {passed} 轮，崩溃后加载结果: {outcomes}")
+    return 0 if passed == rounds else 1
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], sys.argv[3], sys.argv[4], int(sys.argv[5]))
+    sys.exit(main())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+测试脚本：核心模块不依赖 PyQt5，可以在没有显示环境的服务器上运行
+
+检查导入 core 下的模块不会导入 PyQt5，并在临时目录中验证错误以类型化的错误事件或异常给出，不弹窗。
+用法：python test_headless_core.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, '.')
+os.environ.pop("DISPLAY", None)
+
+start = time.perf_counter()
+from core.config_manager import ConfigManager
+from core.data_manager import DataManager
+from core.errors import ConfigError, DataLoadError
+from core.statistics_manager import StatisticsManager
+from core.task_handler import TaskHandler
+import_ms = (time.perf_counter() - start) * 1000
+
+
+def main():
+    qt_modules = sorted(name for name in sys.modules if name.startswith("PyQt5"))
+    print(f"导入核心模块耗时 {import_ms:.1f} ms，已导入的 PyQt5 模块: {qt_modules or '无'}")
+    ok = not qt_modules
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # 任务数据文件损坏且没有备份：发出 DataLoadError 事件，使用空数据继续运行
+        path = os.path.join(workdir, "tasks.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{损坏")
+        manager = DataManager(path)
+        errors = []
+        manager.events.connect("error", errors.append)
+        handler = TaskHandler(manager)
+        handler.add_task({"name": "无界面任务", "deadline": "无截止日期", "importance": 2, "urgency": 3,
+                          "category": "工作", "tags": []})
+        stats = StatisticsManager(handler)
+        print(f"错误事件: {[type(e).__name__ for e in errors]}，任务总数: {stats.get_total_tasks_count()}")
+        ok = ok and len(errors) == 1 and isinstance(errors[0], DataLoadError)
+
+        # 配置读取失败使用默认配置并发出事件，保存失败抛出 ConfigError
+        config_path = os.path.join(workdir, "config.json")
+        with open(config_path, "w", encoding="utf-8") as f:
+            f.write("[")
+        config_manager = ConfigManager(config_path)
+        config_errors = []
+        config_manager.events.connect("error", config_errors.append)
+        config = config_manager.load_config()
+        ok = ok and config == config_manager.default_config and isinstance(config_errors[0], ConfigError)
+        config_manager.config_path = workdir  # 目录无法作为文件写入
+        try:
+            config_manager.save_config(config)
+            ok = False
+        except ConfigError as e:
+            print(f"保存配置失败: {e}")
+
+    print("通过" if ok else "失败")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
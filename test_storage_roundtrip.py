@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+测试脚本：任务修改后重新加载，数据与内存中的列表一致
+
+在临时目录中对 TaskHandler 随机执行新增、完成、删除、超时和紧急度提升，
+再通过 JournalDataManager 重新加载（重放日志），与内存中的列表逐个比较；
+二进制快照编码后解码、以及修改延迟解码的任务后保存再加载，结果与内存中的列表相同；
+二进制快照之后日志中的完成记录重放后，任务的时间戳缓存和完成统计与时间字段一致；
+filter_tasks 的结果与逐个任务判断筛选条件的结果比较（修改后和重新加载后）；
+增量维护的有序视图与按原排序规则整体排序的结果比较；
+合并归档各月份聚合得到的统计与逐个统计全部归档任务的结果比较。
+用法：python test_storage_roundtrip.py [随机种子]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, '.')
+from core.binary_snapshot import decode_snapshot, encode_snapshot
+from core.data_manager import DataManager
+from core.done_archive import DoneArchive
+from core.journal_data_manager import JournalDataManager
+from core.task_handler import TaskHandler
+from core.filter_index import search_text_of
+from core.sorted_tasks import SORT_KEYS
+from core.statistics_aggregates import StatisticsAggregates
+from core.task_times import NO_DEADLINE, TIME_FIELDS, cache_key, parse_timestamp, strip_cached_fields, task_timestamp
+
+CATEGORIES = ["工作", "学习", "生活", "其他"]
+TAGS = ["重要", "紧急", "常规", "计划"]
+
+# 参与比较的筛选条件，键与 MainWindow.get_filter_criteria 返回的一致
+FILTER_CRITERIA = [
+    {"search_text": "任务1"},
+    {"search_text": "工"},
+    {"category": "学习"},
+    {"tag": "紧急"},
+    {"tag": "无标签"},
+    {"importance": 3},
+    {"urgency": 2},
+    {"no_deadline": True},
+    {"deadline_range": (date.today(), date.today() + timedelta(days=7))},
+    {"category": "工作", "importance": 2, "tag": "常规"},
+]
+
+
+def random_task_info(rng, now):
+    """随机的新任务：截止时间从已过期到两周后不等，部分没有截止日期"""
+    if rng.random() < 0.15:
+        deadline = "无截止日期"
+    else:
+        deadline = (now + timedelta(minutes=rng.randint(-3000, 20000))).strftime("%Y-%m-%d %H:%M")
+    task_info = {
+        "name": f"任务{rng.randint(0, 9999)}",
+        "deadline": deadline,
+        "importance": rng.randint(1, 3),
+        "urgency": rng.randint(1, 5),
+        "category": rng.choice(CATEGORIES),
+        "tags": rng.sample(TAGS, rng.randint(0, 2)),
+    }
+    if rng.random() < 0.2:
+        task_info["note"] = f"备注{rng.randint(0, 99)}"  # 二进制快照中以附加字段保存
+    return task_info
+
+
+def run_operations(handler, rng, steps):
+    """随机执行新增、完成、删除、超时检查和紧急度提升"""
+    now = datetime.now()
+    for _ in range(steps):
+        roll = rng.random()
+        if roll < 0.4:
+            handler.add_task(random_task_info(rng, now))
+        elif roll < 0.6:
+            task_type = rng.choice(["todo", "overdue"])
+            if handler.tasks[task_type]:
+                handler.mark_as_done(task_type, rng.randrange(len(handler.tasks[task_type])))
+        elif roll < 0.75:
+            task_type = rng.choice(["todo", "overdue", "done"])
+            if handler.tasks[task_type]:
+                handler.delete_task(task_type, rng.randrange(len(handler.tasks[task_type])))
+        elif roll < 0.9:
+            handler.check_overdue_tasks()
+        else:
+            # 让所有待办任务立即重新计算紧急度
+            now_ts = time.time()
+            handler.urgency_scheduler.reset([(now_ts, task["id"]) for task in handler.tasks["todo"]])
+            handler.auto_promote_urgency()
+
+
+def plain_lists(tasks):
+    """去掉缓存字段的任务列表，用于比较"""
+    return {
+        task_type: [strip_cached_fields(task) for task in tasks[task_type]]
+        for task_type in ("todo", "done", "overdue")
+    }
+
+
+def matches(task, criteria):
+    """逐个判断任务是否满足筛选条件（不使用筛选索引）"""
+    if "search_text" in criteria and criteria["search_text"] not in search_text_of(task):
+        return False
+    for field in ("category", "importance", "urgency"):
+        if field in criteria and task.get(field) != criteria[field]:
+            return False
+    tags = task.get("tags") or []
+    if "tag" in criteria and (bool(tags) if criteria["tag"] == "无标签" else criteria["tag"] not in tags):
+        return False
+    if criteria.get("no_deadline") and task["deadline"] != NO_DEADLINE:
+        return False
+    if criteria.get("deadline_range"):
+        start_date, end_date = criteria["deadline_range"]
+        deadline_ts = task_timestamp(task, "deadline")
+        start_ts = datetime.combine(start_date, datetime.min.time()).timestamp()
+        end_ts = datetime.combine(end_date, datetime.min.time()).timestamp()
+        if deadline_ts is None or not start_ts <= deadline_ts < end_ts:
+            return False
+    return True
+
+
+def filters_consistent(handler):
+    """每个列表、每组筛选条件下 filter_tasks 与先排序再逐个筛选的结果相同"""
+    for task_type in ("todo", "done", "overdue"):
+        sorted_tasks = handler.get_sorted_tasks(task_type)
+        for criteria in FILTER_CRITERIA:
+            expected = [task["id"] for task in sorted_tasks if matches(task, criteria)]
+            if [task["id"] for task in handler.filter_tasks(task_type, criteria)] != expected:
+                print(f"筛选结果不一致: {task_type} {criteria}")
+                return False
+    return True
+
+
+def check_filter_index(workdir, rng):
+    """筛选索引随修改增量维护，结果与逐个判断相同；重新加载后建立的索引同样"""
+    path = os.path.join(workdir, "filter.json")
+    handler = TaskHandler(JournalDataManager(path))
+    ok = True
+    for _ in range(5):
+        run_operations(handler, rng, 80)
+        ok = ok and filters_consistent(handler)
+    reloaded = TaskHandler(JournalDataManager(path))
+    ok = ok and filters_consistent(reloaded)
+    print(f"筛选索引: {'一致' if ok else '不一致'}，{len(FILTER_CRITERIA)} 组条件")
+    return ok
+
+
+def baseline_sort_key(task):
+    """增量维护有序视图之前的排序键：无截止日期排最后 → 紧急度 → 重要度降序 → 截止时间"""
+    has_deadline = task["deadline"] != NO_DEADLINE
+    deadline_ts = 0
+    if has_deadline:
+        deadline_ts = task_timestamp(task, "deadline")
+        if deadline_ts is None:
+            deadline_ts = float("inf")
+    return (not has_deadline, task["urgency"] if has_deadline else 0, -task["importance"], deadline_ts)
+
+
+def sorted_lists_consistent(handler):
+    """有序视图包含列表中的全部任务，顺序与整体排序相同，并符合原来的排序规则"""
+    for task_type in ("todo", "done", "overdue"):
+        sorted_tasks = handler.get_sorted_tasks(task_type)
+        if len(handler.sorted_lists[task_type].by_id) != len(handler.tasks[task_type]):
+            return False
+        if [task["id"] for task in sorted_tasks] != [
+            task["id"] for task in sorted(handler.tasks[task_type], key=SORT_KEYS[task_type])
+        ]:
+            return False
+        if task_type == "done":
+            keys = [-(task_timestamp(task, "done_time") or 0) for task in sorted_tasks]
+        else:
+            keys = [baseline_sort_key(task) for task in sorted_tasks]
+        if keys != sorted(keys):
+            return False
+        # 分页读取的结果是完整结果的前缀
+        if handler.get_sorted_tasks(task_type, 10) != sorted_tasks[:10]:
+            return False
+        for criteria in FILTER_CRITERIA:
+            if handler.filter_tasks(task_type, criteria, 5) != handler.filter_tasks(task_type, criteria)[:5]:
+                return False
+    return True
+
+
+def check_sorted_lists(workdir, rng):
+    """有序视图随新增、完成、删除、超时和紧急度变化增量维护，重新加载后建立的有序视图同样"""
+    path = os.path.join(workdir, "sorted.json")
+    handler = TaskHandler(JournalDataManager(path))
+    ok = True
+    for _ in range(5):
+        run_operations(handler, rng, 80)
+        ok = ok and sorted_lists_consistent(handler)
+    ok = ok and sorted_lists_consistent(TaskHandler(JournalDataManager(path)))
+    print(f"有序视图: {'一致' if ok else '不一致'}")
+    return ok
+
+
+def check_journal_roundtrip(workdir, rng):
+    """日志模式：修改后重新加载（重放日志）与内存中的列表相同；压缩阈值较小时同样"""
+    ok = True
+    for threshold in (100000, 7):
+        path = os.path.join(workdir, f"journal_{threshold}.json")
+        handler = TaskHandler(JournalDataManager(path, compact_threshold=threshold))
+        same = True
+        for _ in range(5):
+            run_operations(handler, rng, 60)
+            reloaded = JournalDataManager(path, compact_threshold=threshold).load_tasks()
+            same = same and plain_lists(reloaded) == plain_lists(handler.tasks)
+        counts = {task_type: len(task_list) for task_type, task_list in handler.tasks.items()}
+        print(f"日志重放（压缩阈值 {threshold}）: {'一致' if same else '不一致'}，任务数 {counts}")
+        ok = ok and same
+    return ok
+
+
+def check_binary_snapshot(workdir, rng):
+    """二进制快照：编码后解码相同；加载后经 TaskHandler 修改（部分任务已解码、部分未解码）再保存，重新加载相同"""
+    ok = True
+    for storage_mode in ("json", "journal"):
+        path = os.path.join(workdir, f"binary_{storage_mode}.bin")
+        if storage_mode == "journal":
+            create_manager = lambda: JournalDataManager(path, compact_threshold=7, snapshot_format="binary")
+        else:
+            create_manager = lambda: DataManager(path, snapshot_format="binary")
+        handler = TaskHandler(create_manager())
+        run_operations(handler, rng, 120)
+        handler.data_manager.save_tasks(handler.tasks)
+        same = True
+        for _ in range(3):
+            # 重新加载后的任务是延迟解码的 LazyTask，继续修改后保存
+            handler = TaskHandler(create_manager())
+            run_operations(handler, rng, 60)
+            decoded = decode_snapshot(encode_snapshot(handler.tasks)).tasks
+            reloaded = create_manager().load_tasks()
+            same = same and plain_lists(decoded) == plain_lists(handler.tasks)
+            same = same and plain_lists(reloaded) == plain_lists(handler.tasks)
+        print(f"二进制快照（{storage_mode}）: {'一致' if same else '不一致'}")
+        ok = ok and same
+    return ok
+
+
+def time_caches_consistent(tasks):
+    """所有任务的时间戳缓存与时间字段解析的结果一致"""
+    return all(
+        task[cache_key(field)] == parse_timestamp(task.get(field))
+        for task_list in tasks.values() for task in task_list for field in TIME_FIELDS
+    )
+
+
+def check_binary_time_cache(workdir, rng):
+    """二进制快照加载的任务由日志重放标记完成后，时间戳缓存和完成统计包含新的完成时间"""
+    path = os.path.join(workdir, "binary_cache.bin")
+    create_manager = lambda: JournalDataManager(path, snapshot_format="binary")
+    handler = TaskHandler(create_manager())
+    for _ in range(20):
+        handler.add_task(random_task_info(rng, datetime.now()))
+    handler.data_manager.save_tasks(handler.tasks)
+
+    # 第二次加载得到 LazyTask，标记完成只写入日志
+    handler = TaskHandler(create_manager())
+    for _ in range(5):
+        task_type = "todo" if handler.tasks["todo"] else "overdue"
+        handler.mark_as_done(task_type, 0)
+
+    reloaded = TaskHandler(create_manager())
+    consistent = time_caches_consistent(reloaded.tasks)
+    completed = reloaded.get_statistics().completed_by_day
+    expected = handler.get_statistics().completed_by_day
+    ok = consistent and +completed == +expected and sum(expected.values()) == 5
+    print(f"二进制快照后重放完成记录: 时间戳缓存{'一致' if consistent else '不一致'}，"
+          f"完成趋势 {sum(completed.values())}/{sum(expected.values())}")
+    return ok
+
+
+def full_statistics(handler):
+    """逐个统计内存中的任务和全部归档任务，归档中与内存重复的任务以内存为准"""
+    statistics = StatisticsAggregates()
+    for task_type, task_list in handler.tasks.items():
+        for task in task_list:
+            statistics.add(task_type, task)
+    for task in handler.archive.iter_tasks():
+        if task["id"] not in handler.task_index:
+            statistics.add("done", task)
+    return statistics
+
+
+def statistics_summary(statistics):
+    """用于比较的聚合内容，总耗时的浮点累加顺序不同，保留到毫秒"""
+    data = statistics.to_dict()
+    data["duration_seconds"] = {day: round(value, 3) for day, value in data["duration_seconds"].items()}
+    return data
+
+
+def check_archive_statistics(workdir, rng):
+    """统计合并 index.json 中各月份的聚合，与逐个统计全部归档任务的结果相同，且不打开归档文件"""
+    path = os.path.join(workdir, "archive_stats.json")
+    archive_dir = os.path.join(workdir, "archive")
+    now = datetime.now()
+    tasks = {"todo": [], "done": [], "overdue": []}
+    for i in range(300):
+        created = now - timedelta(days=rng.randint(0, 200), minutes=rng.randint(0, 1440))
+        done = created + timedelta(minutes=rng.randint(1, 20000))
+        tasks["done"].append(dict(
+            random_task_info(rng, created), id=f"d{i}",
+            create_time=created.strftime("%Y-%m-%d %H:%M:%S"),
+            done_time=min(done, now).strftime("%Y-%m-%d %H:%M:%S"),
+        ))
+    DataManager(path).save_tasks(tasks)
+
+    handler = TaskHandler(DataManager(path), DoneArchive(archive_dir, 30))
+    archived_ids = [task["id"] for task in handler.archive.iter_tasks()]
+    same = statistics_summary(handler.get_statistics()) == statistics_summary(full_statistics(handler))
+    # 增量维护：修改内存中的任务、删除归档任务
+    run_operations(handler, rng, 60)
+    for task_id in rng.sample(archived_ids, 5):
+        handler.delete_archived_task(task_id)
+    same = same and statistics_summary(handler.get_statistics()) == statistics_summary(full_statistics(handler))
+
+    # 重新加载：只读取 index.json
+    handler = TaskHandler(DataManager(path), DoneArchive(archive_dir, 30))
+    statistics = statistics_summary(handler.get_statistics())
+    unopened = not handler.archive.snapshots
+    same = same and statistics == statistics_summary(full_statistics(handler))
+
+    # 归档后、移出已完成列表前崩溃：同一任务同时在两处
+    handler = TaskHandler(DataManager(path), DoneArchive(archive_dir, 30))
+    duplicate = dict(next(handler.archive.iter_tasks()))
+    handler.archive = DoneArchive(archive_dir, 30)
+    handler._append_task("done", duplicate)
+    same = same and statistics_summary(handler.get_statistics()) == statistics_summary(full_statistics(handler))
+
+    # index.json 与归档文件不符时重新计算
+    with open(os.path.join(archive_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump({}, f)
+    handler = TaskHandler(DataManager(path), DoneArchive(archive_dir, 30))
+    same = same and statistics_summary(handler.get_statistics()) == statistics == statistics_summary(
+        full_statistics(handler))
+
+    print(f"归档统计: {'一致' if same else '不一致'}，归档任务 {handler.archive.count()}，"
+          f"统计时{'未打开' if unopened else '打开了'}归档文件")
+    return same and unopened
+
+
+def main():
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        ok = check_journal_roundtrip(workdir, rng)
+        ok = check_binary_snapshot(workdir, rng) and ok
+        ok = check_binary_time_cache(workdir, rng) and ok
+        ok = check_filter_index(workdir, rng) and ok
+        ok = check_sorted_lists(workdir, rng) and ok
+        ok = check_archive_statistics(workdir, rng) and ok
+
+    print("通过" if ok else "失败")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
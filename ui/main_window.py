@@ -5,19 +5,41 @@ from PyQt5.QtWidgets import (QMainWindow, QWidget, QHBoxLayout, QVBoxLayout,
                              QDateTimeEdit, QPushButton, QSplitter, QMessageBox,
                              QSystemTrayIcon, QMenu, QAction, qApp, QDialog,
                              QSpinBox, QLabel, QCheckBox, QSizePolicy, QGridLayout,
-                             QTabWidget)
+                             QTabWidget, QApplication)
 from PyQt5.QtCore import Qt, QDate, QDateTime, QThread, pyqtSignal, QSize, QTimer
 from PyQt5.QtGui import QFont, QIcon, QColor, QBrush
 from datetime import datetime, date, timedelta
 import time
-from pynput.keyboard import GlobalHotKeys
+import logging
 import threading
 
-from core.data_manager import DataManager
+from core.data_manager import create_data_manager
+from core.done_archive import create_done_archive
 from core.task_handler import TaskHandler
+from core.task_times import parse_timestamp
+from core.urgency_scheduler import UrgencyScheduler
 from core.config_manager import ConfigManager
+from core.errors import ConfigError
+from core.events import EventEmitter
+from core.log_config import configure_logging
+from core.perf import PROFILER, span, timed
+from ui.performance_widget import PerformanceWidget
 from ui.widgets import TaskListWidget
-from ui.statistics_widget import StatisticsWidget
+
+logger = logging.getLogger(__name__)
+
+# 倒计时刷新间隔（毫秒），倒计时精确到秒
+COUNTDOWN_TICK_MS = 1000
+
+# 搜索框停止输入多久后执行搜索（毫秒）
+SEARCH_DEBOUNCE_MS = 200
+
+# 空闲时每批加入搜索索引的任务数
+SEARCH_INDEX_BATCH = 1000
+
+# 任务转换时鼠标正在按下（点击或拖动）则推迟处理：每次推迟的时间（毫秒）和最多推迟次数
+TRANSITION_DEFER_MS = 100
+TRANSITION_DEFER_LIMIT = 20
 
 
 class HotkeyListener(QThread):
@@ -25,7 +47,16 @@ class HotkeyListener(QThread):
     trigger = pyqtSignal()  # 触发信号
 
     def run(self):
-        """监听全局快捷键 Ctrl+Alt+T"""
+        """监听全局快捷键 Ctrl+Alt+T
+
+        pynput 在监听线程中才导入：没有安装或没有可用的显示环境（如 offscreen 平台下的基准测试）时
+        只是没有全局快捷键，主窗口照常运行。
+        """
+        try:
+            from pynput.keyboard import GlobalHotKeys
+        except Exception as e:
+            logger.warning("全局快捷键不可用: %s", e)
+            return
         with GlobalHotKeys({
             '<ctrl>+<alt>+t': self.on_triggered
         }) as h:
@@ -111,16 +142,25 @@ class SettingsDialog(QDialog):
 
 class MainWindow(QMainWindow):
     """主窗口类"""
+    core_error = pyqtSignal(object)  # 核心模块的错误事件（可能来自后台写入线程），转交到界面线程提示
 
     def __init__(self):
         super().__init__()
+        self.core_error.connect(self.show_core_error)
         # 初始化配置管理器
         self.config_manager = ConfigManager()
+        self.config_manager.events.connect("error", self.core_error.emit)
         self.config = self.config_manager.load_config()
+        configure_logging(self.config)
 
         # 初始化数据管理器和任务处理器
-        self.data_manager = DataManager()
-        self.task_handler = TaskHandler(self.data_manager)
+        data_events = EventEmitter()
+        data_events.connect("error", self.core_error.emit)
+        self.data_manager = create_data_manager(self.config, data_events)
+        self.task_handler = TaskHandler(self.data_manager, create_done_archive(self.config))
+        self.done_rows_shown = self.config["done_page_size"]  # 已完成列表当前加载的行数（已加载的页数 × 每页任务数）
+        self.done_has_more = False  # 已完成列表是否还有未加载的任务
+        self.done_page_pending = False  # 是否已安排加载已完成列表的下一页
 
         # 窗口设置（从配置加载）
         self.setWindowTitle("事务处理程序")
@@ -140,6 +180,9 @@ class MainWindow(QMainWindow):
         # 初始化定时器用于刷新倒计时显示
         self.init_timer()
 
+        # 空闲时分批建立搜索索引
+        self.init_search_index_build()
+
         # 默认隐藏窗口（后台运行）
         self.hide()
         self.show_system_tray_message("程序已启动", "使用 Ctrl+Alt+T 呼出窗口")
@@ -217,7 +260,7 @@ class MainWindow(QMainWindow):
         splitter = QSplitter(Qt.Horizontal)
 
         # 待办任务列表（带数量统计）
-        self.todo_list = TaskListWidget("todo")
+        self.todo_list = self.create_task_list("todo")
         self.todo_list.done_btn.clicked.connect(lambda: self.handle_mark_done("todo"))
         self.todo_list.delete_btn.clicked.connect(lambda: self.handle_delete("todo"))
         self.todo_group = QGroupBox("待完成任务 (0)")  # 初始数量0
@@ -226,7 +269,7 @@ class MainWindow(QMainWindow):
         splitter.addWidget(self.todo_group)
 
         # 超时任务列表（带数量统计）
-        self.overdue_list = TaskListWidget("overdue")
+        self.overdue_list = self.create_task_list("overdue")
         self.overdue_list.done_btn.clicked.connect(lambda: self.handle_mark_done("overdue"))
         self.overdue_list.delete_btn.clicked.connect(lambda: self.handle_delete("overdue"))
         self.overdue_group = QGroupBox("超时任务 (0)")  # 初始数量0
@@ -235,8 +278,10 @@ class MainWindow(QMainWindow):
         splitter.addWidget(self.overdue_group)
 
         # 已完成任务列表（带数量统计）
-        self.done_list = TaskListWidget("done")
+        self.done_list = self.create_task_list("done")
         self.done_list.delete_btn.clicked.connect(lambda: self.handle_delete("done"))
+        self.done_list.more_btn.clicked.connect(self.load_more_done)
+        self.done_list.list_widget.verticalScrollBar().valueChanged.connect(self.handle_done_list_scrolled)
         self.done_group = QGroupBox("已完成任务 (0)")  # 初始数量0
         self.done_group.setLayout(QVBoxLayout())
         self.done_group.layout().addWidget(self.done_list)
@@ -248,16 +293,32 @@ class MainWindow(QMainWindow):
         # 添加分割器到任务列表标签页布局
         task_list_layout.addWidget(splitter)
         
-        # 创建统计界面标签页
-        self.statistics_widget = StatisticsWidget(self.task_handler)
-        
+        # 统计界面标签页：先放一个空容器，第一次切换到该标签页时才创建统计组件（导入matplotlib并绘制图表）
+        self.statistics_tab = QWidget()
+        self.statistics_tab.setLayout(QVBoxLayout())
+        self.statistics_tab.layout().setContentsMargins(0, 0, 0, 0)
+        self.statistics_widget = None
+
+        # 性能标签页：各热点路径的耗时分位数和最近的慢帧，只在显示时刷新
+        self.performance_widget = PerformanceWidget(PROFILER)
+
         # 添加标签页
         self.tab_widget.addTab(task_list_widget, "任务列表")
-        self.tab_widget.addTab(self.statistics_widget, "任务统计")
-        
+        self.tab_widget.addTab(self.statistics_tab, "任务统计")
+        self.tab_widget.addTab(self.performance_widget, "性能")
+        self.tab_widget.currentChanged.connect(self.handle_tab_changed)
+
         # 添加标签页到主布局
         main_layout.addWidget(self.tab_widget, 1)
 
+    def handle_tab_changed(self, index):
+        """第一次切换到统计标签页时创建统计组件"""
+        if self.tab_widget.widget(index) is not self.statistics_tab or self.statistics_widget is not None:
+            return
+        from ui.statistics_widget import StatisticsWidget
+        self.statistics_widget = StatisticsWidget(self.task_handler)
+        self.statistics_tab.layout().addWidget(self.statistics_widget)
+
     def create_input_panel(self):
         """创建任务输入面板（优化紧急度选项）"""
         from PyQt5.QtWidgets import QComboBox
@@ -377,9 +438,15 @@ class MainWindow(QMainWindow):
         
         # 创建搜索输入框
         self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText("输入关键词搜索任务...")
+        self.search_input.setPlaceholderText("输入关键词搜索任务名称、类别或标签...")
         self.search_input.setMinimumHeight(28)  # 减小高度
-        self.search_input.textChanged.connect(self.handle_search_filter)  # 实时搜索
+        # 边输入边搜索：输入停顿后才刷新列表，连续输入时不重复刷新；回车立即搜索
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.handle_search_filter)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        self.search_input.returnPressed.connect(self.handle_search_input_submit)
         form_layout.addRow("搜索任务:", self.search_input)
         
         # 类别筛选
@@ -471,23 +538,33 @@ class MainWindow(QMainWindow):
         # 返回面板
         return panel
 
+    def create_task_list(self, task_type):
+        """按配置的显示模式创建任务列表"""
+        return TaskListWidget(
+            task_type,
+            view_mode=self.config.get("list_view_mode", "widget"),
+            time_formatter=self.task_handler.calculate_time_remaining
+        )
+
     def open_settings(self):
         """打开设置对话框"""
         dialog = SettingsDialog(self.config, self)
         if dialog.exec_():
             new_config = dialog.get_config()
             # 保存新配置
-            if self.config_manager.save_config(new_config):
-                self.config = new_config
-                # 应用窗口大小设置
-                self.resize(self.config["window_width"], self.config["window_height"])
-                
-                # 更新定时器间隔（秒转换为毫秒）
-                new_interval_ms = self.config["update_interval"] * 1000
-                self.timer.setInterval(new_interval_ms)
-                print(f"定时器间隔已更新为{new_interval_ms}毫秒")
-                
-                QMessageBox.information(self, "设置成功", "配置已保存")
+            try:
+                self.config_manager.save_config(new_config)
+            except ConfigError as e:
+                self.show_core_error(e)
+                return
+            self.config = new_config
+            # 应用窗口大小设置
+            self.resize(self.config["window_width"], self.config["window_height"])
+
+            # 按新的更新间隔重新安排转换定时器
+            self.schedule_next_transition()
+
+            QMessageBox.information(self, "设置成功", "配置已保存")
 
     def toggle_deadline(self):
         """切换是否启用截止日期"""
@@ -538,22 +615,8 @@ class MainWindow(QMainWindow):
         # 计算任务应有的紧急度（基于截止时间）
         proper_urgency = urgency  # 默认使用用户设置的紧急度
         if deadline != "无截止日期":
-            deadline_dt = datetime.strptime(deadline, "%Y-%m-%d %H:%M")
-            now = datetime.now()
-            time_diff = deadline_dt - now
-            days_remaining = time_diff.total_seconds() / (24 * 3600)
-            
-            # 根据剩余天数计算正确的紧急度
-            if days_remaining <= 0:
-                proper_urgency = 1
-            elif days_remaining <= 1:
-                proper_urgency = 2
-            elif days_remaining <= 3:
-                proper_urgency = 3
-            elif days_remaining <= 7:
-                proper_urgency = 4
-            else:
-                proper_urgency = 5
+            # 与自动调整紧急度使用相同的档位规则
+            proper_urgency = UrgencyScheduler.target_urgency(parse_timestamp(deadline), time.time())
         
         # 添加任务
         self.task_handler.add_task({
@@ -589,22 +652,21 @@ class MainWindow(QMainWindow):
         # 获取选中项的任务数据（直接从UI组件中获取）
         selected_task_data = list_widget.get_selected_task_data()
         
-        # 关键点：保存选中任务的唯一标识（创建时间和名称）
+        # 关键点：保存选中任务的唯一标识（任务ID，旧数据兼容创建时间和名称）
         # 这样即使在执行过程中列表被刷新，也能通过这些标识找到正确的任务
+        task_id = None
         task_create_time = None
         task_name = None
         
+        if not selected_task_data:
+            # 获取过滤后的任务列表作为备选
+            filtered_tasks = self.get_filtered_tasks(task_type)
+            if index < len(filtered_tasks):
+                selected_task_data = filtered_tasks[index]
         if selected_task_data:
+            task_id = selected_task_data.get("id")
             task_create_time = selected_task_data.get("create_time")
             task_name = selected_task_data["name"]
-        else:
-            # 获取过滤后的任务列表作为备选
-            all_tasks = self.task_handler.get_sorted_tasks(task_type)
-            filtered_tasks = self.filter_tasks(all_tasks)
-            if index < len(filtered_tasks):
-                selected_task = filtered_tasks[index]
-                task_create_time = selected_task.get("create_time")
-                task_name = selected_task["name"]
         
         if not task_name:
             QMessageBox.warning(self, "错误", "无法获取任务信息")
@@ -612,7 +674,7 @@ class MainWindow(QMainWindow):
         
         # 关键修复：即使在执行过程中定时器触发刷新，我们也直接使用任务标识查找并完成
         # 而不是依赖于可能变化的索引
-        success = self.task_handler.mark_task_done_by_identifier(task_type, task_create_time, task_name)
+        success = self.task_handler.mark_task_done_by_identifier(task_type, task_create_time, task_name, task_id=task_id)
         
         if success:
             self.refresh_list(task_type)
@@ -633,22 +695,21 @@ class MainWindow(QMainWindow):
         # 获取选中项的任务数据（直接从UI组件中获取）
         selected_task_data = list_widget.get_selected_task_data()
         
-        # 关键点：保存选中任务的唯一标识（创建时间和名称）
+        # 关键点：保存选中任务的唯一标识（任务ID，旧数据兼容创建时间和名称）
         # 这样即使在执行过程中列表被刷新，也能通过这些标识找到正确的任务
+        task_id = None
         task_create_time = None
         task_name = None
         
+        if not selected_task_data:
+            # 获取过滤后的任务列表作为备选
+            filtered_tasks = self.get_filtered_tasks(task_type)
+            if index < len(filtered_tasks):
+                selected_task_data = filtered_tasks[index]
         if selected_task_data:
+            task_id = selected_task_data.get("id")
             task_create_time = selected_task_data.get("create_time")
             task_name = selected_task_data["name"]
-        else:
-            # 获取过滤后的任务列表作为备选
-            all_tasks = self.task_handler.get_sorted_tasks(task_type)
-            filtered_tasks = self.filter_tasks(all_tasks)
-            if index < len(filtered_tasks):
-                selected_task = filtered_tasks[index]
-                task_create_time = selected_task.get("create_time")
-                task_name = selected_task["name"]
         
         if not task_name:
             QMessageBox.warning(self, "错误", "无法获取任务信息")
@@ -663,7 +724,7 @@ class MainWindow(QMainWindow):
         if reply == QMessageBox.Yes:
             # 关键修复：即使在执行过程中定时器触发刷新，我们也直接使用任务标识查找并删除
             # 而不是依赖于可能变化的索引
-            success = self.task_handler.delete_task_by_identifier(task_type, task_create_time, task_name)
+            success = self.task_handler.delete_task_by_identifier(task_type, task_create_time, task_name, task_id=task_id)
             
             if success:
                 self.refresh_list(task_type)
@@ -705,8 +766,14 @@ class MainWindow(QMainWindow):
         return text
 
     def handle_search_filter(self):
-        """处理搜索和筛选操作"""
+        """处理搜索和筛选操作，已完成列表回到第一页"""
+        self.done_rows_shown = self.config["done_page_size"]
         self.refresh_all_lists()
+
+    def handle_search_input_submit(self):
+        """搜索框按下回车：取消等待中的延迟搜索，立即搜索"""
+        self.search_timer.stop()
+        self.handle_search_filter()
         
     def reset_search_filter(self):
         """重置所有筛选条件"""
@@ -717,136 +784,149 @@ class MainWindow(QMainWindow):
         self.urgency_filter.setCurrentIndex(0)
         self.deadline_filter.setCurrentIndex(0)
         
-    def filter_tasks(self, tasks):
-        """根据搜索和筛选条件过滤任务列表"""
-        # 获取搜索和筛选条件
+    def get_deadline_range(self, selected_deadline):
+        """根据截止日期筛选项计算日期范围 [开始日期, 结束日期)"""
+        today = datetime.now().date()
+        if selected_deadline == "今天":
+            return today, today + timedelta(days=1)
+        if selected_deadline == "明天":
+            return today + timedelta(days=1), today + timedelta(days=2)
+
+        # 本周开始和结束（周一到周日）
+        week_start = today - timedelta(days=today.weekday())
+        if selected_deadline == "本周内":
+            return week_start, week_start + timedelta(days=7)
+        if selected_deadline == "下周内":
+            return week_start + timedelta(days=7), week_start + timedelta(days=14)
+
+        # 本月开始和结束
+        month_start = date(today.year, today.month, 1)
+        if today.month == 12:
+            month_end = date(today.year + 1, 1, 1)
+        else:
+            month_end = date(today.year, today.month + 1, 1)
+        return month_start, month_end
+
+    def get_filter_criteria(self):
+        """读取搜索和筛选控件，返回当前生效的筛选条件（未启用的条件不出现在结果中）"""
+        criteria = {}
+
         search_text = self.search_input.text().lower().strip()
+        if search_text:
+            criteria["search_text"] = search_text
+
         selected_category = self.category_filter.currentText()
+        if selected_category != "所有类别":
+            criteria["category"] = selected_category
+
         selected_tag = self.tag_filter.currentText()
+        if selected_tag != "所有标签":
+            criteria["tag"] = selected_tag  # "无标签"表示只保留没有标签的任务
+
         selected_importance = self.importance_filter.currentText()
+        if selected_importance != "所有重要度":
+            criteria["importance"] = int(selected_importance.split("星")[0])
+
         selected_urgency = self.urgency_filter.currentText()
+        if selected_urgency != "所有紧急度":
+            criteria["urgency"] = int(selected_urgency.split("-")[0])
+
         selected_deadline = self.deadline_filter.currentText()
+        if selected_deadline == "无截止日期":
+            criteria["no_deadline"] = True
+        elif selected_deadline != "所有截止日期":
+            criteria["deadline_range"] = self.get_deadline_range(selected_deadline)
+
+        return criteria
+
+    def get_filtered_tasks(self, task_type, criteria=None):
+        """获取按当前搜索和筛选条件过滤并排序后的任务列表，已完成列表只取已加载的页"""
+        if criteria is None:
+            criteria = self.get_filter_criteria()
+        if task_type == "done":
+            return self.get_done_page(criteria)[0]
+        if not criteria:
+            return self.task_handler.get_sorted_tasks(task_type)
+        # 由内存中的筛选索引完成，与尚未写入磁盘的修改保持一致
+        return self.task_handler.filter_tasks(task_type, criteria)
+
+    def get_done_page(self, criteria):
+        """已完成列表已加载的页：前 done_rows_shown 个任务，内存中的任务之后接着显示归档任务
+
+        归档按月份从新到旧打开，只打开填满已加载的页所需的月份。
+        标题中的任务数不取出任务：内存中的部分由筛选索引计数，没有筛选条件时归档部分读取
+        archive/index.json；有筛选条件时只能统计已打开的月份，还有未打开的月份时数量以"+"结尾。
+
+        Returns:
+            tuple: (任务列表, 标题中显示的任务数, 是否还有未加载的任务)
+        """
+        handler = self.task_handler
+        limit = self.done_rows_shown
+        if not criteria:
+            tasks = handler.get_sorted_tasks("done", limit)
+        else:
+            tasks = handler.filter_tasks("done", criteria, limit)
+        count = handler.count_tasks("done", criteria)
+        months_left = 0
+
+        archive = handler.archive
+        if archive is not None:
+            months = archive.months()
+            # 归档和已完成列表之间崩溃时可能有重复，以已完成列表为准
+            hot_ids = handler.task_index
+            archived = []
+            opened = 0
+            while len(tasks) + len(archived) < limit and opened < len(months):
+                archived.extend(
+                    task for task in archive.filter_month(months[opened], criteria) if task["id"] not in hot_ids
+                )
+                opened += 1
+            tasks = tasks + archived[:limit - len(tasks)]
+            if criteria:
+                count += len(archived)
+                months_left = len(months) - opened
+            else:
+                count += archive.count()
+
+        has_more = len(tasks) < count or months_left > 0
+        return tasks, f"{count}+" if months_left else str(count), has_more
+
+    def load_more_done(self):
+        """在已完成列表末尾加载下一页"""
+        if self.done_has_more:
+            self.done_rows_shown += self.config["done_page_size"]
+            self.refresh_list("done")
+
+    def handle_done_list_scrolled(self, value):
+        """已完成列表滚动到距底部不足一屏时自动加载下一页
+
+        刷新列表的过程中滚动条也会变化，加载放到事件循环中执行，避免在刷新中途再次刷新。
+        """
+        if not self.done_page_pending and self.done_list_near_end():
+            self.done_page_pending = True
+            QTimer.singleShot(0, self.load_next_done_page)
+
+    def done_list_near_end(self):
+        scroll_bar = self.done_list.list_widget.verticalScrollBar()
+        value = scroll_bar.value()
+        return value > 0 and value >= scroll_bar.maximum() - scroll_bar.pageStep()
+
+    def load_next_done_page(self):
+        self.done_page_pending = False
+        if self.done_list_near_end():
+            self.load_more_done()
         
-        filtered_tasks = []
-        
-        for task in tasks:
-            # 关键词搜索
-            if search_text and search_text not in task["name"].lower():
-                continue
-                
-            # 类别筛选
-            if selected_category != "所有类别" and task.get("category", "") != selected_category:
-                continue
-                
-            # 标签筛选
-            if selected_tag != "所有标签":
-                task_tags = task.get("tags", [])
-                if selected_tag == "无标签" and task_tags:
-                    continue
-                elif selected_tag != "无标签" and selected_tag not in task_tags:
-                    continue
-                    
-            # 重要等级筛选
-            if selected_importance != "所有重要度":
-                importance_level = int(selected_importance.split("星")[0])
-                if task["importance"] != importance_level:
-                    continue
-                    
-            # 紧急度筛选
-            if selected_urgency != "所有紧急度":
-                urgency_level = int(selected_urgency.split("-")[0])
-                if task["urgency"] != urgency_level:
-                    continue
-                    
-            # 截止日期筛选
-            if selected_deadline != "所有截止日期":
-                task_deadline = task.get("deadline", "无截止日期")
-                
-                if selected_deadline == "无截止日期":
-                    if task_deadline != "无截止日期":
-                        continue
-                else:
-                    if task_deadline == "无截止日期":
-                        continue
-                    
-                    # 解析截止日期
-                    try:
-                        # 尝试解析包含时间的格式
-                        try:
-                            deadline_datetime = datetime.strptime(task_deadline, "%Y-%m-%d %H:%M")
-                        except ValueError:
-                            # 回退到旧格式（仅日期）
-                            deadline_datetime = datetime.strptime(task_deadline, "%Y-%m-%d")
-                        
-                        now = datetime.now()
-                        today = now.date()
-                        tomorrow = today + timedelta(days=1)
-                        
-                        # 本周开始和结束（周一到周日）
-                        days_since_monday = today.weekday()
-                        week_start = today - timedelta(days=days_since_monday)
-                        week_end = week_start + timedelta(days=7)
-                        
-                        # 下周开始和结束
-                        next_week_start = week_start + timedelta(days=7)
-                        next_week_end = next_week_start + timedelta(days=7)
-                        
-                        # 本月开始和结束
-                        month_start = date(today.year, today.month, 1)
-                        if today.month == 12:
-                            month_end = date(today.year + 1, 1, 1)
-                        else:
-                            month_end = date(today.year, today.month + 1, 1)
-                        
-                        # 检查截止日期是否符合条件
-                        deadline_date = deadline_datetime.date()
-                        
-                        if selected_deadline == "今天" and deadline_date != today:
-                            continue
-                        elif selected_deadline == "明天" and deadline_date != tomorrow:
-                            continue
-                        elif selected_deadline == "本周内" and not (week_start <= deadline_date < week_end):
-                            continue
-                        elif selected_deadline == "下周内" and not (next_week_start <= deadline_date < next_week_end):
-                            continue
-                        elif selected_deadline == "本月内" and not (month_start <= deadline_date < month_end):
-                            continue
-                    except Exception:
-                        # 日期格式错误，跳过该任务
-                        continue
-                        
-            # 通过所有筛选条件
-            filtered_tasks.append(task)
-            
-        return filtered_tasks
-        
+    @timed("ui.refresh_list")
     def refresh_list(self, task_type):
+        """按当前筛选条件刷新列表，只增删和移动有变化的行"""
         list_widget = getattr(self, f"{task_type}_list")
-        
-        # 保存当前滚动位置和选中状态
-        scroll_pos = 0
-        selected_index = -1
-        if hasattr(list_widget, 'save_scroll_position'):
-            scroll_pos = list_widget.save_scroll_position()
-        if hasattr(list_widget, 'save_selection'):
-            selected_index = list_widget.save_selection()
-        
-        # 关键修复：在清空列表前，确保清除所有选择状态，防止跨列表选择混淆
-        # 这是因为在更新一个列表时，由于某些事件传递机制，选择状态可能错误地传播到其他列表
-        if hasattr(list_widget, 'list_widget') and list_widget.list_widget and hasattr(list_widget.list_widget, 'selectionModel'):
-            selection_model = list_widget.list_widget.selectionModel()
-            if selection_model:
-                selection_model.clearSelection()
-                list_widget.list_widget.viewport().update()
-                
-        list_widget.clear_list()
-
-        # 获取排序后的任务列表
-        all_tasks = self.task_handler.get_sorted_tasks(task_type)
-        
-        # 应用搜索和筛选
-        filtered_tasks = self.filter_tasks(all_tasks)
-        task_count = len(filtered_tasks)
+
+        # 获取排序并筛选后的任务列表，已完成列表只取已加载的页
+        if task_type == "done":
+            filtered_tasks, task_count, self.done_has_more = self.get_done_page(self.get_filter_criteria())
+        else:
+            filtered_tasks = self.get_filtered_tasks(task_type)
+            task_count = len(filtered_tasks)
 
         # 存储过滤后的任务到UI小部件中
         if not hasattr(self, 'filtered_tasks_cache'):
@@ -856,41 +936,32 @@ class MainWindow(QMainWindow):
         group_widget = getattr(self, f"{task_type}_group")
         group_widget.setTitle(f"{group_widget.title().split('(')[0]}({task_count})")
 
-        for index, task in enumerate(filtered_tasks, 1):
-            list_widget.add_task_item(
-                self.format_task_text(task),
-                index=index,
-                urgency=task["urgency"],
-                is_overdue=(task_type == "overdue"),
-                is_done=(task_type == "done"),
-                create_time=task.get('create_time', None),
-                deadline=task.get('deadline', None),
-                task_data=task  # 传递完整的任务数据引用
-            )
-            
-        # 恢复滚动位置和选中状态
-        if hasattr(list_widget, 'restore_scroll_position'):
-            # 延迟恢复滚动位置和选中状态，确保列表项完全渲染后再恢复
-            QTimer.singleShot(10, lambda: self._restore_list_state(list_widget, scroll_pos, selected_index))
-            
-    def _restore_list_state(self, list_widget, scroll_pos, selected_index):
-        """恢复列表的滚动位置和选中状态，确保选择状态隔离"""
-        # 先恢复滚动位置
-        if hasattr(list_widget, 'restore_scroll_position'):
-            list_widget.restore_scroll_position(scroll_pos)
-        # 再恢复选中状态
-        if hasattr(list_widget, 'restore_selection'):
-            # 确保只在当前列表内恢复选中状态，不影响其他列表
-            list_widget.restore_selection(selected_index)
+        # 按任务ID与当前行对齐，选中项和滚动位置随未变化的行保留，无需延迟恢复
+        list_widget.sync_tasks(filtered_tasks, self.format_task_text)
+        if task_type == "done":
+            list_widget.more_btn.setVisible(self.done_has_more)
 
     def refresh_all_lists(self):
         """刷新所有列表"""
-        self.task_handler.check_overdue_tasks()
+        with span("ui.refresh_all_lists"):
+            self.task_handler.check_overdue_tasks()
+            self.task_handler.archive_done_tasks()  # 每天最多执行一次
         
-        # 获取自动提升紧急度的任务列表
-        promoted_tasks = self.task_handler.auto_promote_urgency()
+            # 获取自动提升紧急度的任务列表
+            promoted_tasks = self.task_handler.auto_promote_urgency()
+        
+            self.notify_promoted_tasks(promoted_tasks)
         
-        # 显示提升紧急度的托盘通知
+            self.refresh_list("todo")
+            self.refresh_list("overdue")
+            self.refresh_list("done")
+
+            # 新增任务等操作可能带来更早的转换时间，重新设置转换定时器
+            if hasattr(self, "transition_timer"):
+                self.schedule_next_transition()
+
+    def notify_promoted_tasks(self, promoted_tasks):
+        """显示提升紧急度的托盘通知"""
         if promoted_tasks and len(promoted_tasks) > 0:
             if len(promoted_tasks) == 1:
                 task = promoted_tasks[0]
@@ -911,10 +982,6 @@ class MainWindow(QMainWindow):
                     task_details += f"... 还有{len(promoted_tasks)-3}个任务"
                 message = f"共有{len(promoted_tasks)}个任务紧急度已提升\n{task_details}"
                 self.show_system_tray_message("多个任务紧急度提升", message)
-        
-        self.refresh_list("todo")
-        self.refresh_list("overdue")
-        self.refresh_list("done")
 
     # 系统托盘相关方法
     def show_system_tray_message(self, title, message):
@@ -952,57 +1019,79 @@ class MainWindow(QMainWindow):
         self.show_system_tray_message("窗口已隐藏", "使用 Ctrl+Alt+T 呼出窗口")
 
     def init_timer(self):
-        """初始化定时器用于刷新倒计时显示"""
+        """初始化定时器
+
+        倒计时由一个每秒触发的共享定时器刷新，每次只重算视口中可见的行；
+        紧急度变化和超时由单次的转换定时器处理。
+        """
         self.timer = QTimer(self)
-        # 从配置中获取更新间隔（秒转换为毫秒）
-        interval_ms = self.config["update_interval"] * 1000
-        self.timer.setInterval(interval_ms)
-        print(f"定时器已初始化，间隔设置为{interval_ms}毫秒")
-        # 连接信号到刷新方法
+        self.timer.setInterval(COUNTDOWN_TICK_MS)
         self.timer.timeout.connect(self.refresh_time_display)
-        # 启动定时器
         self.timer.start()
-        print("定时器已启动")
+
+        # 紧急度变化和任务超时由单次定时器在最近的转换时刻触发，不再随刷新定时器轮询
+        self.transition_timer = QTimer(self)
+        self.transition_timer.setSingleShot(True)
+        self.transition_timer.timeout.connect(self.handle_task_transitions)
+        self.transition_deferrals = 0  # 当前转换已因鼠标操作推迟的次数
+        self.schedule_next_transition()
+
+    def init_search_index_build(self):
+        """在事件循环空闲时分批建立搜索索引，避免第一次搜索时集中建立造成卡顿"""
+        self.search_index_timer = QTimer(self)
+        self.search_index_timer.timeout.connect(self.build_search_index_batch)
+        self.search_index_timer.start(0)
+
+    def build_search_index_batch(self):
+        """建立一批搜索索引，全部完成后停止空闲定时器"""
+        if self.task_handler.build_search_index(SEARCH_INDEX_BATCH):
+            self.search_index_timer.stop()
+
+    def schedule_next_transition(self):
+        """按最近一次紧急度变化或任务超时的时间设置转换定时器"""
+        next_ts = self.task_handler.next_transition_time()
+        if next_ts is None:
+            self.transition_timer.stop()
+            return
+        # 最长等待一个更新间隔后重新计算，应对系统休眠或修改系统时间
+        delay_ms = int(max(0, next_ts - time.time()) * 1000) + 1
+        self.transition_timer.start(min(delay_ms, self.config["update_interval"] * 1000))
     
+    @timed("ui.countdown_tick")
     def refresh_time_display(self):
-        """刷新所有任务的时间显示和紧急度样式
+        """每秒刷新一次倒计时显示
+
+        超时检查和紧急度变化由 handle_task_transitions 在转换时刻处理，这里只更新倒计时文本。
+        窗口隐藏或最小化时不做任何处理，列表也只更新视口中可见的行。
+        """
+        if not self.isVisible() or self.isMinimized():
+            return
+        for task_type in ['todo', 'overdue']:
+            list_widget = getattr(self, f"{task_type}_list", None)
+            if list_widget and hasattr(list_widget, 'update_time_display'):
+                list_widget.update_time_display()
+
+    @timed("ui.task_transitions")
+    def handle_task_transitions(self):
+        """转换定时器到期：移动超时任务、更新紧急度，并安排下一次转换
         
         优化策略：
-        1. 只有在有新超时任务时才刷新整个列表
-        2. 无新超时任务时，只更新时间显示而不重新构建列表
-        3. 添加用户交互检测，避免在用户点击选择时干扰
+        1. 只有在有任务超时或紧急度变化时才刷新列表，选中状态按任务ID保留
+        2. 鼠标正在按下（点击或拖动）时推迟处理，最多推迟 TRANSITION_DEFER_LIMIT 次，避免打断操作
         """
-        print(f"[{time.strftime('%H:%M:%S')}] 定时器触发refresh_time_display方法")
+        logger.debug("转换定时器触发handle_task_transitions方法")
         
-        # 检查是否有用户交互正在进行
-        has_user_interaction = False
-        try:
-            # 检查鼠标是否按下或有键盘修饰键按下
-            mouse_buttons = QApplication.mouseButtons()
-            modifiers = QApplication.keyboardModifiers()
-            has_user_interaction = mouse_buttons != Qt.NoButton or modifiers != Qt.NoModifier
-            
-            # 检查任何任务列表是否有选中项正在变更
-            for task_type in ['todo', 'overdue', 'done']:
-                list_widget = getattr(self, f"{task_type}_list", None)
-                if list_widget and hasattr(list_widget, 'list_widget'):
-                    if list_widget.list_widget.hasFocus():
-                        has_user_interaction = True
-                        break
-        except Exception as e:
-            print(f"检查用户交互状态时出错: {e}")
-        
-        # 如果检测到用户交互，延迟刷新以避免干扰
-        if has_user_interaction:
-            print(f"[{time.strftime('%H:%M:%S')}] 检测到用户交互，延迟刷新")
-            # 延迟100毫秒后再次尝试刷新
-            QTimer.singleShot(100, self.refresh_time_display)
+        if (QApplication.mouseButtons() != Qt.NoButton
+                and self.transition_deferrals < TRANSITION_DEFER_LIMIT):
+            logger.debug("检测到鼠标操作，延迟处理任务转换")
+            self.transition_deferrals += 1
+            self.transition_timer.start(TRANSITION_DEFER_MS)
             return
+        self.transition_deferrals = 0
         
-        # 检查超时任务并移动
-        print(f"[{time.strftime('%H:%M:%S')}] 开始调用check_overdue_tasks")
+        # 检查超时任务并移动，处理到期的紧急度变化
         newly_overdue_tasks = self.task_handler.check_overdue_tasks()
-        print(f"[{time.strftime('%H:%M:%S')}] check_overdue_tasks调用完成")
+        promoted_tasks = self.task_handler.auto_promote_urgency()
         
         # 发送新超时任务的托盘通知
         need_refresh_lists = False
@@ -1023,46 +1112,36 @@ class MainWindow(QMainWindow):
                 message = f"共有{len(newly_overdue_tasks)}个任务已超时\n{task_details}"
                 self.show_system_tray_message("多个任务已超时", message)
         
-        # 只有在必要时（有新超时任务）才刷新整个列表
+        # 发送紧急度变化的托盘通知
+        if promoted_tasks:
+            need_refresh_lists = True
+            self.notify_promoted_tasks(promoted_tasks)
+        
+        # 只有在必要时（有任务超时或紧急度变化）才刷新整个列表
         if need_refresh_lists:
-            print(f"[{time.strftime('%H:%M:%S')}] 检测到新的超时任务，重新刷新任务列表显示")
-            # 保存所有列表的当前选择状态
-            selection_states = {}
-            for task_type in ['todo', 'overdue', 'done']:
-                list_widget = getattr(self, f"{task_type}_list", None)
-                if list_widget and hasattr(list_widget, 'save_selection'):
-                    selection_states[task_type] = list_widget.save_selection()
-            
-            # 重新刷新待办和超时列表
+            logger.debug("检测到任务状态变化，重新刷新任务列表显示")
+            # 增量刷新待办和超时列表，选择状态随行保留
             self.refresh_list("todo")
             self.refresh_list("overdue")
-            
-            # 恢复选择状态
-            QTimer.singleShot(50, lambda: self._restore_all_selection_states(selection_states))
-        else:
-            # 无新超时任务时，只更新任务的时间显示而不重新构建列表
-            print(f"[{time.strftime('%H:%M:%S')}] 无新超时任务，仅更新时间显示")
-            for task_type in ['todo', 'overdue']:
-                list_widget = getattr(self, f"{task_type}_list", None)
-                if list_widget and hasattr(list_widget, 'update_time_display'):
-                    list_widget.update_time_display()
-        
-        print(f"[{time.strftime('%H:%M:%S')}] refresh_time_display方法执行完成")
-    
-    def _restore_all_selection_states(self, selection_states):
-        """恢复所有任务列表的选择状态"""
-        for task_type, selected_index in selection_states.items():
-            list_widget = getattr(self, f"{task_type}_list", None)
-            if list_widget and hasattr(list_widget, 'restore_selection') and selected_index >= 0:
-                list_widget.restore_selection(selected_index)
+
+        self.schedule_next_transition()
     
     def exit_app(self):
         """退出应用"""
         self.timer.stop()  # 停止定时器
+        self.transition_timer.stop()
+        self.search_index_timer.stop()
+        # 整体保存一次，并等待后台写入线程把所有修改写入磁盘
         self.data_manager.save_tasks(self.task_handler.tasks)
+        self.data_manager.close()
         self.tray_icon.hide()  # 隐藏托盘图标
         qApp.quit()  # 退出应用
 
+    def show_core_error(self, error):
+        """提示核心模块的错误"""
+        title = "配置错误" if isinstance(error, ConfigError) else "错误"
+        QMessageBox.warning(self, title, str(error))
+
     def closeEvent(self, event):
         """窗口关闭事件（改为隐藏到托盘）"""
         event.ignore()  # 忽略关闭事件
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能界面组件
+显示各热点路径（加载、保存、超时检查、排序、筛选、列表刷新、图表绘制等）的耗时分位数和最近的慢帧，
+数据来自 core.perf 中的耗时记录
+"""
+
+import time
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QCheckBox, QPushButton,
+                             QGroupBox, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
+                             QFileDialog, QMessageBox)
+from PyQt5.QtCore import Qt, QTimer
+
+# 标签页显示时的刷新间隔（毫秒）
+PERFORMANCE_REFRESH_MS = 1000
+
+
+class PerformanceWidget(QWidget):
+    """
+    性能标签页
+    上方为各计时名称的次数和 p50/p95/最大耗时，下方为界面线程中最近超过一帧时间的操作
+    """
+    def __init__(self, profiler, parent=None):
+        super(PerformanceWidget, self).__init__(parent)
+        self.profiler = profiler
+        self.init_ui()
+
+        # 只在标签页显示时定时刷新
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(PERFORMANCE_REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def init_ui(self):
+        main_layout = QVBoxLayout(self)
+
+        # 控制栏
+        control_layout = QHBoxLayout()
+        self.enabled_check = QCheckBox("记录耗时")
+        self.enabled_check.setChecked(self.profiler.enabled)
+        self.enabled_check.toggled.connect(self.handle_enabled_toggled)
+        clear_btn = QPushButton("清空")
+        clear_btn.clicked.connect(self.handle_clear)
+        export_btn = QPushButton("导出 Chrome Trace")
+        export_btn.setToolTip("导出的文件可在 chrome://tracing 或 ui.perfetto.dev 中打开")
+        export_btn.clicked.connect(self.export_trace)
+        control_layout.addWidget(self.enabled_check)
+        control_layout.addWidget(clear_btn)
+        control_layout.addWidget(export_btn)
+        control_layout.addStretch()
+
+        # 耗时分位数
+        summary_group = QGroupBox("耗时统计（毫秒，按最近的记录计算）")
+        summary_layout = QVBoxLayout(summary_group)
+        self.summary_table = self.create_table(["名称", "次数", "样本数", "p50", "p95", "最大"])
+        summary_layout.addWidget(self.summary_table)
+
+        # 慢帧
+        slow_group = QGroupBox(f"最近的慢帧（界面线程中超过 {self.profiler.slow_frame_ms:.1f} 毫秒的操作）")
+        slow_layout = QVBoxLayout(slow_group)
+        self.slow_table = self.create_table(["时间", "名称", "耗时"])
+        slow_layout.addWidget(self.slow_table)
+
+        main_layout.addLayout(control_layout)
+        main_layout.addWidget(summary_group, 2)
+        main_layout.addWidget(slow_group, 1)
+
+    @staticmethod
+    def create_table(headers):
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        return table
+
+    @staticmethod
+    def fill_table(table, rows):
+        """用 rows（每行为字符串列表，数值列右对齐）填充表格"""
+        table.setRowCount(len(rows))
+        for row_index, row in enumerate(rows):
+            for column, text in enumerate(row):
+                item = QTableWidgetItem(text)
+                if column > 0 and text[:1].isdigit():
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                table.setItem(row_index, column, item)
+
+    def refresh(self):
+        """读取耗时记录并更新两个表格"""
+        self.fill_table(self.summary_table, [
+            [item["name"], str(item["count"]), str(item["samples"]),
+             f"{item['p50']:.2f}", f"{item['p95']:.2f}", f"{item['max']:.2f}"]
+            for item in self.profiler.summary()
+        ])
+        self.fill_table(self.slow_table, [
+            [time.strftime("%H:%M:%S", time.localtime(wall_time)), name, f"{duration:.1f}"]
+            for wall_time, name, duration in self.profiler.recent_slow_frames()
+        ])
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_timer.stop()
+
+    def handle_enabled_toggled(self, checked):
+        self.profiler.enabled = checked
+
+    def handle_clear(self):
+        self.profiler.clear()
+        self.refresh()
+
+    def export_trace(self):
+        """导出耗时记录为 Chrome trace-event JSON 文件"""
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "导出 Chrome Trace", "trace.json", "JSON Files (*.json)"
+        )
+        if filename:
+            try:
+                self.profiler.dump_chrome_trace(filename)
+                QMessageBox.information(self, "成功", "耗时记录导出成功！")
+            except Exception as e:
+                QMessageBox.critical(self, "错误", f"耗时记录导出失败：{str(e)}")
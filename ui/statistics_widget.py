@@ -6,6 +6,7 @@
 """
 
 import csv
+import logging
 import os
 import datetime
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox,
@@ -14,129 +15,77 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBo
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QFont
 
-# 软导入matplotlib，防止应用崩溃
-try:
-    # 简化导入方式，先导入基本模块
-    import matplotlib
-    print(f"Matplotlib版本: {matplotlib.__version__}")
-    # 设置后端
-    matplotlib.use('Agg')  # 先使用非交互式后端
-    import matplotlib.pyplot as plt
-    # 然后再导入Qt相关组件
+from core.perf import span
+from core.statistics_manager import StatisticsManager
+
+logger = logging.getLogger(__name__)
+
+# matplotlib 导入耗时较长，推迟到第一次创建图表（第一次打开统计标签页）时才导入，
+# 不影响主窗口启动。导入失败时图表区域显示提示，统计数据和导出功能仍可使用。
+MATPLOTLIB_AVAILABLE = None  # None 表示尚未尝试导入
+Figure = None
+FigureCanvas = None
+
+
+def load_matplotlib():
+    """第一次调用时导入matplotlib（软导入，防止应用崩溃），返回是否可用"""
+    global MATPLOTLIB_AVAILABLE, Figure, FigureCanvas
+    if MATPLOTLIB_AVAILABLE is not None:
+        return MATPLOTLIB_AVAILABLE
     try:
-        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-        from matplotlib.figure import Figure
-        import matplotlib.dates as mdates
-        MATPLOTLIB_AVAILABLE = True
-        print("Matplotlib和Qt5后端成功导入")
-    except ImportError:
-        print("警告: Qt5后端不可用，尝试使用基本功能")
-        # 即使Qt5后端不可用，也使用基本的Figure
+        import matplotlib
+        logger.debug("Matplotlib版本: %s", matplotlib.__version__)
+        # 设置后端
+        matplotlib.use('Agg')  # 先使用非交互式后端
         from matplotlib.figure import Figure
-        FigureCanvas = None  # 标记为None
-        import matplotlib.dates as mdates
+        # 设置中文字体（只用到 rcParams，不需要导入 pyplot）
+        matplotlib.rcParams['font.sans-serif'] = ['SimHei']  # 用来正常显示中文标签
+        matplotlib.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
+        # 然后再导入Qt相关组件
+        try:
+            from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+            logger.debug("Matplotlib和Qt5后端成功导入")
+        except ImportError:
+            logger.warning("Qt5后端不可用，只使用Matplotlib基本功能")
+            FigureCanvas = None  # 标记为None
         MATPLOTLIB_AVAILABLE = True
-        print("Matplotlib基本功能可用")
-except ImportError as e:
-    print(f"错误: matplotlib导入失败 - {str(e)}")
-    MATPLOTLIB_AVAILABLE = False
-    # 创建模拟类以防止崩溃
-    class MockCanvas(QWidget):
-        def __init__(self, parent=None, width=5, height=4, dpi=100):
-            super().__init__(parent)
-            self.fig = None
-            self.axes = None
-            layout = QVBoxLayout(self)
-            layout.addWidget(QLabel("Matplotlib not available"))
-        
-        def draw(self):
-            pass
-    
-    class MockFigure:
-        def __init__(self, **kwargs):
-            self.axes = []
-        
-        def add_subplot(self, *args):
-            class MockAxes:
-                def clear(self): pass
-                def plot(self, *args, **kwargs): pass
-                def set_title(self, *args): pass
-                def set_xlabel(self, *args): pass
-                def set_ylabel(self, *args): pass
-                def tick_params(self, *args, **kwargs): pass
-                def grid(self, *args, **kwargs): pass
-                def pie(self, *args, **kwargs): pass
-                def axis(self, *args): pass
-                def bar(self, *args, **kwargs): pass
-            
-            mock_axes = MockAxes()
-            self.axes.append(mock_axes)
-            return mock_axes
-        
-        def tight_layout(self):
-            pass
-        
-        def savefig(self, *args, **kwargs):
-            pass
-    
-    class MockDates:
-        pass
-    
-    FigureCanvas = MockCanvas
-    Figure = MockFigure
-    mdates = MockDates()
-    plt = None
-except Exception as e:
-    print(f"错误: matplotlib初始化失败 - {str(e)}")
-    MATPLOTLIB_AVAILABLE = False
-    # 创建模拟类以防止崩溃
-    class MockCanvas(QWidget):
-        def __init__(self, parent=None, width=5, height=4, dpi=100):
-            super().__init__(parent)
-            self.fig = None
-            self.axes = None
-            layout = QVBoxLayout(self)
-            layout.addWidget(QLabel("Matplotlib not available"))
-        
-        def draw(self):
-            pass
-    
-    class MockFigure:
-        def __init__(self, **kwargs):
-            self.axes = []
-        
-        def add_subplot(self, *args):
-            class MockAxes:
-                def clear(self): pass
-                def plot(self, *args, **kwargs): pass
-                def set_title(self, *args): pass
-                def set_xlabel(self, *args): pass
-                def set_ylabel(self, *args): pass
-                def tick_params(self, *args, **kwargs): pass
-                def grid(self, *args, **kwargs): pass
-                def pie(self, *args, **kwargs): pass
-                def axis(self, *args): pass
-                def bar(self, *args, **kwargs): pass
-            
-            mock_axes = MockAxes()
-            self.axes.append(mock_axes)
-            return mock_axes
-        
-        def tight_layout(self):
-            pass
-        
-        def savefig(self, *args, **kwargs):
-            pass
-    
-    class MockDates:
-        pass
-    
-    FigureCanvas = MockCanvas
-    Figure = MockFigure
-    mdates = MockDates()
-    plt = None
+    except ImportError as e:
+        logger.error("matplotlib导入失败 - %s", e)
+        MATPLOTLIB_AVAILABLE = False
+    except Exception as e:
+        logger.error("matplotlib初始化失败 - %s", e)
+        MATPLOTLIB_AVAILABLE = False
+    return MATPLOTLIB_AVAILABLE
 
-from core.statistics_manager import StatisticsManager
+PERIOD_MAP = {"每日": "daily", "每周": "weekly", "每月": "monthly"}
+
+
+def write_csv(filename, header, rows):
+    """写入CSV文件（utf-8-sig，Excel可直接打开中文）"""
+    with open(filename, 'w', newline='', encoding='utf-8-sig') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def summary_rows(days, total_count, rate_result, average_result):
+    """完成率和平均完成时间统计的CSV行"""
+    _, on_time_count, completion_rate = rate_result
+    count, avg_hours, avg_minutes = average_result
+    return [
+        ["统计天数", days],
+        [],  # 空行
+        ["任务按时完成率统计", ""],
+        ["总任务数", total_count],
+        ["按时完成任务数", on_time_count],
+        ["按时完成率", f"{completion_rate:.2f}%"],
+        [],  # 空行
+        ["平均完成任务时间统计", ""],
+        ["统计任务数", count],
+        ["平均小时数", avg_hours],
+        ["平均分钟数", avg_minutes],
+        ["平均总时间", f"{avg_hours}小时{avg_minutes}分钟"],
+    ]
 
 
 class MatplotlibCanvas(QWidget):
@@ -147,15 +96,11 @@ class MatplotlibCanvas(QWidget):
     def __init__(self, parent=None, width=5, height=4, dpi=100):
         super(MatplotlibCanvas, self).__init__(parent)
         
-        if MATPLOTLIB_AVAILABLE:
+        if load_matplotlib():
             try:
                 self.fig = Figure(figsize=(width, height), dpi=dpi)
                 self.axes = self.fig.add_subplot(111)
-                
-                # 设置中文字体
-                plt.rcParams['font.sans-serif'] = ['SimHei']  # 用来正常显示中文标签
-                plt.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
-                
+
                 # 如果FigureCanvas可用，创建画布
                 if FigureCanvas is not None:
                     self.canvas = FigureCanvas(self.fig)
@@ -166,11 +111,11 @@ class MatplotlibCanvas(QWidget):
                     # Qt5后端不可用时，显示提示
                     layout = QVBoxLayout(self)
                     layout.addWidget(QLabel("Matplotlib图表功能受限(缺少Qt5后端)"))
-                    print("警告: 缺少Qt5后端，图表显示功能受限")
+                    logger.warning("缺少Qt5后端，图表显示功能受限")
                 
                 self.fig.tight_layout()
             except Exception as e:
-                print(f"错误: 创建图表画布失败 - {str(e)}")
+                logger.error("创建图表画布失败 - %s", e)
                 self.axes = None
                 self.fig = None
                 layout = QVBoxLayout(self)
@@ -190,7 +135,7 @@ class MatplotlibCanvas(QWidget):
             try:
                 self.canvas.draw()
             except Exception as e:
-                print(f"错误: 绘制图表失败 - {str(e)}")
+                logger.error("绘制图表失败 - %s", e)
     
     def clear(self):
         """清空画布"""
@@ -198,7 +143,7 @@ class MatplotlibCanvas(QWidget):
             try:
                 self.axes.clear()
             except Exception as e:
-                print(f"错误: 清空图表失败 - {str(e)}")
+                logger.error("清空图表失败 - %s", e)
 
 
 class TrendChartWidget(QWidget):
@@ -208,7 +153,13 @@ class TrendChartWidget(QWidget):
     def __init__(self, statistics_manager, parent=None):
         super(TrendChartWidget, self).__init__(parent)
         self.statistics_manager = statistics_manager
+        self.labels, self.values = [], []  # 当前显示的趋势数据，导出数据时直接使用
         self.init_ui()
+
+    def metric(self):
+        """当前选择对应的统计指标"""
+        period = PERIOD_MAP.get(self.period_combo.currentText(), "daily")
+        return ('trend', period, self.days_spin.value())
     
     def init_ui(self):
         # 创建主布局
@@ -275,16 +226,8 @@ class TrendChartWidget(QWidget):
     
     def export_data(self):
         """
-        导出趋势数据为CSV文件
+        导出趋势数据为CSV文件（即当前图表显示的数据）
         """
-        # 获取当前统计数据
-        period_text = self.period_combo.currentText()
-        period_map = {"每日": "daily", "每周": "weekly", "每月": "monthly"}
-        period = period_map.get(period_text, "daily")
-        days = self.days_spin.value()
-        
-        labels, values = self.statistics_manager.get_completion_trend(period, days)
-        
         # 打开文件对话框
         filename, _ = QFileDialog.getSaveFileName(
             self, "导出数据", "", "CSV Files (*.csv);;Text Files (*.txt)"
@@ -292,55 +235,45 @@ class TrendChartWidget(QWidget):
         
         if filename:
             try:
-                # 写入CSV文件
-                with open(filename, 'w', newline='', encoding='utf-8-sig') as file:
-                    writer = csv.writer(file)
-                    # 写入表头
-                    writer.writerow(["时间", "完成任务数量"])
-                    # 写入数据
-                    for label, value in zip(labels, values):
-                        writer.writerow([label, value])
+                write_csv(filename, ["时间", "完成任务数量"], zip(self.labels, self.values))
                 
                 QMessageBox.information(self, "成功", "数据导出成功！")
             except Exception as e:
                 QMessageBox.critical(self, "错误", f"数据导出失败：{str(e)}")
     
     def update_chart(self):
-        # 清空图表
-        self.canvas.clear()
-        
-        # 检查matplotlib可用性
-        if not MATPLOTLIB_AVAILABLE:
-            return
-            
-        # 获取统计周期和天数
-        period_text = self.period_combo.currentText()
-        period_map = {"每日": "daily", "每周": "weekly", "每月": "monthly"}
-        period = period_map.get(period_text, "daily")
-        days = self.days_spin.value()
-        
-        # 获取趋势数据
-        labels, values = self.statistics_manager.get_completion_trend(period, days)
-        
-        # 绘制折线图
-        self.canvas.axes.plot(labels, values, marker='o', linestyle='-', linewidth=2, markersize=5)
-        
-        # 设置图表标题和标签
-        title_map = {"daily": "每日", "weekly": "每周", "monthly": "每月"}
-        self.canvas.axes.set_title(f"{title_map.get(period, '每日')}完成任务数量趋势")
-        self.canvas.axes.set_xlabel("时间")
-        self.canvas.axes.set_ylabel("完成任务数量")
-        
-        # 设置x轴标签角度
-        if len(labels) > 7:
-            self.canvas.axes.tick_params(axis='x', rotation=45)
-        
-        # 添加网格
-        self.canvas.axes.grid(True, linestyle='--', alpha=0.7)
-        
-        # 重新绘制图表
-        self.canvas.fig.tight_layout()
-        self.canvas.draw()
+        with span("ui.chart.trend"):
+            # 获取趋势数据
+            metric = self.metric()
+            period = metric[1]
+            labels, values = self.labels, self.values = self.statistics_manager.query([metric])[metric]
+        
+            # 清空图表
+            self.canvas.clear()
+        
+            # 检查matplotlib可用性
+            if not MATPLOTLIB_AVAILABLE:
+                return
+        
+            # 绘制折线图
+            self.canvas.axes.plot(labels, values, marker='o', linestyle='-', linewidth=2, markersize=5)
+        
+            # 设置图表标题和标签
+            title_map = {"daily": "每日", "weekly": "每周", "monthly": "每月"}
+            self.canvas.axes.set_title(f"{title_map.get(period, '每日')}完成任务数量趋势")
+            self.canvas.axes.set_xlabel("时间")
+            self.canvas.axes.set_ylabel("完成任务数量")
+        
+            # 设置x轴标签角度
+            if len(labels) > 7:
+                self.canvas.axes.tick_params(axis='x', rotation=45)
+        
+            # 添加网格
+            self.canvas.axes.grid(True, linestyle='--', alpha=0.7)
+        
+            # 重新绘制图表
+            self.canvas.fig.tight_layout()
+            self.canvas.draw()
 
 
 class DistributionChartWidget(QWidget):
@@ -350,6 +283,7 @@ class DistributionChartWidget(QWidget):
     def __init__(self, statistics_manager, parent=None):
         super(DistributionChartWidget, self).__init__(parent)
         self.statistics_manager = statistics_manager
+        self.labels, self.values = [], []  # 当前显示的分布数据，导出数据时直接使用
         self.init_ui()
     
     def init_ui(self):
@@ -415,17 +349,9 @@ class DistributionChartWidget(QWidget):
     
     def export_data(self):
         """
-        导出分布数据为CSV文件
+        导出分布数据为CSV文件（即当前图表显示的数据，不限制显示数量）
         """
-        # 获取当前统计数据
-        dist_type = self.type_combo.currentText()
-        
-        if dist_type == "类别分布":
-            labels, values = self.statistics_manager.get_category_distribution()
-            header = ["类别", "任务数量"]
-        else:
-            labels, values = self.statistics_manager.get_label_distribution()
-            header = ["标签", "任务数量"]
+        header = ["类别", "任务数量"] if self.type_combo.currentText() == "类别分布" else ["标签", "任务数量"]
         
         # 打开文件对话框
         filename, _ = QFileDialog.getSaveFileName(
@@ -434,63 +360,54 @@ class DistributionChartWidget(QWidget):
         
         if filename:
             try:
-                # 写入CSV文件
-                with open(filename, 'w', newline='', encoding='utf-8-sig') as file:
-                    writer = csv.writer(file)
-                    # 写入表头
-                    writer.writerow(header)
-                    # 写入数据
-                    for label, value in zip(labels, values):
-                        writer.writerow([label, value])
+                write_csv(filename, header, zip(self.labels, self.values))
                 
                 QMessageBox.information(self, "成功", "数据导出成功！")
             except Exception as e:
                 QMessageBox.critical(self, "错误", f"数据导出失败：{str(e)}")
     
     def update_chart(self):
-        # 清空图表
-        self.canvas.clear()
-        
-        # 检查matplotlib可用性
-        if not MATPLOTLIB_AVAILABLE:
-            return
-            
-        # 获取分布类型和图表类型
-        dist_type = self.type_combo.currentText()
-        chart_type = self.chart_combo.currentText()
-        
-        # 获取分布数据
-        if dist_type == "类别分布":
-            labels, values = self.statistics_manager.get_category_distribution()
-            title = "任务类别分布"
-        else:
-            labels, values = self.statistics_manager.get_label_distribution()
-            title = "任务标签分布"
-        
-        # 限制显示数量，避免图表过于拥挤
-        max_display = 10
-        if len(labels) > max_display:
-            labels = labels[:max_display]
-            values = values[:max_display]
-        
-        # 绘制图表
-        if chart_type == "饼图":
-            # 绘制饼图
-            self.canvas.axes.pie(values, labels=labels, autopct='%1.1f%%', startangle=90)
-            self.canvas.axes.axis('equal')  # 保持饼图为正圆形
-        else:
-            # 绘制条形图
-            self.canvas.axes.bar(labels, values)
-            self.canvas.axes.set_xlabel("类别" if dist_type == "类别分布" else "标签")
-            self.canvas.axes.set_ylabel("任务数量")
-            self.canvas.axes.tick_params(axis='x', rotation=45)
-        
-        # 设置图表标题
-        self.canvas.axes.set_title(title)
-        
-        # 重新绘制图表
-        self.canvas.fig.tight_layout()
-        self.canvas.draw()
+        with span("ui.chart.distribution"):
+            # 获取分布类型和图表类型
+            dist_type = self.type_combo.currentText()
+            chart_type = self.chart_combo.currentText()
+        
+            # 获取分布数据
+            metric = ('category', None) if dist_type == "类别分布" else ('labels', None)
+            title = "任务类别分布" if dist_type == "类别分布" else "任务标签分布"
+            labels, values = self.labels, self.values = self.statistics_manager.query([metric])[metric]
+        
+            # 清空图表
+            self.canvas.clear()
+        
+            # 检查matplotlib可用性
+            if not MATPLOTLIB_AVAILABLE:
+                return
+        
+            # 限制显示数量，避免图表过于拥挤
+            max_display = 10
+            if len(labels) > max_display:
+                labels = labels[:max_display]
+                values = values[:max_display]
+        
+            # 绘制图表
+            if chart_type == "饼图":
+                # 绘制饼图
+                self.canvas.axes.pie(values, labels=labels, autopct='%1.1f%%', startangle=90)
+                self.canvas.axes.axis('equal')  # 保持饼图为正圆形
+            else:
+                # 绘制条形图
+                self.canvas.axes.bar(labels, values)
+                self.canvas.axes.set_xlabel("类别" if dist_type == "类别分布" else "标签")
+                self.canvas.axes.set_ylabel("任务数量")
+                self.canvas.axes.tick_params(axis='x', rotation=45)
+        
+            # 设置图表标题
+            self.canvas.axes.set_title(title)
+        
+            # 重新绘制图表
+            self.canvas.fig.tight_layout()
+            self.canvas.draw()
 
 
 class StatisticsCardWidget(QWidget):
@@ -502,7 +419,13 @@ class StatisticsCardWidget(QWidget):
         super(StatisticsCardWidget, self).__init__(parent)
         self.statistics_manager = statistics_manager
         self.file_path = None
+        self.days = None
+        self.results = {}  # 当前显示的统计结果，导出数据时直接使用
         self.init_ui()
+
+    def metrics(self, days):
+        """卡片需要的统计指标"""
+        return [('total',), ('rate', days), ('avg_time', days)]
     
     def init_ui(self):
         # 创建主布局
@@ -584,20 +507,8 @@ class StatisticsCardWidget(QWidget):
     
     def export_stats(self):
         """
-        导出统计卡片数据为CSV文件
+        导出统计卡片数据为CSV文件（即当前卡片显示的数据）
         """
-        # 获取统计天数
-        days = self.days_spin.value()
-        
-        # 获取真正的总任务数（所有任务）
-        actual_total_count = self.statistics_manager.get_total_tasks_count()
-        
-        # 获取完成率数据
-        _, on_time_count, completion_rate = self.statistics_manager.get_completion_rate(days)
-        
-        # 获取平均完成时间数据
-        count, avg_hours, avg_minutes = self.statistics_manager.get_average_completion_time(days)
-        
         # 打开文件对话框
         filename, _ = QFileDialog.getSaveFileName(
             self, "导出统计数据", "", "CSV Files (*.csv);;Text Files (*.txt)"
@@ -608,58 +519,45 @@ class StatisticsCardWidget(QWidget):
         
         if filename:
             try:
-                # 写入CSV文件
-                with open(filename, 'w', newline='', encoding='utf-8-sig') as file:
-                    writer = csv.writer(file)
-                    # 写入表头
-                    writer.writerow(["统计项目", "数值"])
-                    # 写入完成率数据
-                    writer.writerow(["统计天数", days])
-                    writer.writerow([])  # 空行
-                    writer.writerow(["任务按时完成率统计", ""])
-                    writer.writerow(["总任务数", actual_total_count])
-                    writer.writerow(["按时完成任务数", on_time_count])
-                    writer.writerow(["按时完成率", f"{completion_rate:.2f}%"])
-                    # 写入平均完成时间数据
-                    writer.writerow([])  # 空行
-                    writer.writerow(["平均完成任务时间统计", ""])
-                    writer.writerow(["统计任务数", count])
-                    writer.writerow(["平均小时数", avg_hours])
-                    writer.writerow(["平均分钟数", avg_minutes])
-                    writer.writerow(["平均总时间", f"{avg_hours}小时{avg_minutes}分钟"])
+                days, results = self.days, self.results
+                # 总任务数为所有任务的数量
+                rows = summary_rows(days, results[('total',)], results[('rate', days)], results[('avg_time', days)])
+                write_csv(filename, ["统计项目", "数值"], rows)
                 
                 QMessageBox.information(self, "成功", "统计数据导出成功！")
             except Exception as e:
                 QMessageBox.critical(self, "错误", f"统计数据导出失败：{str(e)}")
     
     def update_stats(self):
-        # 确保在matplotlib不可用时也能正常工作
-        if not MATPLOTLIB_AVAILABLE:
-            # 即使matplotlib不可用，统计数据也应继续显示
-            pass
-        else:
-            # 清空画布以防在某些情况下需要更新
-            if hasattr(self, 'canvas') and self.canvas is not None:
-                self.canvas.clear()
+        with span("ui.stats_cards"):
+            # 确保在matplotlib不可用时也能正常工作
+            if not MATPLOTLIB_AVAILABLE:
+                # 即使matplotlib不可用，统计数据也应继续显示
+                pass
+            else:
+                # 清空画布以防在某些情况下需要更新
+                if hasattr(self, 'canvas') and self.canvas is not None:
+                    self.canvas.clear()
             
-        # 获取统计天数
-        days = self.days_spin.value()
-        
-        # 获取真正的总任务数（所有任务）
-        actual_total_count = self.statistics_manager.get_total_tasks_count()
-        
-        # 更新完成率数据
-        _, on_time_count, completion_rate = self.statistics_manager.get_completion_rate(days)
-        self.total_tasks_label.setText(str(actual_total_count))
-        self.on_time_tasks_label.setText(str(on_time_count))
-        self.rate_label.setText(f"{completion_rate:.2f}%")
-        
-        # 更新平均完成时间数据
-        count, avg_hours, avg_minutes = self.statistics_manager.get_average_completion_time(days)
-        self.count_label.setText(str(count))
-        self.avg_hours_label.setText(str(avg_hours))
-        self.avg_minutes_label.setText(str(avg_minutes))
-        self.total_avg_label.setText(f"{avg_hours}小时{avg_minutes}分钟")
+            # 获取统计天数
+            days = self.days_spin.value()
+        
+            # 一次查询得到卡片的全部统计数据
+            self.days = days
+            self.results = results = self.statistics_manager.query(self.metrics(days))
+        
+            # 更新完成率数据（总任务数为所有任务的数量）
+            _, on_time_count, completion_rate = results[('rate', days)]
+            self.total_tasks_label.setText(str(results[('total',)]))
+            self.on_time_tasks_label.setText(str(on_time_count))
+            self.rate_label.setText(f"{completion_rate:.2f}%")
+        
+            # 更新平均完成时间数据
+            count, avg_hours, avg_minutes = results[('avg_time', days)]
+            self.count_label.setText(str(count))
+            self.avg_hours_label.setText(str(avg_hours))
+            self.avg_minutes_label.setText(str(avg_minutes))
+            self.total_avg_label.setText(f"{avg_hours}小时{avg_minutes}分钟")
 
 
 class StatisticsWidget(QWidget):
@@ -730,67 +628,34 @@ class StatisticsWidget(QWidget):
         if folder:
             try:
                 # 即使matplotlib不可用，数据导出功能也应继续工作
-                if not MATPLOTLIB_AVAILABLE:
+                if not load_matplotlib():
                     QMessageBox.information(self, "提示", "Matplotlib不可用，但数据导出功能仍可正常使用。")
                 
-                # 导出任务趋势数据（每日、每周、每月）
-                periods = [("每日", "daily"), ("每周", "weekly"), ("每月", "monthly")]
+                # 所有导出数据在一次查询中计算
+                days = 30
+                trend_metrics = [(period_name, ('trend', period, days)) for period_name, period in PERIOD_MAP.items()]
+                metrics = [metric for _, metric in trend_metrics]
+                metrics += [('category', None), ('labels', None), ('rate', days), ('avg_time', days)]
+                results = self.statistics_manager.query(metrics)
                 
-                for period_name, period in periods:
-                    labels, values = self.statistics_manager.get_completion_trend(period, 30)
+                # 导出任务趋势数据（每日、每周、每月）
+                for period_name, metric in trend_metrics:
+                    labels, values = results[metric]
                     filename = os.path.join(folder, f"任务趋势_{period_name}.csv")
-                    
-                    with open(filename, 'w', newline='', encoding='utf-8-sig') as file:
-                        writer = csv.writer(file)
-                        writer.writerow(["时间", "完成任务数量"])
-                        for label, value in zip(labels, values):
-                            writer.writerow([label, value])
+                    write_csv(filename, ["时间", "完成任务数量"], zip(labels, values))
                 
                 # 导出类别分布数据
-                categories, values = self.statistics_manager.get_category_distribution()
-                filename = os.path.join(folder, "任务类别分布.csv")
-                with open(filename, 'w', newline='', encoding='utf-8-sig') as file:
-                    writer = csv.writer(file)
-                    writer.writerow(["类别", "任务数量"])
-                    for category, value in zip(categories, values):
-                        writer.writerow([category, value])
+                categories, values = results[('category', None)]
+                write_csv(os.path.join(folder, "任务类别分布.csv"), ["类别", "任务数量"], zip(categories, values))
                 
                 # 导出标签分布数据
-                labels, values = self.statistics_manager.get_label_distribution()
-                filename = os.path.join(folder, "任务标签分布.csv")
-                with open(filename, 'w', newline='', encoding='utf-8-sig') as file:
-                    writer = csv.writer(file)
-                    writer.writerow(["标签", "任务数量"])
-                    for label, value in zip(labels, values):
-                        writer.writerow([label, value])
-                
-                # 导出完成率和平均完成时间数据
-                filename = os.path.join(folder, "任务完成率和平均时间统计.csv")
-                
-                # 获取完成率数据（30天）
-                total_count, on_time_count, completion_rate = self.statistics_manager.get_completion_rate(30)
-                
-                # 获取平均完成时间数据（30天）
-                count, avg_hours, avg_minutes = self.statistics_manager.get_average_completion_time(30)
+                labels, values = results[('labels', None)]
+                write_csv(os.path.join(folder, "任务标签分布.csv"), ["标签", "任务数量"], zip(labels, values))
                 
-                with open(filename, 'w', newline='', encoding='utf-8-sig') as file:
-                    writer = csv.writer(file)
-                    # 写入表头
-                    writer.writerow(["统计项目", "数值"])
-                    # 写入完成率数据
-                    writer.writerow(["统计天数", "30"])
-                    writer.writerow([])  # 空行
-                    writer.writerow(["任务按时完成率统计", ""])
-                    writer.writerow(["总任务数", total_count])
-                    writer.writerow(["按时完成任务数", on_time_count])
-                    writer.writerow(["按时完成率", f"{completion_rate:.2f}%"])
-                    # 写入平均完成时间数据
-                    writer.writerow([])  # 空行
-                    writer.writerow(["平均完成任务时间统计", ""])
-                    writer.writerow(["统计任务数", count])
-                    writer.writerow(["平均小时数", avg_hours])
-                    writer.writerow(["平均分钟数", avg_minutes])
-                    writer.writerow(["平均总时间", f"{avg_hours}小时{avg_minutes}分钟"])
+                # 导出完成率和平均完成时间数据（总任务数为统计天数内计入完成率的任务数）
+                rate_result = results[('rate', days)]
+                rows = summary_rows(days, rate_result[0], rate_result, results[('avg_time', days)])
+                write_csv(os.path.join(folder, "任务完成率和平均时间统计.csv"), ["统计项目", "数值"], rows)
                 
                 QMessageBox.information(self, "成功", f"所有统计数据已导出到文件夹：\n{folder}")
             except Exception as e:
@@ -0,0 +1,390 @@
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize, QVariant
+from PyQt5.QtGui import QFont, QFontMetrics, QColor
+from bisect import bisect_left
+from datetime import datetime
+
+from core.task_times import task_timestamp
+
+# 任务数据角色：data(index, TaskRole) 返回完整的任务字典
+TaskRole = Qt.UserRole + 1
+
+# 左侧色块和进度条填充颜色（与 TaskItemWidget 一致）
+URGENCY_COLORS = {
+    1: QColor(255, 90, 90),  # 最紧急-红色
+    2: QColor(255, 170, 70),  # 紧急-橙色
+    3: QColor(255, 210, 0),  # 中等-黄色
+    4: QColor(100, 200, 120),  # 较不紧急-绿色
+    5: QColor(80, 150, 255)  # 最不紧急-深蓝色
+}
+# 进度条背景颜色（紧急度对应的淡色）
+URGENCY_BG_COLORS = {
+    1: QColor("#ffe0e0"),
+    2: QColor("#fff0e0"),
+    3: QColor("#ffffe0"),
+    4: QColor("#e0ffe0"),
+    5: QColor("#e0f0ff")
+}
+OVERDUE_COLOR = QColor(255, 90, 90)
+DONE_COLOR = QColor(150, 150, 150)
+SELECTED_COLOR = QColor("#e6f2ff")
+CATEGORY_COLOR = QColor(100, 100, 200)
+TAG_COLOR = QColor(100, 180, 100)
+LATE_COLOR = QColor(220, 50, 50)
+SOON_COLOR = QColor(245, 120, 0)
+REMAINING_COLOR = QColor(0, 80, 150)
+
+
+def progress_percent(create_ts, deadline_ts, now_ts):
+    """根据创建时间和截止时间计算进度百分比（0-100）"""
+    total_time = deadline_ts - create_ts
+    if total_time <= 0:
+        return 0
+    elapsed_time = max(now_ts - create_ts, 0)
+    return int(min(elapsed_time / total_time * 100, 100))
+
+
+def task_progress(task, now_ts):
+    """计算任务的进度百分比，无截止日期或时间无法解析时为0"""
+    deadline = task.get("deadline")
+    if not deadline or deadline == "无截止日期":
+        return 0
+    create_ts = task_timestamp(task, "create_time")
+    deadline_ts = task_timestamp(task, "deadline")
+    if create_ts is None or deadline_ts is None:
+        return 0
+    if len(deadline) <= 10:
+        # 只有日期的截止时间按当天结束计算
+        deadline_ts += 24 * 3600 - 1
+    return progress_percent(create_ts, deadline_ts, now_ts)
+
+
+def task_key(task):
+    """列表行的键：任务ID（没有ID的任务使用对象标识）"""
+    return task.get("id") or id(task)
+
+
+def _stable_keys(keys, target_positions):
+    """求 keys 中按目标位置递增的最长子序列，这些行无需移动"""
+    tails = []  # tails[k]：长度为k+1的递增子序列的最小结尾位置
+    tail_indices = []
+    previous = [-1] * len(keys)
+    for i, key in enumerate(keys):
+        position = target_positions[key]
+        k = bisect_left(tails, position)
+        if k == len(tails):
+            tails.append(position)
+            tail_indices.append(i)
+        else:
+            tails[k] = position
+            tail_indices[k] = i
+        previous[i] = tail_indices[k - 1] if k > 0 else -1
+    stable = set()
+    i = tail_indices[-1] if tail_indices else -1
+    while i >= 0:
+        stable.add(keys[i])
+        i = previous[i]
+    return stable
+
+
+def reconcile_keys(old_keys, new_keys, max_ops=None):
+    """计算把行序列 old_keys 变为 new_keys 所需的最少行操作
+
+    返回按顺序执行的操作列表，行号均为执行该操作时的行号：
+        ("remove", first, last)：删除 [first, last] 行
+        ("move", source, destination)：把 source 行移到 destination 之前（与 beginMoveRows 的语义一致）
+        ("insert", row, key)：在 row 处插入新行
+    保留行中按新顺序递增的最长子序列保持不动，其余保留行各移动一次。
+    操作数超过 max_ops 时返回None，调用方应整体重建。
+    """
+    new_positions = {key: position for position, key in enumerate(new_keys)}
+    if len(new_positions) != len(new_keys):
+        return None  # 键重复时无法按键对齐
+
+    ops = []
+    # 1. 自下而上删除不再存在的行，连续的行合并为一次操作
+    row = len(old_keys) - 1
+    while row >= 0:
+        if old_keys[row] in new_positions:
+            row -= 1
+            continue
+        last = row
+        while row >= 0 and old_keys[row] not in new_positions:
+            row -= 1
+        ops.append(("remove", row + 1, last))
+    current = [key for key in old_keys if key in new_positions]
+
+    # 2. 其余行依次放到新顺序中前一个键的后面
+    stable = _stable_keys(current, new_positions)
+    if max_ops is not None and len(ops) + len(new_keys) - len(stable) > max_ops:
+        return None
+    existing = set(current)
+    for position, key in enumerate(new_keys):
+        if key in stable:
+            continue
+        target = current.index(new_keys[position - 1]) + 1 if position > 0 else 0
+        if key in existing:
+            source = current.index(key)
+            if source == target or source + 1 == target:
+                continue  # 已在正确位置
+            ops.append(("move", source, target))
+            current.insert(target if target < source else target - 1, current.pop(source))
+        else:
+            ops.append(("insert", target, key))
+            current.insert(target, key)
+            existing.add(key)
+    return ops
+
+
+class TaskListModel(QAbstractListModel):
+    """任务列表模型
+
+    只保存任务字典的引用，不为每一行创建控件；显示内容由 TaskItemDelegate 在绘制时计算，
+    因此只有可见的行才有开销。
+    """
+    def __init__(self, task_type, parent=None):
+        super().__init__(parent)
+        self.task_type = task_type
+        self.tasks = []
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.tasks)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self.tasks):
+            return QVariant()
+        task = self.tasks[index.row()]
+        if role == TaskRole:
+            return task
+        if role == Qt.DisplayRole:
+            return task.get("name", "")
+        return QVariant()
+
+    def set_tasks(self, tasks):
+        """整体替换列表中的任务"""
+        self.beginResetModel()
+        self.tasks = list(tasks)
+        self.endResetModel()
+
+    def update_tasks(self, tasks, max_ops=None):
+        """按任务ID增量更新行：只插入、删除和移动变化的行，视图的选中和滚动位置自然保留
+
+        Returns:
+            bool: 是否增量更新；变化过多时整体重置并返回False
+        """
+        tasks = list(tasks)
+        ops = reconcile_keys([task_key(task) for task in self.tasks], [task_key(task) for task in tasks], max_ops)
+        if ops is None:
+            self.set_tasks(tasks)
+            return False
+
+        new_tasks = {task_key(task): task for task in tasks}
+        root = QModelIndex()
+        for op in ops:
+            if op[0] == "remove":
+                _, first, last = op
+                self.beginRemoveRows(root, first, last)
+                del self.tasks[first:last + 1]
+                self.endRemoveRows()
+            elif op[0] == "move":
+                _, source, destination = op
+                self.beginMoveRows(root, source, source, root, destination)
+                task = self.tasks.pop(source)
+                self.tasks.insert(destination if destination < source else destination - 1, task)
+                self.endMoveRows()
+            else:
+                _, row, key = op
+                self.beginInsertRows(root, row, row)
+                self.tasks.insert(row, new_tasks[key])
+                self.endInsertRows()
+
+        # 行顺序已与新列表一致，换成新的任务对象并通知内容可能变化（只会重绘可见行）
+        self.tasks = tasks
+        if tasks:
+            self.dataChanged.emit(self.index(0), self.index(len(tasks) - 1))
+        return True
+
+    def task_at(self, row):
+        """获取指定行的任务，越界时返回None"""
+        if 0 <= row < len(self.tasks):
+            return self.tasks[row]
+        return None
+
+
+class TaskItemDelegate(QStyledItemDelegate):
+    """直接绘制任务行的委托：色块、序号、任务信息、倒计时和进度条
+
+    绘制内容与 TaskItemWidget 保持一致，但不创建任何子控件。所有行高度相同，
+    配合 setUniformItemSizes 时视图无需逐行计算尺寸。
+    """
+    MARGIN = 5
+    SPACING = 5
+    COLOR_BAR_WIDTH = 6
+    INDEX_WIDTH = 25
+    PROGRESS_HEIGHT = 12
+
+    def __init__(self, task_type, time_formatter=None, parent=None):
+        super().__init__(parent)
+        self.task_type = task_type
+        self.time_formatter = time_formatter  # 任务 -> 倒计时文本，通常为 TaskHandler.calculate_time_remaining
+
+        self.name_font = QFont()
+        self.name_font.setPointSize(13)
+        self.name_font.setBold(True)
+        self.index_font = QFont()
+        self.index_font.setPointSize(11)
+        self.index_font.setBold(True)
+        self.info_font = QFont()
+        self.info_font.setPointSize(11)
+        self.meta_font = QFont()
+        self.meta_font.setPointSize(10)
+        self.bold_font = QFont()
+        self.bold_font.setPointSize(10)
+        self.bold_font.setBold(True)
+        self.progress_font = QFont()
+        self.progress_font.setPixelSize(10)
+        self.progress_font.setBold(True)
+        if task_type == "done":
+            # 已完成任务添加删除线
+            for font in (self.name_font, self.info_font, self.meta_font, self.bold_font):
+                font.setStrikeOut(True)
+
+        self.line_heights = {
+            font_name: QFontMetrics(getattr(self, font_name)).height()
+            for font_name in ("name_font", "info_font", "meta_font", "bold_font")
+        }
+        self.row_height = self._calculate_row_height()
+
+    def _calculate_row_height(self):
+        """按最多的行数计算固定行高"""
+        heights = [self.line_heights["name_font"], self.line_heights["info_font"]]
+        # 创建时间、截止日期、类别、标签
+        heights += [self.line_heights["meta_font"]] * 4
+        if self.task_type == "done":
+            heights += [self.line_heights["bold_font"], self.line_heights["bold_font"]]  # 完成日期、完成状态
+        else:
+            heights += [self.line_heights["bold_font"], self.PROGRESS_HEIGHT]  # 倒计时、进度条
+        return sum(heights) + self.SPACING * (len(heights) - 1) + self.MARGIN * 2 + 6
+
+    def sizeHint(self, option, index):
+        return QSize(0, self.row_height)
+
+    def _bar_color(self, task):
+        """左侧色块颜色"""
+        if self.task_type == "overdue":
+            return OVERDUE_COLOR
+        if self.task_type == "done":
+            return DONE_COLOR
+        return URGENCY_COLORS.get(task.get("urgency"), QColor(200, 200, 200))
+
+    def _lines(self, task):
+        """生成要绘制的文本行：(文本, 字体属性名, 颜色)"""
+        stars = "★" * task.get("importance", 0) + "☆" * (3 - task.get("importance", 0))
+        lines = [
+            (task.get("name", ""), "name_font", None),
+            (f"重要度: {stars} | 紧急度: {task.get('urgency')}", "info_font", None),
+            (f"创建时间：{task.get('create_time', '')}", "meta_font", None),
+            (f"截止日期：{task.get('deadline', '无截止日期')}", "meta_font", None),
+        ]
+        if self.task_type == "done":
+            lines.append((f"完成日期：{task.get('done_time', '')}", "bold_font", self._done_color(task)))
+        if task.get("category"):
+            lines.append((f"类别: {task['category']}", "meta_font", CATEGORY_COLOR))
+        if task.get("tags"):
+            lines.append((f"标签: {', '.join(task['tags'])}", "meta_font", TAG_COLOR))
+        if self.task_type == "done":
+            late = self._is_late_completion(task)
+            lines.append(("[超时完成]" if late else "[已完成]", "bold_font", self._done_color(task)))
+        else:
+            time_text = self.time_formatter(task) if self.time_formatter else ""
+            lines.append((time_text, "bold_font", self._countdown_color(time_text)))
+        return lines
+
+    @staticmethod
+    def _is_late_completion(task):
+        """是否超时完成（与 TaskItemWidget 相同，按日期比较）"""
+        deadline = task.get("deadline")
+        done_time = task.get("done_time")
+        if not deadline or deadline == "无截止日期" or not done_time:
+            return False
+        return done_time[:10] > deadline[:10]
+
+    def _done_color(self, task):
+        return LATE_COLOR if self._is_late_completion(task) else TAG_COLOR
+
+    @staticmethod
+    def _countdown_color(time_text):
+        """倒计时颜色：超时红色，不足一天橙色，其余蓝色"""
+        if "已超时" in time_text:
+            return LATE_COLOR
+        if "剩余" in time_text:
+            if any(part in time_text for part in ["分钟", "小时"]) and "天" not in time_text:
+                return SOON_COLOR
+            return REMAINING_COLOR
+        return None
+
+    def paint(self, painter, option, index):
+        task = index.data(TaskRole)
+        if not task:
+            return
+        painter.save()
+        painter.setRenderHint(painter.Antialiasing)
+        rect = option.rect.adjusted(0, 3, 0, -3)
+
+        # 选中背景
+        if option.state & QStyle.State_Selected:
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(SELECTED_COLOR)
+            painter.drawRoundedRect(rect, 6, 6)
+
+        content = rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+
+        # 左侧色块
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self._bar_color(task))
+        painter.drawRoundedRect(QRect(content.left(), content.top(), self.COLOR_BAR_WIDTH, content.height()), 3, 3)
+
+        # 序号
+        x = content.left() + self.COLOR_BAR_WIDTH + 8
+        painter.setPen(option.palette.text().color())
+        painter.setFont(self.index_font)
+        painter.drawText(QRect(x, content.top(), self.INDEX_WIDTH, self.line_heights["info_font"]),
+                         Qt.AlignTop | Qt.AlignRight, f"{index.row() + 1}.")
+
+        # 文本行
+        x += self.INDEX_WIDTH + 8
+        width = content.right() - x
+        y = content.top()
+        for text, font_name, color in self._lines(task):
+            height = self.line_heights[font_name]
+            painter.setFont(getattr(self, font_name))
+            painter.setPen(color if color is not None else option.palette.text().color())
+            painter.drawText(QRect(x, y, width, height), Qt.AlignLeft | Qt.AlignVCenter, text)
+            y += height + self.SPACING
+
+        # 进度条（已完成任务不显示）
+        if self.task_type != "done":
+            self._paint_progress(painter, QRect(x, y, min(width, 400), self.PROGRESS_HEIGHT), task)
+        painter.restore()
+
+    def _paint_progress(self, painter, rect, task):
+        """绘制与 TaskItemWidget 样式一致的进度条"""
+        progress = task_progress(task, datetime.now().timestamp())
+        if self.task_type == "overdue":
+            background, chunk = URGENCY_BG_COLORS[1], OVERDUE_COLOR
+        else:
+            background = URGENCY_BG_COLORS.get(task.get("urgency"), QColor("#f0f0f0"))
+            chunk = URGENCY_COLORS.get(task.get("urgency"), QColor(100, 180, 250))
+
+        painter.setPen(QColor("#ccc"))
+        painter.setBrush(background)
+        painter.drawRoundedRect(rect, 6, 6)
+        if progress > 0:
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(chunk)
+            painter.drawRoundedRect(QRect(rect.left(), rect.top(), rect.width() * progress // 100, rect.height()), 5, 5)
+        painter.setPen(QColor("#333"))
+        painter.setFont(self.progress_font)
+        painter.drawText(rect, Qt.AlignCenter, f"{progress}%")
@@ -1,9 +1,19 @@
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QListWidget,
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QListWidget, QListView,
                              QPushButton, QGroupBox, QHBoxLayout,
                              QListWidgetItem, QLabel, QProgressBar)
 from PyQt5.QtCore import Qt, QSize, QEvent
 from PyQt5.QtGui import QFont, QColor, QPalette
 from datetime import datetime
+import logging
+import time
+
+from core.task_times import parse_timestamp, task_timestamp
+from ui.task_model import TaskListModel, TaskItemDelegate, TaskRole, progress_percent, reconcile_keys, task_key
+
+logger = logging.getLogger(__name__)
+
+# 增量刷新时超过该数量的行操作就整体重建列表
+MAX_SYNC_OPS = 200
 
 
 def format_time_display(days, hours, minutes, seconds, is_overdue=False):
@@ -14,9 +24,6 @@ def format_time_display(days, hours, minutes, seconds, is_overdue=False):
     """
     parts = []
     
-    # 添加调试信息
-    print(f"format_time_display输入 - 天: {days}, 小时: {hours}, 分钟: {minutes}, 秒: {seconds}, 超时: {is_overdue}")
-    
     if days > 0:
         parts.append(f"{days}天")
     if hours > 0:
@@ -34,8 +41,6 @@ def format_time_display(days, hours, minutes, seconds, is_overdue=False):
     elif seconds > 0 and not hours and not days:
         parts.append(f"{seconds}秒")
     
-    print(f"format_time_display输出 - 时间部分: {parts}")
-    
     # 使用半角冒号而不是全角冒号，单位之间添加空格
     prefix = "已超时: " if is_overdue else "剩余: "
     return f"{prefix}{' '.join(parts)}"
@@ -52,6 +57,9 @@ class TaskItemWidget(QWidget):
         self.deadline = deadline
         self.done_time = done_time
         self.task_data = task_data  # 存储完整的任务数据引用
+        self.task_id = task_data.get("id") if task_data else None  # 任务唯一ID，用于选中后定位任务
+        # 创建时的显示内容签名，增量刷新时据此判断是否需要重建
+        self.signature = self.content_signature(task_data) if task_data else None
         self.setAutoFillBackground(True)
         self.setMouseTracking(True)  # 启用鼠标跟踪
         # 确保小部件能接收鼠标事件
@@ -83,20 +91,22 @@ class TaskItemWidget(QWidget):
         main_layout.setSpacing(8)
 
         # 左侧紧急度/状态色块
-        color_bar = QWidget()
-        color_bar.setFixedWidth(6)
-        color_bar.setStyleSheet(f"border-radius: 3px; {self.get_color_style()}")
-        main_layout.addWidget(color_bar)
+        self.color_bar = QWidget()
+        self.color_bar.setFixedWidth(6)
+        self.color_bar.setStyleSheet(f"border-radius: 3px; {self.get_color_style()}")
+        main_layout.addWidget(self.color_bar)
+        self.time_label = None  # 倒计时标签（已完成任务没有）
+        self.time_style = None  # 倒计时标签当前的样式，未变化时不重复设置
 
         # 序号标签
-        index_label = QLabel(f"{self.index}.")
+        self.index_label = QLabel(f"{self.index}.")
         index_font = QFont()
         index_font.setPointSize(11)
         index_font.setBold(True)
-        index_label.setFont(index_font)
-        index_label.setAlignment(Qt.AlignTop | Qt.AlignRight)
-        index_label.setFixedWidth(25)
-        main_layout.addWidget(index_label)
+        self.index_label.setFont(index_font)
+        self.index_label.setAlignment(Qt.AlignTop | Qt.AlignRight)
+        self.index_label.setFixedWidth(25)
+        main_layout.addWidget(self.index_label)
 
         content_layout = QVBoxLayout()
         content_layout.setContentsMargins(0, 0, 0, 0)
@@ -157,24 +167,12 @@ class TaskItemWidget(QWidget):
                 # 检查是否为超时完成
                 is_overdue_completion = False
                 if self.deadline and self.deadline != "无截止日期" and display_time:
-                    try:
-                        # 解析完成时间和截止时间
-                        done_dt = datetime.strptime(display_time, "%Y-%m-%d %H:%M:%S")
-                        # 尝试多种格式解析截止日期
-                        deadline_formats = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"]
-                        deadline_dt = None
-                        for fmt in deadline_formats:
-                            try:
-                                deadline_dt = datetime.strptime(self.deadline, fmt)
-                                break
-                            except ValueError:
-                                continue
-                        # 如果都成功解析且完成时间晚于截止日期，则为超时完成
-                        if deadline_dt and done_dt > deadline_dt:
-                            is_overdue_completion = True
-                    except:
-                        # 解析失败时默认为正常完成
-                        pass
+                    # 解析完成时间和截止时间，解析失败时默认为正常完成
+                    done_ts = self._timestamp_of("done_time", display_time)
+                    deadline_ts = self._timestamp_of("deadline", self.deadline)
+                    # 如果都成功解析且完成时间晚于截止日期，则为超时完成
+                    if done_ts is not None and deadline_ts is not None and done_ts > deadline_ts:
+                        is_overdue_completion = True
                 
                 # 根据是否超时完成设置不同颜色
                 if is_overdue_completion:
@@ -234,15 +232,18 @@ class TaskItemWidget(QWidget):
             
             # 根据倒计时内容设置不同颜色
             if "已超时" in lines[-1]:
-                time_label.setStyleSheet("color: rgb(220, 50, 50);")  # 超时显示红色
+                self.time_style = "color: rgb(220, 50, 50);"  # 超时显示红色
             elif "剩余" in lines[-1]:
                 # 检查剩余时间，如果小于1天则显示橙色
                 if any(part in lines[-1] for part in ["分钟", "小时"]) and "天" not in lines[-1]:
-                    time_label.setStyleSheet("color: rgb(245, 120, 0);")  # 短时间显示橙色
+                    self.time_style = "color: rgb(245, 120, 0);"  # 短时间显示橙色
                 else:
-                    time_label.setStyleSheet("color: rgb(0, 80, 150);")  # 正常剩余时间显示蓝色
+                    self.time_style = "color: rgb(0, 80, 150);"  # 正常剩余时间显示蓝色
+            if self.time_style:
+                time_label.setStyleSheet(self.time_style)
             
             content_layout.addWidget(time_label)
+            self.time_label = time_label
             
             # 添加进度条 - 仅非已完成任务显示
             self.progress_bar = QProgressBar()
@@ -279,8 +280,10 @@ class TaskItemWidget(QWidget):
             if not display_done_time:
                 display_done_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
-            # 简单的调试输出
-            print(f"调试 - 任务: {lines[0]}, 完成时间: {display_done_time}, 截止日期: {self.deadline}")
+            # 每个已完成任务都会执行，调试关闭时不格式化日志
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug("任务: %s, 完成时间: %s, 截止日期: %s", lines[0], display_done_time, self.deadline)
             
             # 判断是否超时完成
             if display_done_time and self.deadline and self.deadline != "无截止日期":
@@ -290,40 +293,25 @@ class TaskItemWidget(QWidget):
                     done_date_str = display_done_time[:10]  # 提取 YYYY-MM-DD 部分
                     deadline_date_str = self.deadline[:10]  # 提取 YYYY-MM-DD 部分
                     
-                    print(f"调试 - 比较日期: {done_date_str} vs {deadline_date_str}")
-                    
                     # 直接字符串比较（YYYY-MM-DD格式可以直接比较）
                     if done_date_str > deadline_date_str:
                         is_overdue_completion = True
-                        print("调试 - 判断为超时完成")
-                    else:
-                        print("调试 - 判断为正常完成")
+                    if debug:
+                        logger.debug("比较日期: %s vs %s，判断为%s", done_date_str, deadline_date_str,
+                                     "超时完成" if is_overdue_completion else "正常完成")
                 except:
-                    # 字符串比较失败时，尝试使用datetime解析
-                    try:
-                        # 解析完成时间
-                        if ' ' in display_done_time:
-                            done_dt = datetime.strptime(display_done_time, "%Y-%m-%d %H:%M:%S")
-                        else:
-                            done_dt = datetime.strptime(display_done_time, "%Y-%m-%d")
-                        
-                        # 解析截止日期
-                        for fmt in ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"]:
-                            try:
-                                deadline_dt = datetime.strptime(self.deadline, fmt)
-                                if done_dt > deadline_dt:
-                                    is_overdue_completion = True
-                                break
-                            except:
-                                continue
-                    except:
-                        pass
+                    # 字符串比较失败时，改用解析后的时间戳比较
+                    done_ts = self._timestamp_of("done_time", display_done_time)
+                    deadline_ts = self._timestamp_of("deadline", self.deadline)
+                    if done_ts is not None and deadline_ts is not None and done_ts > deadline_ts:
+                        is_overdue_completion = True
             
             # 强制设置标签文本和颜色
             label_text = "[超时完成]" if is_overdue_completion else "[已完成]"
             label_color = "color: rgb(220, 50, 50);" if is_overdue_completion else "color: rgb(100, 180, 100);"
             
-            print(f"调试 - 最终标签: {label_text}, 颜色: {label_color}")
+            if debug:
+                logger.debug("最终标签: %s, 颜色: %s", label_text, label_color)
             
             done_label = QLabel(label_text)
             done_label.setStyleSheet(label_color)  # 直接设置样式
@@ -352,6 +340,20 @@ class TaskItemWidget(QWidget):
                     font.setStrikeOut(True)
                     widget.setFont(font)
     
+    @staticmethod
+    def content_signature(task):
+        """除倒计时外影响显示内容的字段（倒计时由 update_time_display 定时更新）"""
+        return (
+            task.get("name"), task.get("importance"), task.get("urgency"), task.get("deadline"),
+            task.get("create_time"), task.get("done_time"), task.get("category"), tuple(task.get("tags") or ())
+        )
+
+    def set_index(self, index):
+        """更新序号（行位置变化时）"""
+        if index != self.index:
+            self.index = index
+            self.index_label.setText(f"{index}.")
+
     def mousePressEvent(self, event):
         """增强的鼠标按下事件处理，确保可靠选中对应的QListWidgetItem"""
         # 调用父类方法
@@ -515,303 +517,67 @@ class TaskItemWidget(QWidget):
             }
             return urgency_colors.get(self.urgency, "background-color: rgb(200, 200, 200);")
     
-    def calculate_progress(self):
-        """根据创建时间和截止日期计算任务进度"""
-        if not self.create_time or not self.deadline or self.deadline == "无截止日期":
-            return 0
-        
-        try:
-            # 解析创建时间和截止日期
-            create_datetime = datetime.strptime(self.create_time, "%Y-%m-%d %H:%M:%S")
-            
-            # 尝试解析包含时间的格式
-            try:
-                deadline_datetime = datetime.strptime(self.deadline, "%Y-%m-%d %H:%M:%S")
-            except ValueError:
-                try:
-                    deadline_datetime = datetime.strptime(self.deadline, "%Y-%m-%d %H:%M")
-                except ValueError:
-                    # 回退到旧格式（仅日期）
-                    deadline_datetime = datetime.strptime(self.deadline, "%Y-%m-%d")
-            
-            now = datetime.now()
-            
-            # 计算总时间跨度（从创建到截止）
-            total_duration = deadline_datetime - create_datetime
-            if total_duration.total_seconds() <= 0:
-                return 100  # 无效的时间范围，认为已超时
-            
-            # 计算已过时间
-            elapsed = now - create_datetime
-            
-            # 计算进度百分比
-            progress_percentage = (elapsed.total_seconds() / total_duration.total_seconds()) * 100
-            
-            # 确保进度在0-100之间
-            return min(max(int(progress_percentage), 0), 100)
-        except Exception as e:
-            return 0  # 解析错误时返回0
-    
+    def _timestamp_of(self, field, value):
+        """解析时间字段，value 与任务数据中的值一致时直接使用任务上缓存的时间戳"""
+        if self.task_data is not None and value and self.task_data.get(field) == value:
+            return task_timestamp(self.task_data, field)
+        return parse_timestamp(value)
+
     def calculate_progress(self):
         """计算任务进度百分比"""
         if self.deadline and self.create_time and self.deadline != '无截止日期':
             # 计算时间百分比
-            now = datetime.now()
-            try:
-                # 解析创建时间
-                create_dt = datetime.strptime(self.create_time, '%Y-%m-%d %H:%M:%S')
-                
-                # 尝试不同的截止日期格式
-                try:
-                    # 尝试带时间的格式
-                    deadline_dt = datetime.strptime(self.deadline, '%Y-%m-%d %H:%M')
-                except ValueError:
-                    # 尝试只有日期的格式
-                    deadline_dt = datetime.strptime(self.deadline, '%Y-%m-%d')
-                    # 设置时间为当天的午夜
-                    deadline_dt = deadline_dt.replace(hour=23, minute=59, second=59)
-                
-                # 计算总时间和已用时间
-                total_time = (deadline_dt - create_dt).total_seconds()
-                elapsed_time = (now - create_dt).total_seconds()
-                
-                # 确保不会出现负数百分比
-                if elapsed_time < 0:
-                    elapsed_time = 0
-                
-                # 计算时间百分比
-                time_percentage = (elapsed_time / total_time) * 100 if total_time > 0 else 0
-                
-                # 确保百分比在0-100之间
-                if time_percentage > 100:
-                    time_percentage = 100
-                
-                return int(time_percentage)
-            except ValueError:
+            create_ts = self._timestamp_of("create_time", self.create_time)
+            deadline_ts = self._timestamp_of("deadline", self.deadline)
+            if create_ts is None or deadline_ts is None:
                 # 日期格式解析错误，返回0
                 return 0
+            if len(self.deadline) <= 10:
+                # 只有日期的截止时间按当天结束计算
+                deadline_ts += 24 * 3600 - 1
+            return progress_percent(create_ts, deadline_ts, datetime.now().timestamp())
         return 0
     
-    def _find_datetime_label(self, content_layout):
-        """查找包含日期信息的标签，优先找到包含截止日期的标签"""
-        # 首先尝试找到明确的截止日期标签
-        deadline_label = None
-        create_time_label = None
-        
-        for i in range(content_layout.count()):
-            widget = content_layout.itemAt(i).widget()
-            if isinstance(widget, QLabel):
-                text = widget.text()
-                # 优先识别截止日期标签
-                if any(keyword in text for keyword in ["截止日期", "截止", "完成日期", "期限", "deadline"]):
-                    deadline_label = widget
-                    print(f"找到明确的截止日期标签: {text}")
-                    return deadline_label
-                # 记录创建时间标签（作为后备）
-                elif "创建时间" in text or "创建" in text:
-                    create_time_label = widget
-                    print(f"找到创建时间标签: {text}")
-                # 检查是否包含多个日期（可能同时包含创建和截止日期）
-                elif any(char.isdigit() for char in text) and any(sep in text for sep in ["-", "/", "年", "月", "日"]) and text.count(":") >= 2:
-                    print(f"找到可能包含多个日期的标签: {text}")
-                    return widget
-        
-        # 如果没有明确的截止日期标签，但有创建时间标签，也返回它
-        if create_time_label:
-            print("没有找到截止日期标签，使用创建时间标签作为后备")
-            return create_time_label
-        
-        # 如果没找到特定标签，返回第三个QLabel（这是原始逻辑中的位置）
-        for i in range(content_layout.count()):
-            widget = content_layout.itemAt(i).widget()
-            if isinstance(widget, QLabel) and i >= 2:  # 尝试第三个及以后的标签
-                print(f"回退到默认标签位置 {i}: {widget.text()}")
-                return widget
-        
-        print("未找到任何可能的日期标签")
-        return None
-    
-    def _find_time_label(self, content_layout):
-        """查找显示倒计时的标签"""
-        # 在初始化时，时间标签是最后一个添加的QLabel（在进度条之前）
-        # 从后往前查找，寻找加粗且包含剩余或超时文本的标签
-        for i in range(content_layout.count() - 1, -1, -1):
-            widget = content_layout.itemAt(i).widget()
-            if isinstance(widget, QLabel):
-                font = widget.font()
-                text = widget.text()
-                if font.bold() and ("剩余" in text or "已超时" in text):
-                    return widget
-        # 如果没找到符合条件的标签，返回最后一个QLabel
-        for i in range(content_layout.count() - 1, -1, -1):
-            widget = content_layout.itemAt(i).widget()
-            if isinstance(widget, QLabel):
-                return widget
-        return None
-        
     def update_time_display(self):
-        """更新任务的时间显示"""
-        # 添加日志输出
-        print(f"更新任务时间显示 - 任务索引: {self.index}")
-        
-        # 获取内容布局
-        main_layout = self.layout()
-        if not main_layout or main_layout.count() <= 2:
-            print(f"任务{self.index}: 未找到有效布局")
-            return
-            
-        content_layout_item = main_layout.itemAt(2)
-        if not content_layout_item or not hasattr(content_layout_item, 'layout'):
-            print(f"任务{self.index}: 未找到内容布局")
+        """根据缓存的截止时间戳更新倒计时和进度条，内容没有变化时不触碰控件"""
+        if self.time_label is None or not self.deadline or self.deadline == "无截止日期":
             return
-            
-        content_layout = content_layout_item.layout()
-        
-        # 使用更智能的方式查找标签
-        datetime_label = self._find_datetime_label(content_layout)
-        time_label = self._find_time_label(content_layout)
-        
-        if not datetime_label:
-            print(f"任务{self.index}: 未找到日期时间标签")
-        if not time_label:
-            print(f"任务{self.index}: 未找到时间标签")
-        if not datetime_label or not time_label:
+        deadline_ts = self._timestamp_of("deadline", self.deadline)
+        if deadline_ts is None:
             return
-            
-        print(f"任务{self.index}: 找到标签，开始更新倒计时")
-            
-        # 解析日期信息，尝试提取截止日期
-        datetime_text = datetime_label.text()
-        print(f"正在解析日期文本: {datetime_text}")
-        
-        # 尝试多种方式提取截止日期
-        deadline_str = None
-        
-        # 1. 检查是否包含明确的截止日期标识
-        if "截止日期：" in datetime_text:
-            deadline_str = datetime_text.split("截止日期：")[1].strip()
-            # 如果提取的字符串较长，可能包含额外信息，尝试找到第一个有效的日期部分
-            if len(deadline_str) > 20:
-                import re
-                # 尝试匹配日期时间格式
-                date_match = re.search(r'\d{4}[-/]\d{1,2}[-/]\d{1,2}\s+\d{1,2}:\d{2}(:\d{2})?', deadline_str)
-                if date_match:
-                    deadline_str = date_match.group(0)
-        elif "截止：" in datetime_text:
-            deadline_str = datetime_text.split("截止：")[1].strip()
-        elif "完成日期：" in datetime_text:
-            deadline_str = datetime_text.split("完成日期：")[1].strip()
-        elif "期限：" in datetime_text:
-            deadline_str = datetime_text.split("期限：")[1].strip()
-        
-        # 2. 如果文本包含多个日期，尝试提取第二个日期（通常是截止日期）
-        if not deadline_str and datetime_text.count(" ") >= 3:
-            import re
-            # 尝试找到所有日期时间格式
-            dates = re.findall(r'\d{4}[-/]\d{1,2}[-/]\d{1,2}\s+\d{1,2}:\d{2}(:\d{2})?', datetime_text)
-            if len(dates) >= 2:
-                deadline_str = dates[1]  # 使用第二个日期作为截止日期
-                print(f"提取到第二个日期作为截止日期: {deadline_str}")
-        
-        # 使用对象的deadline属性
-        if not deadline_str and hasattr(self, 'deadline') and self.deadline and self.deadline != "无截止日期":
-            deadline_str = self.deadline
-            print(f"使用对象的deadline属性: {deadline_str}")
-        
-        # 如果找到截止日期信息
-        if deadline_str and deadline_str != "无截止日期":
-            print(f"最终确定的截止日期: {deadline_str}")
-            # 尝试多种日期格式解析
-            deadline = None
-            formats = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"]
-            
-            for fmt in formats:
-                try:
-                    deadline = datetime.strptime(deadline_str, fmt)
-                    break
-                except ValueError:
-                    continue
-            
-            if deadline:
-                now = datetime.now()
-                
-                if now > deadline:
-                    # 超时，计算超时时间
-                    self.is_overdue = True
-                    overdue = now - deadline
-                    days = overdue.days
-                    hours, remainder = divmod(overdue.seconds, 3600)
-                    minutes, seconds = divmod(remainder, 60)
-                    
-                    # 使用统一的格式化函数
-                    time_text = format_time_display(days, hours, minutes, seconds, is_overdue=True)
-                    
-                    # 确保字体设置与初始化时一致（加粗且大小为10）
-                    time_font = QFont()
-                    time_font.setPointSize(10)
-                    time_font.setBold(True)
-                    time_label.setFont(time_font)
-                    time_label.setStyleSheet("color: rgb(220, 50, 50);")  # 超时显示红色
-                    
-                    # 更新左侧色块为红色
-                    color_bar_item = main_layout.itemAt(0)
-                    if color_bar_item:
-                        color_bar = color_bar_item.widget()
-                        if color_bar:
-                            color_bar.setStyleSheet("border-radius: 3px; background-color: rgb(255, 90, 90);")
-                    
-                    # 直接更新标签文本，确保立即生效
-                    old_text = time_label.text()
-                    time_label.setText(time_text)
-                    time_label.update()  # 强制更新显示
-                    print(f"任务{self.index}: 超时显示已更新 - 从 '{old_text}' 到 '{time_text}'")
-                    
-                    # 更新进度条
-                    if hasattr(self, 'progress_bar'):
-                        progress_value = self.calculate_progress()
-                        self.progress_bar.setValue(progress_value)
-                        self.progress_bar.update()  # 强制更新进度条
-                        self.set_progress_bar_style()
-                        print(f"任务{self.index}: 进度条已更新为 {progress_value}%")
-                else:
-                    # 计算剩余时间
-                    remaining = deadline - now
-                    days = remaining.days
-                    hours, remainder = divmod(remaining.seconds, 3600)
-                    minutes, seconds = divmod(remainder, 60)
-                    
-                    # 添加调试信息
-                    print(f"任务{self.index}: 剩余时间计算 - 天: {days}, 小时: {hours}, 分钟: {minutes}, 秒: {seconds}")
-                    
-                    # 使用统一的格式化函数
-                    time_text = format_time_display(days, hours, minutes, seconds, is_overdue=False)
-                    print(f"任务{self.index}: 格式化后的时间文本: '{time_text}'")
-                    # 确保字体设置与初始化时一致（加粗且大小为10）
-                    time_font = QFont()
-                    time_font.setPointSize(10)
-                    time_font.setBold(True)
-                    time_label.setFont(time_font)
-                    
-                    # 根据剩余时间设置颜色
-                    if days > 0:
-                        time_label.setStyleSheet("color: rgb(0, 80, 150);")  # 正常剩余时间显示蓝色
-                    else:
-                        time_label.setStyleSheet("color: rgb(245, 120, 0);")  # 短时间显示橙色
-                    
-                    # 直接更新标签文本，确保立即生效
-                    old_text = time_label.text()
-                    time_label.setText(time_text)
-                    time_label.update()  # 强制更新显示
-                    print(f"任务{self.index}: 倒计时已更新 - 从 '{old_text}' 到 '{time_text}'")
-                    
-                    # 更新进度条
-                    if hasattr(self, 'progress_bar'):
-                        progress_value = self.calculate_progress()
-                        self.progress_bar.setValue(progress_value)
-                        self.progress_bar.update()  # 强制更新进度条
-                        self.set_progress_bar_style()
-                        print(f"任务{self.index}: 进度条已更新为 {progress_value}%")
-                    
+
+        remaining = deadline_ts - time.time()
+        is_overdue = remaining < 0
+        days, rest = divmod(int(abs(remaining)), 24 * 3600)
+        hours, rest = divmod(rest, 3600)
+        minutes, seconds = divmod(rest, 60)
+        time_text = format_time_display(days, hours, minutes, seconds, is_overdue=is_overdue)
+
+        if is_overdue:
+            time_style = "color: rgb(220, 50, 50);"  # 超时显示红色
+            if not self.is_overdue:
+                # 刚刚超时：左侧色块改为红色
+                self.is_overdue = True
+                self.color_bar.setStyleSheet("border-radius: 3px; background-color: rgb(255, 90, 90);")
+                if hasattr(self, 'progress_bar'):
+                    self.set_progress_bar_style()
+        elif days > 0:
+            time_style = "color: rgb(0, 80, 150);"  # 正常剩余时间显示蓝色
+        else:
+            time_style = "color: rgb(245, 120, 0);"  # 短时间显示橙色
+
+        if self.time_label.text() != time_text:
+            self.time_label.setText(time_text)
+        if self.time_style != time_style:
+            self.time_style = time_style
+            self.time_label.setStyleSheet(time_style)
+
+        # 更新进度条
+        if hasattr(self, 'progress_bar'):
+            progress_value = self.calculate_progress()
+            if self.progress_bar.value() != progress_value:
+                self.progress_bar.setValue(progress_value)
+
     def update_task_text(self, text):
         """更新任务文本内容"""
         main_layout = self.layout()
@@ -844,37 +610,55 @@ class TaskItemWidget(QWidget):
 
 
 class TaskListWidget(QWidget):
-    def __init__(self, task_type, parent=None):
+    """任务列表
+
+    view_mode 为 "widget" 时每个任务创建一个 TaskItemWidget；为 "delegate" 时使用
+    TaskListModel + TaskItemDelegate，由委托直接绘制，只有可见的行才有开销，适合大量任务。
+    """
+    def __init__(self, task_type, parent=None, view_mode="widget", time_formatter=None):
         super().__init__(parent)
         self.task_type = task_type
+        self.view_mode = view_mode
+        self.time_formatter = time_formatter  # 委托模式下计算倒计时文本
         self.init_ui()
 
     def init_ui(self):
         layout = QVBoxLayout(self)
 
-        self.list_widget = QListWidget()
+        if self.view_mode == "delegate":
+            self.list_widget = QListView()
+            self.model = TaskListModel(self.task_type, self)
+            self.delegate = TaskItemDelegate(self.task_type, self.time_formatter, self)
+            self.list_widget.setModel(self.model)
+            self.list_widget.setItemDelegate(self.delegate)
+            # 所有行高度相同，视图无需逐行计算尺寸；按像素滚动保证大列表滚动平滑
+            self.list_widget.setUniformItemSizes(True)
+            self.list_widget.setVerticalScrollMode(QListView.ScrollPerPixel)
+            self.list_widget.selectionModel().selectionChanged.connect(self.on_item_selection_changed)
+        else:
+            self.list_widget = QListWidget()
+            self.model = None
+            # 连接选择事件信号，增强选择隔离性
+            self.list_widget.itemSelectionChanged.connect(self.on_item_selection_changed)
         self.list_widget.setAlternatingRowColors(False)
-        self.list_widget.setSelectionMode(QListWidget.SingleSelection)
+        self.list_widget.setSelectionMode(QListView.SingleSelection)
         self.list_widget.setSpacing(8)
         self.list_widget.setStyleSheet("""
-            QListWidget {
+            QListView {
                 border: 1px solid #ddd;
                 border-radius: 6px;
                 padding: 8px;
                 background-color: #ffffff;
             }
-            QListWidget::item {
+            QListView::item {
                 margin: 3px 0;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #e6f2ff;
                 border-radius: 6px;
             }
         """)
         
-        # 连接选择事件信号，增强选择隔离性
-        self.list_widget.itemSelectionChanged.connect(self.on_item_selection_changed)
-        
         # 设置焦点策略
         self.list_widget.setFocusPolicy(Qt.StrongFocus)
         self.list_widget.focusInEvent = lambda event: self.on_focus_in(event)
@@ -902,12 +686,25 @@ class TaskListWidget(QWidget):
             self.done_btn.setStyleSheet(btn_style + "font-weight: bold;")
             layout.addWidget(self.done_btn)
 
+        if self.task_type == "done":
+            # 已完成列表分页显示，滚动到接近底部时自动加载下一页，列表不满一屏时通过按钮加载
+            self.more_btn = QPushButton("加载更多")
+            self.more_btn.setMinimumHeight(36)
+            self.more_btn.setStyleSheet(btn_style)
+            self.more_btn.setVisible(False)
+            layout.addWidget(self.more_btn)
+
         self.delete_btn = QPushButton("删除任务")
         self.delete_btn.setMinimumHeight(36)  # 增大按钮高度
         self.delete_btn.setStyleSheet(btn_style)
         layout.addWidget(self.delete_btn)
 
     def add_task_item(self, task_text, index, urgency=1, is_overdue=False, is_done=False, create_time=None, deadline=None, done_time=None, task_data=None):
+        self.insert_task_item(self.list_widget.count(), task_text, index, urgency, is_overdue, is_done,
+                              create_time, deadline, done_time, task_data)
+
+    def insert_task_item(self, row, task_text, index, urgency=1, is_overdue=False, is_done=False, create_time=None, deadline=None, done_time=None, task_data=None):
+        """在指定行插入任务控件"""
         task_widget = TaskItemWidget(
             task_text,
             index,
@@ -924,21 +721,118 @@ class TaskListWidget(QWidget):
         
         item = QListWidgetItem()
         item.setSizeHint(QSize(0, 200))  # 进一步增加高度，确保所有任务项（包括第三项）都能完全显示所有内容
-        self.list_widget.addItem(item)
+        self.list_widget.insertItem(row, item)
         self.list_widget.setItemWidget(item, task_widget)
         
         # 确保QListWidgetItem能够正确响应鼠标事件
         item.setFlags(item.flags() | Qt.ItemIsSelectable | Qt.ItemIsEnabled)
 
+    def set_tasks(self, tasks):
+        """委托模式下整体设置列表中的任务（不创建任何控件）"""
+        self.model.set_tasks(tasks)
+
+    def sync_tasks(self, tasks, text_formatter):
+        """按任务ID把列表增量更新为 tasks 的内容和顺序
+
+        只插入、删除和移动变化的行，未变化的行保持不动，选中项和滚动位置因此自然保留。
+        变化太多时（如切换筛选条件）整体重建，再按任务ID恢复选中项。
+        text_formatter 为任务 -> 显示文本的函数，仅控件模式使用。
+        """
+        selected_id = self.get_selected_task_id()
+        scroll_pos = self.save_scroll_position()
+        if self.model is not None:
+            incremental = self.model.update_tasks(tasks, MAX_SYNC_OPS)
+        else:
+            incremental = self._sync_task_items(tasks, text_formatter)
+
+        if not incremental:
+            # 整体重建后恢复滚动位置，并按任务ID恢复选中项
+            self.list_widget.doItemsLayout()
+            self.restore_scroll_position(scroll_pos)
+            if selected_id is not None:
+                for row, task in enumerate(tasks):
+                    if task.get("id") == selected_id:
+                        self.restore_selection(row)
+                        break
+
+    def _sync_task_items(self, tasks, text_formatter):
+        """控件模式的增量更新：移动的行和内容变化的行重建控件，其余行只更新序号"""
+        def create_item(row, task):
+            self.insert_task_item(
+                row, text_formatter(task), index=row + 1, urgency=task["urgency"],
+                is_overdue=(self.task_type == "overdue"), is_done=(self.task_type == "done"),
+                create_time=task.get('create_time', None), deadline=task.get('deadline', None),
+                task_data=task
+            )
+
+        old_keys = []
+        for row in range(self.list_widget.count()):
+            task_widget = self.list_widget.itemWidget(self.list_widget.item(row))
+            old_keys.append(task_key(task_widget.task_data))
+        new_tasks = {task_key(task): task for task in tasks}
+        ops = reconcile_keys(old_keys, [task_key(task) for task in tasks], MAX_SYNC_OPS)
+        if ops is None:
+            self.list_widget.clear()
+            for row, task in enumerate(tasks):
+                create_item(row, task)
+            return False
+
+        selected_id = self.get_selected_task_id()
+        for op in ops:
+            if op[0] == "remove":
+                _, first, last = op
+                for row in range(last, first - 1, -1):
+                    self.list_widget.takeItem(row)
+            elif op[0] == "move":
+                # 行控件无法随行移动，删除后在新位置重建
+                _, source, destination = op
+                task = self.list_widget.itemWidget(self.list_widget.item(source)).task_data
+                self.list_widget.takeItem(source)
+                create_item(destination if destination < source else destination - 1, new_tasks[task_key(task)])
+            else:
+                _, row, key = op
+                create_item(row, new_tasks[key])
+
+        for row, task in enumerate(tasks):
+            item = self.list_widget.item(row)
+            task_widget = self.list_widget.itemWidget(item)
+            if task_widget.task_data is not task or task_widget.signature != TaskItemWidget.content_signature(task):
+                self.list_widget.takeItem(row)
+                create_item(row, task)
+            else:
+                task_widget.set_index(row + 1)
+
+        # 被移动或重建的行如果原来是选中项，重新选中
+        if selected_id is not None and self.get_selected_task_id() != selected_id:
+            for row, task in enumerate(tasks):
+                if task.get("id") == selected_id:
+                    self.restore_selection(row)
+                    break
+        return True
+
     def clear_list(self):
-        self.list_widget.clear()
+        if self.model is not None:
+            self.model.set_tasks([])
+        else:
+            self.list_widget.clear()
+
+    def count(self):
+        """列表中的任务数"""
+        if self.model is not None:
+            return self.model.rowCount()
+        return self.list_widget.count()
 
     def get_selected_index(self):
+        if self.model is not None:
+            rows = self.list_widget.selectionModel().selectedRows()
+            return rows[0].row() if rows else -1
         selected = self.list_widget.selectedItems()
         return self.list_widget.row(selected[0]) if selected else -1
         
     def get_selected_task_data(self):
         """获取选中项的任务数据"""
+        if self.model is not None:
+            return self.model.task_at(self.get_selected_index())
         selected = self.list_widget.selectedItems()
         if selected:
             item_widget = self.list_widget.itemWidget(selected[0])
@@ -946,6 +840,17 @@ class TaskListWidget(QWidget):
                 return item_widget.task_data
         return None
 
+    def get_selected_task_id(self):
+        """获取选中项的任务ID"""
+        if self.model is not None:
+            task = self.get_selected_task_data()
+            return task.get("id") if task else None
+        selected = self.list_widget.selectedItems()
+        if selected:
+            item_widget = self.list_widget.itemWidget(selected[0])
+            return getattr(item_widget, 'task_id', None)
+        return None
+
     def save_scroll_position(self):
         """保存当前列表的滚动位置"""
         return self.list_widget.verticalScrollBar().value()
@@ -956,13 +861,12 @@ class TaskListWidget(QWidget):
     
     def save_selection(self):
         """保存当前选中项的索引"""
-        selected = self.list_widget.selectedItems()
-        return self.list_widget.row(selected[0]) if selected else -1
+        return self.get_selected_index()
     
-    def on_item_selection_changed(self):
+    def on_item_selection_changed(self, *args):
         """处理任务选择变更事件，确保选择状态隔离"""
         # 当此列表有选择时，清除其他列表的选择状态
-        if self.list_widget.selectedItems():
+        if self.get_selected_index() >= 0:
             # 尝试通过父窗口获取所有任务列表实例
             parent = self.parent()
             if parent:
@@ -981,7 +885,7 @@ class TaskListWidget(QWidget):
         # 当此列表获得焦点时，确保其他列表没有选中项
         self.on_item_selection_changed()
         # 调用原始的焦点事件处理
-        super(QListWidget, self.list_widget).focusInEvent(event)
+        type(self.list_widget).focusInEvent(self.list_widget, event)
         
     def restore_selection(self, index):
         """恢复列表的选中状态但不自动滚动，确保选择状态在正确的列表内恢复"""
@@ -989,9 +893,13 @@ class TaskListWidget(QWidget):
         if not hasattr(self, 'list_widget') or self.list_widget is None:
             return
             
-        if 0 <= index < self.list_widget.count():
-            item = self.list_widget.item(index)
-            if item:
+        if 0 <= index < self.count():
+            if self.model is not None:
+                model_index = self.model.index(index)
+            else:
+                item = self.list_widget.item(index)
+                model_index = self.list_widget.indexFromItem(item) if item else None
+            if model_index is not None:
                 # 使用selectionModel设置选中状态而不触发自动滚动
                 selection_model = self.list_widget.selectionModel()
                 if selection_model:
@@ -999,44 +907,53 @@ class TaskListWidget(QWidget):
                     selection_model.clearSelection()
                     
                     # 确保选择成功
-                    selection_success = selection_model.select(self.list_widget.indexFromItem(item), selection_model.Select)
+                    selection_success = selection_model.select(model_index, selection_model.Select)
                     
                     # 强制更新列表状态
                     self.list_widget.viewport().update()
                     
                     # 获取实际的选中项并验证，确保选中状态确实被应用到正确的项目
-                    selected_items = self.list_widget.selectedItems()
-                    if selected_items and self.list_widget.row(selected_items[0]) == index:
+                    if self.get_selected_index() == index:
                         # 验证成功，选择状态正确应用
                         pass
                     else:
                         # 验证失败，记录日志但不抛出异常
-                        print(f"TaskListWidget ({self.task_type}): 选中状态恢复验证失败")
+                        logger.debug("TaskListWidget (%s): 选中状态恢复验证失败", self.task_type)
+
+    def visible_rows(self):
+        """返回视口中可见的行范围 (first, last)，没有可见行时返回None"""
+        count = self.count()
+        if not count or not self.list_widget.isVisible():
+            return None
+        model = self.list_widget.model()
+        height = self.list_widget.viewport().height()
+        # 行按位置排列，二分查找第一个底边在视口内的行
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if self.list_widget.visualRect(model.index(middle, 0)).bottom() < 0:
+                low = middle + 1
+            else:
+                high = middle
+        if low >= count:
+            return None
+        last = low
+        while last + 1 < count and self.list_widget.visualRect(model.index(last + 1, 0)).top() < height:
+            last += 1
+        return low, last
 
     def update_time_display(self):
-        """更新列表中所有任务的时间显示，同时保留滚动位置和选中状态"""
-        # 保存当前滚动位置和选中状态
-        scroll_pos = self.save_scroll_position()
-        selected_index = self.save_selection()
-        
-        # 检查当前列表是否有焦点
-        has_focus = self.list_widget.hasFocus()
-        
-        # 更新所有任务的时间显示
-        for row in range(self.list_widget.count()):
-            item = self.list_widget.item(row)
-            task_widget = self.list_widget.itemWidget(item)
+        """更新视口中可见任务的倒计时显示，不可见的行不做任何处理"""
+        rows = self.visible_rows()
+        if rows is None:
+            return
+        first, last = rows
+        if self.model is not None:
+            # 委托模式下倒计时和进度在绘制时计算，通知可见行重绘即可
+            self.model.dataChanged.emit(self.model.index(first), self.model.index(last))
+            return
+
+        for row in range(first, last + 1):
+            task_widget = self.list_widget.itemWidget(self.list_widget.item(row))
             if hasattr(task_widget, 'update_time_display'):
                 task_widget.update_time_display()
-        
-        # 恢复滚动位置
-        self.restore_scroll_position(scroll_pos)
-        
-        # 只有在列表没有焦点或有选中项时才恢复选中状态
-        # 避免在用户正在交互时干扰选择
-        if selected_index >= 0 and (not has_focus or self.list_widget.selectedItems()):
-            self.restore_selection(selected_index)
-        
-        # 如果之前有焦点，恢复焦点
-        if has_focus:
-            self.list_widget.setFocus()
\ No newline at end of file